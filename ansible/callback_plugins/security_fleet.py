@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+SummitEthic callback plugin that streams security_check results into a
+controller-side SQLite store for fleet-wide analysis
+"""
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+    name: security_fleet
+    type: aggregate
+    short_description: Store security_check results in a fleet SQLite database
+    description:
+        - Records every security_check result and its issues in a local SQLite database as they arrive.
+        - The database is indexed by host, standard, severity and run date so fleet roll-ups stay fast.
+        - Query it with ansible/scripts/security-fleet-report.py.
+    requirements:
+        - enable in configuration (callbacks_enabled)
+    options:
+        db_path:
+            description: Path to the SQLite database on the controller.
+            default: /var/log/summitethic/security/fleet.db
+            env:
+                - name: SUMMITETHIC_SECURITY_FLEET_DB
+            ini:
+                - section: callback_security_fleet
+                  key: db_path
+            type: path
+        commit_interval:
+            description: Number of stored results between commits.
+            default: 200
+            env:
+                - name: SUMMITETHIC_SECURITY_FLEET_COMMIT_INTERVAL
+            ini:
+                - section: callback_security_fleet
+                  key: commit_interval
+            type: int
+'''
+
+import os
+import sqlite3
+from datetime import datetime
+
+from ansible.plugins.callback import CallbackBase
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_date TEXT NOT NULL,
+    started TEXT NOT NULL,
+    playbook TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    run_date TEXT NOT NULL,
+    host TEXT NOT NULL,
+    task TEXT,
+    scan_type TEXT,
+    target TEXT,
+    ethical_level TEXT,
+    score INTEGER,
+    rating TEXT,
+    compliance_status TEXT
+);
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    result_id INTEGER NOT NULL REFERENCES results(id),
+    run_date TEXT NOT NULL,
+    host TEXT NOT NULL,
+    standard TEXT,
+    standard_id TEXT,
+    severity TEXT,
+    rule TEXT,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_host ON results(host);
+CREATE INDEX IF NOT EXISTS idx_results_run_date ON results(run_date, host);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(host, run_id);
+CREATE INDEX IF NOT EXISTS idx_issues_result ON issues(result_id);
+CREATE INDEX IF NOT EXISTS idx_issues_host ON issues(host);
+CREATE INDEX IF NOT EXISTS idx_issues_standard ON issues(standard_id, standard);
+CREATE INDEX IF NOT EXISTS idx_issues_severity ON issues(severity);
+CREATE INDEX IF NOT EXISTS idx_issues_run_date ON issues(run_date, standard_id);
+'''
+
+
+class CallbackModule(CallbackBase):
+    """
+    Streams security_check results into the fleet database
+    """
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'security_fleet'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self.conn = None
+        self.run_id = None
+        self.run_date = None
+        self.playbook = None
+        self.failed = False
+        self.pending = 0
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CallbackModule, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+        self.db_path = self.get_option('db_path')
+        self.commit_interval = max(1, self.get_option('commit_interval'))
+
+    def _connect(self):
+        """Open the database and register a new run"""
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, mode=0o750, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+        now = datetime.now()
+        self.run_date = now.strftime('%Y-%m-%d')
+        cursor = self.conn.execute(
+            'INSERT INTO runs (run_date, started, playbook) VALUES (?, ?, ?)',
+            (self.run_date, now.isoformat(), self.playbook)
+        )
+        self.run_id = cursor.lastrowid
+        self.conn.commit()
+
+    def _store(self, host, task_name, result):
+        """Insert one security_check result and its issues"""
+        args = result.get('invocation', {}).get('module_args', {})
+        cursor = self.conn.execute(
+            'INSERT INTO results (run_id, run_date, host, task, scan_type, target, ethical_level, '
+            'score, rating, compliance_status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.run_id, self.run_date, host, task_name,
+             args.get('scan_type'), args.get('target'), args.get('ethical_level'),
+             result.get('score'),
+             result.get('ethical_assessment', {}).get('rating'),
+             result.get('compliance', {}).get('status'))
+        )
+        result_id = cursor.lastrowid
+
+        self.conn.executemany(
+            'INSERT INTO issues (result_id, run_date, host, standard, standard_id, severity, rule, description) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            ((result_id, self.run_date, host, issue.get('standard'),
+              (issue.get('standard') or 'N/A').split()[0].lower(),
+              issue.get('severity'), issue.get('rule'), issue.get('description'))
+             for issue in result['issues'])
+        )
+
+        self.pending += 1
+        if self.pending >= self.commit_interval:
+            self.conn.commit()
+            self.pending = 0
+
+    def v2_playbook_on_start(self, playbook):
+        # The database is only opened once a security_check result arrives,
+        # so other playbooks neither touch it nor record a run
+        self.playbook = os.path.basename(playbook._file_name)
+
+    def v2_runner_on_ok(self, result):
+        if self.failed or not result._task.action.endswith('security_check'):
+            return
+
+        if self.conn is None:
+            try:
+                self._connect()
+            except (OSError, sqlite3.Error) as e:
+                self._display.warning(f'security_fleet: cannot open {self.db_path}, results are not stored: {e}')
+                self.failed = True
+                return
+
+        host = result._host.get_name()
+        task_name = result._task.get_name()
+
+        # Looped tasks carry one result per item
+        items = result._result.get('results', [result._result])
+        for item in items:
+            if isinstance(item, dict) and 'issues' in item:
+                self._store(host, task_name, item)
+
+    def v2_playbook_on_stats(self, stats):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
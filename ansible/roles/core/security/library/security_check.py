@@ -26,7 +26,7 @@ options:
             - The type of security scan to perform.
         type: str
         required: true
-        choices: ['config', 'network', 'permissions', 'passwords', 'compliance']
+        choices: ['config', 'network', 'permissions', 'passwords', 'compliance', 'auth_log', 'integrity', 'kernel']
     ethical_level:
         description:
             - The ethical framework level to check against.
@@ -44,6 +44,81 @@ options:
             - Timeout for the security check in seconds.
         type: int
         default: 60
+    rule_catalog:
+        description:
+            - Path to a JSON file on the managed host holding additional rules.
+            - Rules use the same format as the built-in catalog and are indexed by scan_type and ethical_level.
+        type: path
+    max_lines:
+        description:
+            - Maximum number of the newest log lines to analyze with I(scan_type=auth_log).
+            - The log is read backwards from the end, so older lines are never read.
+        type: int
+        default: 10000
+    window:
+        description:
+            - Only analyze log lines from the last this many minutes with I(scan_type=auth_log).
+            - C(0) disables the time window.
+        type: int
+        default: 0
+    include_rotated:
+        description:
+            - Also read rotated logs (C(.1), C(.2.gz), ...) with I(scan_type=auth_log) until I(max_lines) or I(window)
+              is exhausted.
+        type: bool
+        default: false
+    max_tracked:
+        description:
+            - Maximum number of distinct source addresses and users tracked with I(scan_type=auth_log).
+            - Bounds memory use; when exceeded, the least frequent entries are dropped.
+            - With I(scan_type=passwords), the maximum number of account names listed per finding.
+        type: int
+        default: 1000
+    attribute_processes:
+        description:
+            - Annotate listening sockets found by I(scan_type=network) with their owning process and container.
+            - Owners are resolved with a single pass over C(/proc/*/fd) rather than one lookup per port.
+        type: bool
+        default: true
+    baseline:
+        description:
+            - Path on the managed host of a baseline store used for delta re-audits of the C(config), C(permissions) and
+              C(network) scan types.
+            - The store keeps the issues of the previous run, which this run's issues are compared with, and the
+              owners of listening sockets.
+            - Known socket owners are re-verified with one C(readlink) each instead of rescanning C(/proc/*/fd).
+            - The store is created on first use and updated after every run that changes it.
+        type: path
+    baseline_reset:
+        description:
+            - Ignore the stored baseline for this scan and record a fresh one.
+        type: bool
+        default: false
+    paths:
+        description:
+            - Files and directories hashed by I(scan_type=integrity). Defaults to I(target).
+        type: list
+        elements: path
+    manifest:
+        description:
+            - Integrity manifest on the managed host used by I(scan_type=integrity).
+            - Entries are keyed by path and record inode, size, mtime, ctime and SHA-256; files with unchanged metadata
+              are not rehashed.
+            - The manifest is created on first use. Files not hashed before I(timeout) on that run are recorded as
+              pending and hashed into the manifest by later runs instead of being reported as added.
+        type: path
+        default: /var/lib/summitethic/security_check/integrity.json
+    manifest_update:
+        description:
+            - Accept the current state of I(paths) into the integrity manifest after comparing.
+        type: bool
+        default: false
+    workers:
+        description:
+            - Number of hashing threads for I(scan_type=integrity). Defaults to the CPU count, at most 8.
+            - No new file is hashed after I(timeout); files not reached are reported as pending. The timeout is a soft
+              limit that does not interrupt the directory walk or hashes already running.
+        type: int
 author:
     - SummitEthic DevOps Team (@summitethic)
 '''
@@ -69,6 +144,41 @@ EXAMPLES = r'''
     target: /etc/passwd
     scan_type: permissions
     ethical_level: standard
+
+- name: Analyze failed logins from the last 24 hours
+  security_check:
+    target: /var/log/auth.log
+    scan_type: auth_log
+    window: 1440
+    include_rotated: true
+
+- name: Verify system binaries and configuration against the integrity manifest
+  security_check:
+    target: system
+    scan_type: integrity
+    paths:
+      - /usr/bin
+      - /usr/sbin
+      - /etc
+    timeout: 600
+
+- name: Check password hashes, aging and policy
+  security_check:
+    target: /etc/shadow
+    scan_type: passwords
+    ethical_level: standard
+
+- name: Check live kernel parameters for drift
+  security_check:
+    target: kernel
+    scan_type: kernel
+    ethical_level: strict
+
+- name: Re-audit SSH configuration against the previous run
+  security_check:
+    target: /etc/ssh/sshd_config
+    scan_type: config
+    baseline: /var/lib/summitethic/security_check/baseline.json
 '''
 
 RETURN = r'''
@@ -102,6 +212,20 @@ issues:
             description: Compliance standard relevant to the issue
             type: str
             sample: CIS 5.2.8
+        rule:
+            description: Identifier of the catalog rule that raised the issue
+            type: str
+            returned: when raised by a catalog rule
+            sample: ssh_permit_root_login
+        port:
+            description: Port of the listener the issue concerns
+            type: str
+            returned: for network issues about a listening port
+            sample: "5432"
+        listeners:
+            description: Listeners on I(port), in the same format as the top-level I(listeners)
+            type: list
+            returned: for network issues about a listening port
 score:
     description: Overall security score (0-100)
     returned: always
@@ -137,103 +261,1648 @@ compliance:
             description: Compliance by standard
             type: dict
             sample: {'cis': 'compliant', 'nist': 'non_compliant'}
+listeners:
+    description: Listening sockets with their owning process and container
+    returned: when scan_type is network
+    type: list
+    elements: dict
+    sample:
+        - proto: tcp
+          address: 0.0.0.0
+          port: "5432"
+          inode: 23817
+          process:
+              pid: 812
+              exe: /usr/lib/postgresql/15/bin/postgres
+              comm: postgres
+              container:
+                  runtime: docker
+                  id: 3f2a9c1b7d4e
+baseline:
+    description: Changes since the stored baseline
+    returned: when baseline is set and scan_type is config, permissions or network
+    type: dict
+    contains:
+        status:
+            description: C(created) on the first run for this scan, C(compared) afterwards
+            type: str
+            sample: compared
+        new:
+            description: Issues not present in the baseline
+            type: list
+            elements: dict
+        resolved:
+            description: Baseline issues that are no longer present
+            type: list
+            elements: dict
+        unchanged:
+            description: Issues present in both the baseline and this run
+            type: list
+            elements: dict
+integrity:
+    description: File integrity comparison against the manifest
+    returned: when scan_type is integrity
+    type: dict
+    contains:
+        status:
+            description: C(created) when no manifest existed, C(compared) otherwise
+            type: str
+            sample: compared
+        updated:
+            description: Whether the manifest was written
+            type: bool
+            sample: false
+        files:
+            description: Number of files scanned
+            type: int
+            sample: 5120
+        hashed:
+            description: Number of files hashed because their metadata changed
+            type: int
+            sample: 12
+        reused:
+            description: Number of files whose recorded digest was reused
+            type: int
+            sample: 5108
+        bytes_hashed:
+            description: Total size of the files hashed in this run
+            type: int
+            sample: 18874368
+        added:
+            description: Files not present in the manifest
+            type: list
+            elements: str
+        removed:
+            description: Manifest files that no longer exist
+            type: list
+            elements: str
+        modified:
+            description: Files whose content digest changed
+            type: list
+            elements: str
+            sample: ["/usr/bin/ssh"]
+        pending:
+            description: Number of files not hashed before the timeout
+            type: int
+            sample: 0
+        unreadable:
+            description: Files that could not be read, so their content was not verified
+            type: list
+            elements: str
+            sample: []
+        duration:
+            description: Seconds spent on the integrity scan
+            type: float
+            sample: 1.284
+        complete:
+            description: Whether every changed file was hashed, with none pending or unreadable
+            type: bool
+            sample: true
+passwords:
+    description: Aggregated password storage and policy findings; hashes are never returned
+    returned: when scan_type is passwords
+    type: dict
+    contains:
+        accounts:
+            description: Number of accounts in the shadow file
+            type: int
+            sample: 42
+        algorithms:
+            description: Number of accounts per hash algorithm, including C(locked) and C(empty)
+            type: dict
+            sample: {"yescrypt": 3, "md5": 1, "locked": 38}
+        examples:
+            description: Up to I(max_tracked) account names per finding (C(empty), C(weak_hash), C(legacy_hash),
+                         C(no_expiry))
+            type: dict
+            sample: {"weak_hash": ["legacy"], "empty": [], "legacy_hash": [], "no_expiry": ["deploy"]}
+        max_password_age:
+            description: Largest maximum password age among accounts with a password (99999 means never)
+            type: int
+            sample: 99999
+        login_defs:
+            description: Password settings from /etc/login.defs, C(null) for settings that are not set
+            type: dict
+            sample: {"pass_max_days": 90, "pass_min_days": 1, "pass_warn_age": 7, "encrypt_method": "YESCRYPT"}
+        pam:
+            description:
+                - PAM password stack hash algorithm, quality checks and history depth, or null if no stack was found
+                - When pam_unix has no hash option, the hash is inherited from the login.defs ENCRYPT_METHOD (null if
+                  that is not set either)
+            type: dict
+            sample: {"file": "/etc/pam.d/common-password", "hash": "yescrypt", "quality": true, "remember": 5}
+sysctl:
+    description: Live values of the kernel parameters checked, C(null) if absent on this kernel
+    returned: when scan_type is kernel
+    type: dict
+    sample: {"kernel.randomize_va_space": "2", "net.ipv4.conf.all.rp_filter": "1"}
+auth_log:
+    description: Failed login aggregation of the analyzed log lines
+    returned: when scan_type is auth_log
+    type: dict
+    contains:
+        files:
+            description: Log files read, newest first
+            type: list
+            sample: ["/var/log/auth.log", "/var/log/auth.log.1"]
+        lines_scanned:
+            description: Number of log lines analyzed
+            type: int
+            sample: 10000
+        failed_logins:
+            description: Number of failed login attempts
+            type: int
+            sample: 42
+        failed_root_logins:
+            description: Number of failed login attempts for root
+            type: int
+            sample: 7
+        by_source:
+            description: Failed login attempts by source address, most frequent first
+            type: dict
+            sample: {"203.0.113.5": 30}
+        by_user:
+            description: Failed login attempts by user name, most frequent first
+            type: dict
+            sample: {"root": 7, "admin": 5}
+        truncated:
+            description: Whether I(max_tracked) was exceeded and infrequent entries were dropped
+            type: bool
+            sample: false
+        window_start:
+            description: Start of the analyzed time window (ISO 8601), absent when I(window) is C(0)
+            type: str
+            sample: "2025-03-10T08:15:00"
 '''
 
 import os
 import re
 import json
+import copy
+import hashlib
 import socket
 import stat
+import struct
 import subprocess
 import time
+import gzip
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from datetime import datetime, timedelta
 
 from ansible.module_utils.basic import AnsibleModule
 
 
-def check_ssh_config(target, ethical_level, standards):
-    """Check SSH configuration for security issues."""
+ETHICAL_LEVELS = ['minimal', 'standard', 'strict']
+
+# Declarative rule catalog. Each rule is evaluated against the parsed state of
+# its scan_type: 'fact' names the state key, 'op' the comparison and 'value'
+# the operand. Text fields may reference {target}, {item} (the offending fact
+# value), {value} and any key of the rule's 'params'. An optional 'port'
+# template ties network issues to the listener they concern. A rule with a
+# 'matrix' expands into one rule per entry; entry keys override the rule's
+# own fields and are available to the text fields.
+RULE_CATALOG = [
+    # SSH daemon configuration
+    {
+        'id': 'ssh_permit_root_login',
+        'scan_type': 'config',
+        'fact': 'permitrootlogin',
+        'op': 'ne',
+        'value': 'no',
+        'severity': 'high',
+        'description': 'SSH permits root login',
+        'recommendation': 'Set PermitRootLogin to no',
+        'ethical_impact': 'Compromised root access could lead to data breaches and system compromise',
+        'standard': 'CIS 5.2.8'
+    },
+    {
+        'id': 'ssh_permit_root_login_missing',
+        'scan_type': 'config',
+        'fact': 'permitrootlogin',
+        'op': 'missing',
+        'severity': 'medium',
+        'description': 'SSH root login configuration not found',
+        'recommendation': 'Add PermitRootLogin no to SSH configuration',
+        'ethical_impact': 'Default settings may allow root login, risking unauthorized system access',
+        'standard': 'CIS 5.2.8'
+    },
+    {
+        'id': 'ssh_password_authentication',
+        'scan_type': 'config',
+        'levels': ['standard', 'strict'],
+        'fact': 'passwordauthentication',
+        'op': 'eq',
+        'value': 'yes',
+        'severity': 'medium',
+        'description': 'SSH allows password authentication',
+        'recommendation': 'Use key-based authentication instead by setting PasswordAuthentication no',
+        'ethical_impact': 'Password authentication is vulnerable to brute force attacks',
+        'standard': 'CIS 5.2.12'
+    },
+    {
+        'id': 'ssh_protocol',
+        'scan_type': 'config',
+        'levels': ['strict'],
+        'fact': 'protocol',
+        'op': 'ne',
+        'value': '2',
+        'severity': 'high',
+        'description': 'SSH protocol version is not set to 2',
+        'recommendation': 'Set Protocol 2 in SSH configuration',
+        'ethical_impact': 'Older protocols have known vulnerabilities',
+        'standard': 'CIS 5.2.1'
+    },
+    {
+        'id': 'ssh_idle_timeout_missing',
+        'scan_type': 'config',
+        'levels': ['strict'],
+        'fact': 'clientalive_timeout',
+        'op': 'missing',
+        'severity': 'low',
+        'description': 'SSH idle timeout not properly configured',
+        'recommendation': 'Set ClientAliveInterval and ClientAliveCountMax to enforce idle timeouts',
+        'ethical_impact': 'Long-lived idle sessions increase risk of unauthorized access',
+        'standard': 'CIS 5.2.16'
+    },
+    {
+        'id': 'ssh_idle_timeout_long',
+        'scan_type': 'config',
+        'levels': ['strict'],
+        'fact': 'clientalive_timeout',
+        'op': 'gt',
+        'value': 900,  # 15 minutes
+        'severity': 'low',
+        'description': 'SSH idle timeout is longer than recommended',
+        'recommendation': 'Reduce ClientAliveInterval or ClientAliveCountMax for shorter timeout',
+        'ethical_impact': 'Excessive timeout period increases security risk',
+        'standard': 'CIS 5.2.16'
+    },
+
+    # File permissions
+    {
+        'id': 'perm_shadow_world_readable',
+        'scan_type': 'permissions',
+        'targets': ['/etc/shadow', '/etc/gshadow'],
+        'fact': 'mode',
+        'op': 'mask',
+        'value': ['S_IROTH'],
+        'severity': 'critical',
+        'description': '{target} is world-readable',
+        'recommendation': 'Remove world-readable permission: chmod o-r {target}',
+        'ethical_impact': 'Exposes password hashes, severe privacy and security risk',
+        'standard': 'CIS 6.1.3'
+    },
+    {
+        'id': 'perm_system_file_owner',
+        'scan_type': 'permissions',
+        'targets': ['/etc/passwd', '/etc/shadow', '/etc/group', '/etc/gshadow'],
+        'fact': 'uid',
+        'op': 'ne',
+        'value': 0,
+        'severity': 'high',
+        'description': '{target} is not owned by root',
+        'recommendation': 'Change owner to root: chown root {target}',
+        'ethical_impact': 'Improper ownership can lead to unauthorized modifications',
+        'standard': 'CIS 6.1.2'
+    },
+    {
+        'id': 'perm_shadow_group',
+        'scan_type': 'permissions',
+        'targets': ['/etc/shadow', '/etc/gshadow'],
+        'fact': 'gid',
+        'op': 'not_in',
+        'value': [0, 42],  # root or shadow
+        'severity': 'high',
+        'description': '{target} has incorrect group',
+        'recommendation': 'Change group to shadow: chgrp shadow {target}',
+        'ethical_impact': 'Improper group can lead to unauthorized access',
+        'standard': 'CIS 6.1.3'
+    },
+    {
+        'id': 'perm_world_writable',
+        'scan_type': 'permissions',
+        'fact': 'mode',
+        'op': 'mask',
+        'value': ['S_IWOTH'],
+        'severity': 'high',
+        'description': '{target} is world-writable',
+        'recommendation': 'Remove world-writable permission: chmod o-w {target}',
+        'ethical_impact': 'World-writable files can be modified by any user, risking integrity',
+        'standard': 'CIS 6.1.9'
+    },
+    {
+        'id': 'perm_suid_sgid',
+        'scan_type': 'permissions',
+        'levels': ['strict'],
+        'fact': 'mode',
+        'op': 'mask',
+        'value': ['S_ISUID', 'S_ISGID'],
+        'severity': 'medium',
+        'description': '{target} has SUID/SGID bit set',
+        'recommendation': 'Review if SUID/SGID is necessary: chmod -s {target}',
+        'ethical_impact': 'SUID/SGID files present privilege escalation risk if compromised',
+        'standard': 'CIS 6.1.14'
+    },
+
+    # Network security
+    {
+        'id': 'net_listeners_unavailable',
+        'scan_type': 'network',
+        'fact': 'listener_source',
+        'op': 'missing',
+        'severity': 'medium',
+        'description': 'Unable to check for open ports, ss/netstat not available',
+        'recommendation': 'Install iproute2 or net-tools package',
+        'ethical_impact': 'Cannot verify network security posture',
+        'standard': 'N/A'
+    },
+    {
+        'id': 'net_sensitive_port',
+        'scan_type': 'network',
+        'fact': 'listening_ports',
+        'op': 'contains',
+        'severity': 'medium',
+        'port': '{value}',
+        'description': 'Port {value} ({service}) is open',
+        'recommendation': 'If not required, disable the {service} service or restrict access with firewall',
+        'ethical_impact': 'Open {service} port may expose sensitive services to unauthorized access',
+        'standard': 'CIS 3.2',
+        'matrix': [
+            {'value': '21', 'service': 'FTP'},
+            {'value': '23', 'service': 'Telnet', 'severity': 'high'},
+            {'value': '25', 'service': 'SMTP'},
+            {'value': '53', 'service': 'DNS'},
+            {'value': '137', 'service': 'NetBIOS', 'severity': 'high'},
+            {'value': '139', 'service': 'NetBIOS', 'severity': 'high'},
+            {'value': '445', 'service': 'SMB'},
+            {'value': '1433', 'service': 'MS SQL'},
+            {'value': '3306', 'service': 'MySQL'},
+            {'value': '5432', 'service': 'PostgreSQL'}
+        ]
+    },
+    {
+        'id': 'net_all_interfaces',
+        'scan_type': 'network',
+        'levels': ['standard', 'strict'],
+        'fact': 'wildcard_ports',
+        'op': 'each_not_in',
+        'value': ['22', '80', '443'],  # Common exceptions
+        'port': '{item}',
+        'severity': 'medium',
+        'description': 'Service on port {item} is listening on all interfaces',
+        'recommendation': 'Configure the service to listen only on required interfaces',
+        'ethical_impact': 'Services exposed on all interfaces increase attack surface',
+        'standard': 'CIS 3.4'
+    },
+    {
+        'id': 'net_ufw_inactive',
+        'scan_type': 'network',
+        'levels': ['strict'],
+        'fact': 'firewall',
+        'op': 'eq',
+        'value': 'ufw_inactive',
+        'severity': 'high',
+        'description': 'Firewall (ufw) is inactive',
+        'recommendation': 'Enable the firewall with appropriate rules',
+        'ethical_impact': 'Systems without active firewalls are vulnerable to network attacks',
+        'standard': 'CIS 3.5'
+    },
+    {
+        'id': 'net_iptables_accept',
+        'scan_type': 'network',
+        'levels': ['strict'],
+        'fact': 'firewall',
+        'op': 'eq',
+        'value': 'iptables_accept',
+        'severity': 'high',
+        'description': 'Firewall (iptables) has ACCEPT default policies',
+        'recommendation': 'Configure iptables with restrictive default policies',
+        'ethical_impact': 'Default ACCEPT policies allow unauthorized traffic by default',
+        'standard': 'CIS 3.5'
+    },
+    {
+        'id': 'net_firewall_unknown',
+        'scan_type': 'network',
+        'levels': ['strict'],
+        'fact': 'firewall',
+        'op': 'eq',
+        'value': 'unavailable',
+        'severity': 'high',
+        'description': 'Unable to check firewall status',
+        'recommendation': 'Install and configure a firewall (ufw, iptables)',
+        'ethical_impact': 'Unknown firewall state may indicate lack of network protection',
+        'standard': 'CIS 3.5'
+    },
+
+    # Authentication log analysis
+    {
+        'id': 'auth_failed_source',
+        'scan_type': 'auth_log',
+        'levels': ['minimal', 'standard'],
+        'fact': 'failed_by_source',
+        'op': 'each_gt',
+        'value': 50,
+        'severity': 'high',
+        'description': 'Source {item[0]} made {item[1]} failed login attempts',
+        'recommendation': 'Block {item[0]} and verify fail2ban and account lockout are active',
+        'ethical_impact': 'Sustained brute force attempts put user accounts and their data at risk',
+        'standard': 'CIS 5.4.2'
+    },
+    {
+        'id': 'auth_failed_source_strict',
+        'scan_type': 'auth_log',
+        'levels': ['strict'],
+        'fact': 'failed_by_source',
+        'op': 'each_gt',
+        'value': 10,
+        'severity': 'high',
+        'description': 'Source {item[0]} made {item[1]} failed login attempts',
+        'recommendation': 'Block {item[0]} and verify fail2ban and account lockout are active',
+        'ethical_impact': 'Sustained brute force attempts put user accounts and their data at risk',
+        'standard': 'CIS 5.4.2'
+    },
+    {
+        'id': 'auth_failed_root',
+        'scan_type': 'auth_log',
+        'levels': ['standard', 'strict'],
+        'fact': 'failed_root_logins',
+        'op': 'gt',
+        'value': 0,
+        'severity': 'medium',
+        'description': '{item} failed root login attempts recorded',
+        'recommendation': 'Set PermitRootLogin to no and restrict SSH access by source address',
+        'ethical_impact': 'Attempts on the root account target full control of the system',
+        'standard': 'CIS 5.2.8'
+    },
+
+    # File integrity
+    {
+        'id': 'integrity_modified',
+        'scan_type': 'integrity',
+        'fact': 'modified_count',
+        'op': 'gt',
+        'value': 0,
+        'severity': 'high',
+        'description': '{item} files under {target} were modified since the integrity manifest was recorded',
+        'recommendation': 'Review the modified files and run with manifest_update once the changes are verified',
+        'ethical_impact': 'Tampered binaries or configuration can silently compromise users and their data',
+        'standard': 'CIS 1.3.2'
+    },
+    {
+        'id': 'integrity_added',
+        'scan_type': 'integrity',
+        'levels': ['standard', 'strict'],
+        'fact': 'added_count',
+        'op': 'gt',
+        'value': 0,
+        'severity': 'medium',
+        'description': '{item} files were added under {target} since the integrity manifest was recorded',
+        'recommendation': 'Review the added files and run with manifest_update once the changes are verified',
+        'ethical_impact': 'Unexpected files may indicate implanted tools or backdoors',
+        'standard': 'CIS 1.3.2'
+    },
+    {
+        'id': 'integrity_removed',
+        'scan_type': 'integrity',
+        'levels': ['standard', 'strict'],
+        'fact': 'removed_count',
+        'op': 'gt',
+        'value': 0,
+        'severity': 'medium',
+        'description': '{item} files were removed under {target} since the integrity manifest was recorded',
+        'recommendation': 'Review the removed files and run with manifest_update once the changes are verified',
+        'ethical_impact': 'Removed files may indicate tampering or loss of security controls',
+        'standard': 'CIS 1.3.2'
+    },
+    {
+        'id': 'integrity_incomplete',
+        'scan_type': 'integrity',
+        'fact': 'pending_count',
+        'op': 'gt',
+        'value': 0,
+        'severity': 'low',
+        'description': 'Integrity scan did not finish within the timeout; {item} files were not verified',
+        'recommendation': 'Increase timeout or workers, or narrow the scanned paths',
+        'ethical_impact': 'Unverified files may hide tampering',
+        'standard': 'CIS 1.3.2'
+    },
+    {
+        'id': 'integrity_unreadable',
+        'scan_type': 'integrity',
+        'fact': 'unreadable_count',
+        'op': 'gt',
+        'value': 0,
+        'severity': 'medium',
+        'description': '{item} files under {target} could not be read for integrity verification',
+        'recommendation': 'Check the permissions of the unreadable files and that the scan runs as root',
+        'ethical_impact': 'Files that cannot be verified may hide tampering',
+        'standard': 'CIS 1.3.2'
+    },
+
+    # Kernel parameters, mirroring roles/core/security/tasks/kernel.yml
+    {
+        'id': 'kernel_sysctl',
+        'scan_type': 'kernel',
+        'levels': ['standard', 'strict'],
+        'op': 'ne',
+        'severity': 'medium',
+        'description': 'Kernel parameter {fact} is {item}, expected {value}',
+        'recommendation': 'Set {fact} = {value} in /etc/sysctl.d and reload with sysctl --system',
+        'ethical_impact': 'Weak kernel settings make network attacks and privilege escalation easier',
+        'matrix': [
+            {'fact': 'net.ipv4.conf.all.accept_redirects', 'value': '0', 'standard': 'CIS 3.3.2'},
+            {'fact': 'net.ipv4.conf.default.accept_redirects', 'value': '0', 'standard': 'CIS 3.3.2'},
+            {'fact': 'net.ipv4.conf.all.accept_source_route', 'value': '0', 'standard': 'CIS 3.3.1',
+             'levels': ETHICAL_LEVELS},
+            {'fact': 'net.ipv4.conf.default.accept_source_route', 'value': '0', 'standard': 'CIS 3.3.1',
+             'levels': ETHICAL_LEVELS},
+            {'fact': 'net.ipv4.conf.all.log_martians', 'value': '1', 'standard': 'CIS 3.3.4', 'severity': 'low'},
+            {'fact': 'net.ipv4.conf.default.log_martians', 'value': '1', 'standard': 'CIS 3.3.4', 'severity': 'low'},
+            {'fact': 'net.ipv4.icmp_echo_ignore_broadcasts', 'value': '1', 'standard': 'CIS 3.3.5'},
+            {'fact': 'net.ipv4.icmp_ignore_bogus_error_responses', 'value': '1', 'standard': 'CIS 3.3.6',
+             'severity': 'low'},
+            {'fact': 'net.ipv4.ip_forward', 'value': '0', 'standard': 'CIS 3.2.2'},
+            {'fact': 'net.ipv4.conf.all.rp_filter', 'value': '1', 'standard': 'CIS 3.3.7'},
+            {'fact': 'net.ipv4.conf.default.rp_filter', 'value': '1', 'standard': 'CIS 3.3.7'},
+            {'fact': 'net.ipv4.tcp_syncookies', 'value': '1', 'standard': 'CIS 3.3.8', 'levels': ETHICAL_LEVELS},
+            {'fact': 'kernel.randomize_va_space', 'value': '2', 'standard': 'CIS 1.5.2', 'severity': 'high',
+             'levels': ETHICAL_LEVELS},
+            {'fact': 'kernel.kptr_restrict', 'value': '2', 'standard': 'NIST CM-6'},
+            {'fact': 'kernel.dmesg_restrict', 'value': '1', 'standard': 'NIST CM-6'},
+            {'fact': 'fs.protected_hardlinks', 'value': '1', 'standard': 'NIST CM-6', 'levels': ETHICAL_LEVELS},
+            {'fact': 'fs.protected_symlinks', 'value': '1', 'standard': 'NIST CM-6', 'levels': ETHICAL_LEVELS},
+            {'fact': 'kernel.sysrq', 'value': '0', 'standard': 'NIST CM-6', 'severity': 'low'},
+            {'fact': 'kernel.yama.ptrace_scope', 'value': '1', 'standard': 'CIS 1.5.3'},
+            {'fact': 'net.ipv6.conf.all.disable_ipv6', 'value': '1', 'standard': 'CIS 3.1.1', 'severity': 'low',
+             'levels': ['strict']},
+            {'fact': 'net.ipv6.conf.default.disable_ipv6', 'value': '1', 'standard': 'CIS 3.1.1', 'severity': 'low',
+             'levels': ['strict']},
+            {'fact': 'net.ipv6.conf.lo.disable_ipv6', 'value': '1', 'standard': 'CIS 3.1.1', 'severity': 'low',
+             'levels': ['strict']}
+        ]
+    },
+
+    # Password storage and policy
+    {
+        'id': 'passwords_empty',
+        'scan_type': 'passwords',
+        'fact': 'empty_count',
+        'op': 'gt',
+        'value': 0,
+        'severity': 'critical',
+        'description': '{item} accounts have an empty password',
+        'recommendation': 'Lock the accounts with passwd -l or set a strong password',
+        'ethical_impact': 'Accounts without passwords can be used by anyone to access the system',
+        'standard': 'CIS 6.2.2'
+    },
+    {
+        'id': 'passwords_weak_hash',
+        'scan_type': 'passwords',
+        'fact': 'weak_hash_count',
+        'op': 'gt',
+        'value': 0,
+        'severity': 'high',
+        'description': '{item} accounts use a weak password hash (DES, MD5 or unknown)',
+        'recommendation': 'Force a password change so the passwords are rehashed with yescrypt or SHA-512',
+        'ethical_impact': 'Weak hashes are cracked quickly if the shadow file leaks, exposing user credentials',
+        'standard': 'CIS 5.4.4'
+    },
+    {
+        'id': 'passwords_legacy_hash',
+        'scan_type': 'passwords',
+        'levels': ['strict'],
+        'fact': 'legacy_hash_count',
+        'op': 'gt',
+        'value': 0,
+        'severity': 'low',
+        'description': '{item} accounts use a legacy password hash (SHA-256)',
+        'recommendation': 'Force a password change so the passwords are rehashed with yescrypt or SHA-512',
+        'ethical_impact': 'Older hashes offer less protection for user credentials',
+        'standard': 'CIS 5.4.4'
+    },
+    {
+        'id': 'passwords_max_age',
+        'scan_type': 'passwords',
+        'levels': ['minimal', 'standard'],
+        'fact': 'max_password_age',
+        'op': 'gt',
+        'value': 365,
+        'severity': 'medium',
+        'description': 'Accounts allow passwords up to {item} days old (limit {value})',
+        'recommendation': 'Set PASS_MAX_DAYS in /etc/login.defs and run chage --maxdays for existing accounts',
+        'ethical_impact': 'Passwords that never expire prolong the use of compromised credentials',
+        'standard': 'CIS 5.4.1.1'
+    },
+    {
+        'id': 'passwords_max_age_strict',
+        'scan_type': 'passwords',
+        'levels': ['strict'],
+        'fact': 'max_password_age',
+        'op': 'gt',
+        'value': 90,
+        'severity': 'medium',
+        'description': 'Accounts allow passwords up to {item} days old (limit {value})',
+        'recommendation': 'Set PASS_MAX_DAYS in /etc/login.defs and run chage --maxdays for existing accounts',
+        'ethical_impact': 'Passwords that never expire prolong the use of compromised credentials',
+        'standard': 'CIS 5.4.1.1'
+    },
+    {
+        'id': 'passwords_min_age',
+        'scan_type': 'passwords',
+        'levels': ['strict'],
+        'fact': 'min_password_age',
+        'op': 'lt',
+        'value': 1,
+        'severity': 'low',
+        'description': 'Accounts allow password changes {item} days after the last change (minimum {value})',
+        'recommendation': 'Set PASS_MIN_DAYS in /etc/login.defs and run chage --mindays for existing accounts',
+        'ethical_impact': 'Immediate changes let users cycle back to a compromised password',
+        'standard': 'CIS 5.4.1.2'
+    },
+    {
+        'id': 'passwords_warn_age',
+        'scan_type': 'passwords',
+        'levels': ['standard', 'strict'],
+        'fact': 'min_password_warn',
+        'op': 'lt',
+        'value': 7,
+        'severity': 'low',
+        'description': 'Accounts are warned only {item} days before password expiry (minimum {value})',
+        'recommendation': 'Set PASS_WARN_AGE in /etc/login.defs and run chage --warndays for existing accounts',
+        'ethical_impact': 'Short notice leads to lockouts and rushed, weaker password choices',
+        'standard': 'CIS 5.4.1.3'
+    },
+    {
+        'id': 'passwords_login_defs_encrypt_method',
+        'scan_type': 'passwords',
+        'fact': 'login_encrypt_method',
+        'op': 'not_in',
+        'value': ['SHA512', 'YESCRYPT'],
+        'severity': 'high',
+        'description': 'login.defs ENCRYPT_METHOD is {item}',
+        'recommendation': 'Set ENCRYPT_METHOD YESCRYPT (or SHA512) in /etc/login.defs',
+        'ethical_impact': 'New passwords will be stored with a weak hash',
+        'standard': 'CIS 5.4.4'
+    },
+    {
+        'id': 'passwords_pam_hash',
+        'scan_type': 'passwords',
+        'fact': 'pam_hash',
+        'op': 'not_in',
+        'value': ['sha512', 'yescrypt'],
+        'severity': 'high',
+        'description': 'PAM pam_unix hashes new passwords with {item}',
+        'recommendation': 'Use the yescrypt (or sha512) option for pam_unix.so in the PAM password stack',
+        'ethical_impact': 'New passwords will be stored with a weak hash',
+        'standard': 'CIS 5.4.4'
+    },
+    {
+        'id': 'passwords_pam_quality',
+        'scan_type': 'passwords',
+        'levels': ['standard', 'strict'],
+        'fact': 'pam_quality',
+        'op': 'eq',
+        'value': False,
+        'severity': 'medium',
+        'description': 'Password quality is not enforced by PAM',
+        'recommendation': 'Enable pam_pwquality.so in the PAM password stack',
+        'ethical_impact': 'Users can choose easily guessed passwords, putting their accounts at risk',
+        'standard': 'CIS 5.4.1'
+    },
+    {
+        'id': 'passwords_pam_remember',
+        'scan_type': 'passwords',
+        'levels': ['strict'],
+        'fact': 'pam_remember',
+        'op': 'lt',
+        'value': 5,
+        'severity': 'low',
+        'description': 'PAM remembers only {item} previous passwords (minimum {value})',
+        'recommendation': 'Set remember=5 for pam_pwhistory.so or pam_unix.so',
+        'ethical_impact': 'Password reuse prolongs the use of compromised credentials',
+        'standard': 'CIS 5.4.3'
+    }
+]
+
+RULE_OPERATORS = {
+    'missing': lambda fact, value: fact is None,
+    'eq': lambda fact, value: fact is not None and fact == value,
+    'ne': lambda fact, value: fact is not None and fact != value,
+    'gt': lambda fact, value: fact is not None and fact > value,
+    'lt': lambda fact, value: fact is not None and fact < value,
+    'not_in': lambda fact, value: fact is not None and fact not in value,
+    'mask': lambda fact, value: fact is not None and bool(fact & value),
+    'contains': lambda fact, value: fact is not None and value in fact,
+    'each_not_in': None,  # Yields one issue per offending element
+    'each_gt': None,  # Yields one issue per (key, count) above the value
+}
+
+RULE_REQUIRED_KEYS = ('id', 'scan_type', 'fact', 'op', 'severity', 'description',
+                      'recommendation', 'ethical_impact', 'standard')
+
+LISTENER_ADDRESS_RE = re.compile(r'^(\S*):(\d+)$')
+# Unspecified addresses as /proc/net (::), ss ([::], *) and netstat (::) print them
+WILDCARD_ADDRESSES = ('0.0.0.0', '::', '[::]', '*')
+
+FAILED_LOGIN_RE = re.compile(
+    r'Failed (?:password|publickey|none|keyboard-interactive/pam) for (?:invalid user )?(\S*) from (\S+)')
+ISO_TIMESTAMP_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
+SYSLOG_TIMESTAMP_RE = re.compile(r'^[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}')
+LOG_READ_BLOCK_SIZE = 64 * 1024
+BASELINE_VERSION = 2
+BASELINE_SCAN_TYPES = ['config', 'permissions', 'network']
+MANIFEST_VERSION = 1
+HASH_BUFFER_SIZE = 1024 * 1024
+SYSCTL_ROOT = '/proc/sys'
+LOGIN_DEFS_PATH = '/etc/login.defs'
+PAM_PASSWORD_PATHS = ['/etc/pam.d/common-password', '/etc/pam.d/system-auth']
+PAM_PASSWORD_RE = re.compile(r'^\s*password\s+(?:\[[^\]]*\]|\S+)\s+(\S+)(.*)$')
+
+# Password hash prefixes from crypt(5), classified by strength
+PASSWORD_HASH_PREFIXES = [
+    ('$y$', 'yescrypt', 'strong'),
+    ('$gy$', 'gost-yescrypt', 'strong'),
+    ('$7$', 'scrypt', 'strong'),
+    ('$2b$', 'bcrypt', 'strong'),
+    ('$2y$', 'bcrypt', 'strong'),
+    ('$2a$', 'bcrypt', 'strong'),
+    ('$6$', 'sha512', 'strong'),
+    ('$5$', 'sha256', 'legacy'),
+    ('$1$', 'md5', 'weak'),
+]
+PAM_HASH_OPTIONS = ['yescrypt', 'gost_yescrypt', 'sha512', 'sha256', 'blowfish', 'bigcrypt', 'md5']
+
+# /proc/net tables and the socket state that marks a listener in each
+PROC_NET_LISTEN_STATES = [('tcp', '0A'), ('tcp6', '0A'), ('udp', '07'), ('udp6', '07')]
+CONTAINER_CGROUP_RE = re.compile(r'(?:(docker|cri-containerd|crio|libpod)[-/]|/)([0-9a-f]{64})(?:\.scope)?$')
+
+
+def _expand_rule(definition):
+    """Expand a rule definition's matrix into concrete rules."""
+    matrix = definition.get('matrix')
+    if not matrix:
+        return [dict(definition, params={})]
+
+    rules = []
+    for entry in matrix:
+        rule = dict(definition, **entry)
+        del rule['matrix']
+        rule['id'] = f"{definition['id']}_{entry.get('fact', entry.get('value'))}"
+        rule['params'] = dict(entry)
+        rules.append(rule)
+    return rules
+
+
+def compile_rules(catalog):
+    """Compile rule definitions into an index keyed by (scan_type, ethical_level)."""
+    index = {}
+
+    for definition in catalog:
+        for rule in _expand_rule(definition):
+            missing = [key for key in RULE_REQUIRED_KEYS if key not in rule]
+            if missing:
+                raise ValueError(f"Rule {rule.get('id', '?')} is missing keys: {', '.join(missing)}")
+            if rule['op'] not in RULE_OPERATORS:
+                raise ValueError(f"Rule {rule['id']} has unknown operator: {rule['op']}")
+
+            # Resolve operands once so evaluation is a plain comparison
+            if rule['op'] == 'mask':
+                rule['value'] = sum(getattr(stat, flag) for flag in rule['value'])
+            elif rule['op'] in ['not_in', 'each_not_in']:
+                rule['value'] = frozenset(rule['value'])
+            rule['targets'] = frozenset(rule.get('targets', []))
+
+            for level in rule.get('levels', ETHICAL_LEVELS):
+                index.setdefault((rule['scan_type'], level), []).append(rule)
+
+    return index
+
+
+RULE_INDEX = compile_rules(RULE_CATALOG)
+
+
+def load_rule_catalog(path):
+    """Compile the built-in catalog extended with rules from a JSON file."""
+    with open(path, 'r') as f:
+        extra_rules = json.load(f)
+
+    if not isinstance(extra_rules, list):
+        raise ValueError(f'Rule catalog {path} must contain a list of rules')
+
+    return compile_rules(RULE_CATALOG + extra_rules)
+
+
+def applicable_rules(rule_index, scan_type, ethical_level, target):
+    """Return the rules that apply to a scan of target at ethical_level."""
+    return [rule for rule in rule_index.get((scan_type, ethical_level), [])
+            if not rule['targets'] or target in rule['targets']]
+
+
+def evaluate_rules(rules, state, target):
+    """Evaluate rules against parsed state and return the resulting issues."""
     issues = []
-    
-    try:
-        with open(target, 'r') as f:
-            content = f.read()
-            
-        # Check PermitRootLogin
-        root_login_match = re.search(r'^PermitRootLogin\s+(\w+)', content, re.MULTILINE)
-        if root_login_match:
-            if root_login_match.group(1).lower() != 'no':
-                issues.append({
-                    'severity': 'high',
-                    'description': 'SSH permits root login',
-                    'recommendation': 'Set PermitRootLogin to no',
-                    'ethical_impact': 'Compromised root access could lead to data breaches and system compromise',
-                    'compliant': False,
-                    'standard': 'CIS 5.2.8'
-                })
+
+    for rule in rules:
+        fact = state.get(rule['fact'])
+
+        if rule['op'] == 'each_not_in':
+            matches = [item for item in (fact or []) if item not in rule['value']]
+        elif rule['op'] == 'each_gt':
+            matches = [item for item in (fact or {}).items() if item[1] > rule['value']]
+        elif RULE_OPERATORS[rule['op']](fact, rule.get('value')):
+            matches = [fact]
         else:
-            issues.append({
-                'severity': 'medium',
-                'description': 'SSH root login configuration not found',
-                'recommendation': 'Add PermitRootLogin no to SSH configuration',
-                'ethical_impact': 'Default settings may allow root login, risking unauthorized system access',
+            matches = []
+
+        for item in matches:
+            context = dict(rule['params'], target=target, item=item, value=rule.get('value'))
+            issue = {
+                'severity': rule['severity'],
+                'description': rule['description'].format(**context),
+                'recommendation': rule['recommendation'].format(**context),
+                'ethical_impact': rule['ethical_impact'].format(**context),
                 'compliant': False,
-                'standard': 'CIS 5.2.8'
-            })
-            
-        # Check PasswordAuthentication
-        password_auth_match = re.search(r'^PasswordAuthentication\s+(\w+)', content, re.MULTILINE)
-        if password_auth_match:
-            if password_auth_match.group(1).lower() == 'yes' and ethical_level in ['standard', 'strict']:
-                issues.append({
-                    'severity': 'medium',
-                    'description': 'SSH allows password authentication',
-                    'recommendation': 'Use key-based authentication instead by setting PasswordAuthentication no',
-                    'ethical_impact': 'Password authentication is vulnerable to brute force attacks',
-                    'compliant': False,
-                    'standard': 'CIS 5.2.12'
+                'standard': rule['standard'],
+                'rule': rule['id']
+            }
+            if 'port' in rule:
+                issue['port'] = rule['port'].format(**context)
+            issues.append(issue)
+
+    return issues
+
+
+def load_baseline(path):
+    """Load the baseline store, starting afresh if it is missing or unreadable."""
+    try:
+        with open(path, 'r') as f:
+            store = json.load(f)
+        if isinstance(store, dict) and store.get('version') == BASELINE_VERSION:
+            return store
+    except (IOError, OSError, ValueError):
+        pass
+    return {'version': BASELINE_VERSION, 'entries': {}}
+
+
+def write_json_atomic(path, data):
+    """Atomically write data as JSON, readable by the owner only."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    temp_path = f'{path}.tmp.{os.getpid()}'
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, sort_keys=True, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+def diff_issues(previous, current):
+    """Split issues into new, resolved and unchanged sets."""
+    def key(issue):
+        return (issue.get('rule'), issue['description'])
+
+    previous_keys = {key(issue) for issue in previous}
+    current_keys = {key(issue) for issue in current}
+
+    return {
+        'new': [issue for issue in current if key(issue) not in previous_keys],
+        'resolved': [issue for issue in previous if key(issue) not in current_keys],
+        'unchanged': [issue for issue in current if key(issue) in previous_keys]
+    }
+
+
+def parse_sshd_config(target):
+    """Parse sshd_config into a dict of lowercased keyword -> value."""
+    directives = {}
+
+    with open(target, 'r') as f:
+        for line in f:
+            parts = line.split(None, 1)
+            if len(parts) < 2 or parts[0].startswith('#'):
+                continue
+            keyword = parts[0].lower()
+            # sshd uses the first value obtained for each keyword
+            if keyword not in directives:
+                directives[keyword] = parts[1].split('#', 1)[0].strip().lower()
+
+    interval = directives.get('clientaliveinterval', '')
+    count = directives.get('clientalivecountmax', '')
+    if interval.isdigit() and count.isdigit():
+        directives['clientalive_timeout'] = int(interval) * int(count)
+
+    return directives
+
+
+def parse_listeners(output):
+    """Parse ss/netstat -tuln output into listener dicts."""
+    listeners = []
+
+    for line in output.splitlines():
+        fields = line.split()
+        for field in fields:
+            match = LISTENER_ADDRESS_RE.match(field)
+            if match:
+                # The first address:port field is the local address
+                listeners.append({
+                    'proto': fields[0].lower(),
+                    'address': match.group(1),
+                    'port': match.group(2),
+                    'inode': None
                 })
-        
-        # Other SSH checks based on ethical_level
-        if ethical_level == 'strict':
-            # Check Protocol version
-            protocol_match = re.search(r'^Protocol\s+(\d+)', content, re.MULTILINE)
-            if protocol_match:
-                if protocol_match.group(1) != '2':
-                    issues.append({
-                        'severity': 'high',
-                        'description': 'SSH protocol version is not set to 2',
-                        'recommendation': 'Set Protocol 2 in SSH configuration',
-                        'ethical_impact': 'Older protocols have known vulnerabilities',
-                        'compliant': False,
-                        'standard': 'CIS 5.2.1'
-                    })
-            
-            # Check idle timeout
-            client_alive_interval = re.search(r'^ClientAliveInterval\s+(\d+)', content, re.MULTILINE)
-            client_alive_count_max = re.search(r'^ClientAliveCountMax\s+(\d+)', content, re.MULTILINE)
-            
-            if not client_alive_interval or not client_alive_count_max:
-                issues.append({
-                    'severity': 'low',
-                    'description': 'SSH idle timeout not properly configured',
-                    'recommendation': 'Set ClientAliveInterval and ClientAliveCountMax to enforce idle timeouts',
-                    'ethical_impact': 'Long-lived idle sessions increase risk of unauthorized access',
-                    'compliant': False,
-                    'standard': 'CIS 5.2.16'
+                break
+
+    return listeners
+
+
+def _read_listeners():
+    """Return listening socket output and the tool that produced it."""
+    for command in (['ss', '-tuln'], ['netstat', '-tuln']):
+        try:
+            return subprocess.check_output(command, universal_newlines=True), command[0]
+        except (subprocess.SubprocessError, FileNotFoundError):
+            continue
+    return '', None
+
+
+def _decode_proc_address(encoded):
+    """Decode a /proc/net address (host-order hex words) into text form."""
+    words = [int(encoded[i:i + 8], 16) for i in range(0, len(encoded), 8)]
+    packed = struct.pack(f'={len(words)}I', *words)
+    return socket.inet_ntop(socket.AF_INET if len(words) == 1 else socket.AF_INET6, packed)
+
+
+def read_proc_listeners():
+    """Read listening sockets and their inodes from /proc/net."""
+    listeners = []
+    found = False
+
+    for proto, listen_state in PROC_NET_LISTEN_STATES:
+        path = f'/proc/net/{proto}'
+        if not os.path.exists(path):
+            continue
+        found = True
+
+        with open(path, 'r') as f:
+            next(f, None)  # Header line
+            for line in f:
+                fields = line.split()
+                if len(fields) < 10 or fields[3] != listen_state:
+                    continue
+                # Unconnected UDP sockets are only listeners without a peer
+                if proto.startswith('udp') and not fields[2].endswith(':0000'):
+                    continue
+                address, port = fields[1].split(':')
+                listeners.append({
+                    'proto': proto,
+                    'address': _decode_proc_address(address),
+                    'port': str(int(port, 16)),
+                    'inode': int(fields[9])
                 })
-            elif client_alive_interval and client_alive_count_max:
-                interval = int(client_alive_interval.group(1))
-                count = int(client_alive_count_max.group(1))
-                
-                if interval * count > 900:  # 15 minutes
-                    issues.append({
-                        'severity': 'low',
-                        'description': 'SSH idle timeout is longer than recommended',
-                        'recommendation': 'Reduce ClientAliveInterval or ClientAliveCountMax for shorter timeout',
-                        'ethical_impact': 'Excessive timeout period increases security risk',
-                        'compliant': False,
-                        'standard': 'CIS 5.2.16'
-                    })
+
+    return listeners if found else None
+
+
+def read_listeners():
+    """Return listening sockets and their source, preferring /proc/net over ss/netstat."""
+    listeners = read_proc_listeners()
+    if listeners is not None:
+        return listeners, 'procfs'
+
+    output, source = _read_listeners()
+    return parse_listeners(output), source
+
+
+def _container_from_cgroup(pid):
+    """Return the container runtime and short id a process runs in, if any."""
+    try:
+        with open(f'/proc/{pid}/cgroup', 'r') as f:
+            for line in f:
+                match = CONTAINER_CGROUP_RE.search(line)
+                if match:
+                    return {'runtime': match.group(1) or 'kubernetes', 'id': match.group(2)[:12]}
+    except OSError:
+        pass
+    return None
+
+
+def index_socket_owners(inodes):
+    """Map socket inodes to their owning (PID, fd) with a single pass over /proc/*/fd."""
+    owners = {}
+    wanted = set(inodes)
+    targets = {f'socket:[{inode}]': inode for inode in wanted}
+
+    pids = sorted(int(entry) for entry in os.listdir('/proc') if entry.isdigit())
+    for pid in pids:
+        fd_dir = f'/proc/{pid}/fd'
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue  # Process exited or is not accessible
+
+        for fd in fds:
+            try:
+                link = os.readlink(f'{fd_dir}/{fd}')
+            except OSError:
+                continue
+            inode = targets.get(link)
+            # The lowest PID sharing a socket is usually the parent that opened it
+            if inode is not None and inode not in owners:
+                owners[inode] = (pid, int(fd))
+
+        if len(owners) == len(wanted):
+            break
+
+    return owners
+
+
+def describe_process(pid):
+    """Return the executable, command name and container of a process."""
+    process = {'pid': pid, 'exe': None, 'comm': None}
+
+    try:
+        process['exe'] = os.readlink(f'/proc/{pid}/exe')
+    except OSError:
+        pass
+    try:
+        with open(f'/proc/{pid}/comm', 'r') as f:
+            process['comm'] = f.read().strip()
+    except OSError:
+        pass
+    process['container'] = _container_from_cgroup(pid)
+
+    return process
+
+
+def verify_socket_owners(known_owners, inodes):
+    """Keep previously recorded owners whose descriptor still refers to the same socket."""
+    verified = {}
+
+    for inode in inodes:
+        owner = known_owners.get(str(inode))
+        if not owner:
+            continue
+        pid, fd = owner
+        try:
+            if os.readlink(f'/proc/{pid}/fd/{fd}') == f'socket:[{inode}]':
+                verified[inode] = (pid, fd)
+        except OSError:
+            pass
+
+    return verified
+
+
+def attribute_listeners(listeners, known_owners=None):
+    """Annotate listeners in place with their owning process and container.
+
+    Owners recorded by a previous run are verified with one readlink each;
+    only the remaining sockets require a scan of /proc/*/fd.
+    """
+    inodes = {listener['inode'] for listener in listeners if listener['inode']}
+    owners = verify_socket_owners(known_owners, inodes) if known_owners else {}
+    unresolved = inodes - set(owners)
+    if unresolved:
+        owners.update(index_socket_owners(unresolved))
+
+    processes = {pid: describe_process(pid) for pid, _ in set(owners.values())}
+    for listener in listeners:
+        owner = owners.get(listener['inode'])
+        listener['process'] = processes[owner[0]] if owner else None
+
+    return owners
+
+
+def _probe_firewall():
+    """Classify the host firewall state."""
+    try:
+        ufw_output = subprocess.check_output(['ufw', 'status'], universal_newlines=True)
+        return 'ufw_inactive' if 'inactive' in ufw_output else 'active'
+    except (subprocess.SubprocessError, FileNotFoundError):
+        pass
+
+    try:
+        iptables_output = subprocess.check_output(['iptables', '-L'], universal_newlines=True)
+    except (subprocess.SubprocessError, FileNotFoundError):
+        return 'unavailable'
+
+    if 'Chain INPUT (policy ACCEPT)' in iptables_output and 'Chain FORWARD (policy ACCEPT)' in iptables_output:
+        return 'iptables_accept'
+    return 'active'
+
+
+def collect_network_state(facts, attribute_processes=True, known_owners=None):
+    """Gather only the network facts referenced by the applicable rules."""
+    state = {}
+
+    if facts & {'listener_source', 'listening_ports', 'wildcard_ports'}:
+        listeners, state['listener_source'] = read_listeners()
+        if attribute_processes:
+            owners = attribute_listeners(listeners, known_owners)
+            state['socket_owners'] = {str(inode): list(owner) for inode, owner in owners.items()}
+        state['listeners'] = listeners
+        state['listening_ports'] = frozenset(listener['port'] for listener in listeners)
+        state['wildcard_ports'] = list(dict.fromkeys(
+            listener['port'] for listener in listeners if listener['address'] in WILDCARD_ADDRESSES))
+
+    if 'firewall' in facts:
+        state['firewall'] = _probe_firewall()
+
+    return state
+
+
+def read_lines_reverse(path, block_size=LOG_READ_BLOCK_SIZE):
+    """Yield the lines of a file newest first by reading blocks backwards from the end."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b'\n')
+            # The first piece may be the tail of a line in the previous block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line.decode('utf-8', 'replace')
+
+        if remainder:
+            yield remainder.decode('utf-8', 'replace')
+
+
+def read_lines_tail(path, limit):
+    """Yield the newest limit lines of a gzip-compressed file, newest first."""
+    # Compressed streams cannot seek backwards, so keep a bounded window
+    with gzip.open(path, 'rt', encoding='utf-8', errors='replace') as f:
+        tail = deque((line.rstrip('\n') for line in f), maxlen=limit)
+
+    while tail:
+        line = tail.pop()
+        if line:
+            yield line
+
+
+def rotated_logs(path):
+    """Return the rotated siblings of a log (path.1, path.2.gz, ...) newest first."""
+    rotated = []
+    index = 1
+
+    while True:
+        for candidate in (f'{path}.{index}', f'{path}.{index}.gz'):
+            if os.path.isfile(candidate):
+                rotated.append(candidate)
+                break
+        else:
+            return rotated
+        index += 1
+
+
+def parse_log_timestamp(line, now):
+    """Parse an RFC 3339 or traditional syslog timestamp at the start of a line."""
+    if ISO_TIMESTAMP_RE.match(line):
+        return datetime.strptime(line[:19], '%Y-%m-%dT%H:%M:%S')
+
+    if SYSLOG_TIMESTAMP_RE.match(line):
+        # Traditional syslog omits the year; assume the most recent one
+        timestamp = datetime.strptime(f'{now.year} {line[:15]}', '%Y %b %d %H:%M:%S')
+        if timestamp > now + timedelta(days=1):
+            timestamp = timestamp.replace(year=now.year - 1)
+        return timestamp
+
+    return None
+
+
+def _count_bounded(counter, key, limit):
+    """Increment key in counter, keeping at most limit keys. Returns True if keys were dropped."""
+    if key in counter:
+        counter[key] += 1
+        return False
+
+    truncated = False
+    if len(counter) >= limit:
+        # Keep the heaviest half so pruning is amortised over many inserts
+        keep = sorted(counter.items(), key=lambda entry: entry[1], reverse=True)[:max(1, limit // 2)]
+        counter.clear()
+        counter.update(keep)
+        truncated = True
+
+    counter[key] = 1
+    return truncated
+
+
+def analyze_auth_log(path, max_lines=10000, window=0, include_rotated=False, max_tracked=1000):
+    """Aggregate failed logins from the newest lines of an auth log in a single pass."""
+    now = datetime.now()
+    cutoff = now - timedelta(minutes=window) if window else None
+
+    summary = {
+        'files': [],
+        'lines_scanned': 0,
+        'failed_logins': 0,
+        'failed_root_logins': 0,
+        'truncated': False
+    }
+    by_source = {}
+    by_user = {}
+
+    files = [path] + (rotated_logs(path) if include_rotated else [])
+    exhausted = False
+
+    for log_file in files:
+        if summary['lines_scanned'] >= max_lines:
+            # Older logs are not opened (or decompressed) once the budget is spent
+            break
+        if log_file.endswith('.gz'):
+            lines = read_lines_tail(log_file, max_lines - summary['lines_scanned'])
+        else:
+            lines = read_lines_reverse(log_file)
+        summary['files'].append(log_file)
+
+        for line in lines:
+            if summary['lines_scanned'] >= max_lines:
+                exhausted = True
+                break
+
+            if cutoff:
+                timestamp = parse_log_timestamp(line, now)
+                if timestamp and timestamp < cutoff:
+                    exhausted = True
+                    break
+
+            summary['lines_scanned'] += 1
+
+            if 'Failed ' not in line:
+                continue
+            match = FAILED_LOGIN_RE.search(line)
+            if not match:
+                continue
+
+            user, source = match.groups()
+            summary['failed_logins'] += 1
+            if user == 'root':
+                summary['failed_root_logins'] += 1
+            if _count_bounded(by_source, source, max_tracked):
+                summary['truncated'] = True
+            if _count_bounded(by_user, user, max_tracked):
+                summary['truncated'] = True
+
+        if exhausted:
+            # Close the generator's file handle before stopping
+            lines.close()
+            break
+
+    summary['by_source'] = dict(sorted(by_source.items(), key=lambda entry: entry[1], reverse=True))
+    summary['by_user'] = dict(sorted(by_user.items(), key=lambda entry: entry[1], reverse=True))
+    if cutoff:
+        summary['window_start'] = cutoff.isoformat()
+
+    return summary
+
+
+def walk_files(paths):
+    """Yield (path, stat) for every regular file under paths without following symlinks."""
+    stack = list(paths)
+
+    while stack:
+        path = stack.pop()
+        try:
+            st = os.lstat(path)
+        except OSError:
+            continue
+
+        if stat.S_ISREG(st.st_mode):
+            yield path, st
+        elif stat.S_ISDIR(st.st_mode):
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            try:
+                                yield entry.path, entry.stat(follow_symlinks=False)
+                            except OSError:
+                                continue
+            except OSError:
+                continue
+
+
+_hash_buffers = threading.local()
+
+
+def hash_file(path):
+    """Return the SHA-256 digest of a file using a reusable per-thread buffer."""
+    buffer = getattr(_hash_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _hash_buffers.buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    h = hashlib.sha256()
+
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            h.update(view[:size])
+
+    return h.hexdigest()
+
+
+def load_manifest(path):
+    """Load an integrity manifest, or None if there is no usable one."""
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+        if isinstance(manifest, dict) and manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    except (IOError, OSError, ValueError):
+        pass
+    return None
+
+
+def scan_integrity(paths, manifest_path, workers=None, deadline=None, update=False, write=True):
+    """Compare files under paths with the stored manifest, hashing only changed files.
+
+    Manifest entries are keyed by path and hold [inode, size, mtime_ns,
+    ctime_ns, sha256]; files whose metadata is unchanged are not rehashed.
+    Hashing runs in a thread pool; files not started by deadline are left
+    pending. The deadline is a soft limit: it does not bound the directory
+    walk or hashes already running. Files that cannot be read are reported
+    as unreadable rather than pending.
+
+    The manifest is written when it did not exist or update is set, unless
+    write is false. Files left unhashed while recording it are listed as
+    pending in the manifest and hashed into it by later runs instead of
+    being reported as added.
+    """
+    start = time.monotonic()
+    manifest = load_manifest(manifest_path)
+    roots = tuple(os.path.join(os.path.abspath(path), '') for path in paths)
+
+    def scanned(path):
+        return path.startswith(roots) or os.path.join(path, '') in roots
+
+    previous = {}
+    recorded_pending = set()
+    if manifest:
+        previous = {path: entry for path, entry in manifest['files'].items() if scanned(path)}
+        recorded_pending = {path for path in manifest.get('pending', []) if scanned(path)}
+
+    current = {}
+    to_hash = []
+    files_seen = 0
+    for path, st in walk_files([os.path.abspath(path) for path in paths]):
+        files_seen += 1
+        metadata = [st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+        entry = previous.get(path)
+        if entry and entry[:4] == metadata:
+            current[path] = entry
+        else:
+            to_hash.append((path, metadata))
+
+    # Largest files first so the pool is not left waiting on one big file
+    to_hash.sort(key=lambda item: item[1][1], reverse=True)
+
+    def hash_entry(path):
+        if deadline is not None and time.monotonic() > deadline:
+            return None, None
+        try:
+            return hash_file(path), None
+        except OSError as e:
+            return None, e
+
+    pending = []
+    unreadable = []
+    bytes_hashed = 0
+    with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as executor:
+        for (path, metadata), (digest, error) in zip(to_hash, executor.map(hash_entry, (path for path, _ in to_hash))):
+            if digest is None:
+                (unreadable if error else pending).append(path)
+                if path in previous:
+                    # Keep the last known digest for files that could not be verified
+                    current[path] = previous[path]
+                continue
+            current[path] = metadata + [digest]
+            bytes_hashed += metadata[1]
+
+    unverified = set(pending) | set(unreadable)
+    if manifest:
+        added = sorted(path for path in current if path not in previous and path not in recorded_pending)
+        removed = sorted(path for path in previous if path not in current and path not in unverified)
+        modified = sorted(path for path in current
+                          if path in previous and path not in unverified and current[path][4] != previous[path][4])
+    else:
+        added, removed, modified = [], [], []
+
+    files = None
+    if manifest is None or update:
+        files = dict(manifest['files']) if manifest else {}
+        for path in previous:
+            files.pop(path, None)
+        files.update(current)
+        still_pending = unverified - set(current)
+    elif recorded_pending - unverified:
+        # Complete the files a previous run left unhashed when recording the manifest
+        files = dict(manifest['files'])
+        files.update((path, current[path]) for path in recorded_pending if path in current)
+        still_pending = recorded_pending & unverified
+
+    updated = files is not None and write
+    if updated:
+        other_pending = [path for path in manifest.get('pending', []) if not scanned(path)] if manifest else []
+        write_json_atomic(manifest_path, {'version': MANIFEST_VERSION, 'algorithm': 'sha256', 'files': files,
+                                          'pending': other_pending + sorted(still_pending)})
+
+    return {
+        'status': 'compared' if manifest else 'created',
+        'updated': updated,
+        'files': files_seen,
+        'hashed': len(to_hash) - len(unverified),
+        'reused': files_seen - len(to_hash),
+        'bytes_hashed': bytes_hashed,
+        'added': added,
+        'removed': removed,
+        'modified': modified,
+        'pending': len(pending),
+        'unreadable': sorted(unreadable),
+        'complete': not unverified,
+        'duration': round(time.monotonic() - start, 3)
+    }
+
+
+def read_sysctls(keys, root=SYSCTL_ROOT):
+    """Read kernel parameters straight from /proc/sys without forking sysctl.
+
+    Parameters that do not exist on this kernel are returned as None.
+    """
+    values = {}
+
+    for key in keys:
+        try:
+            with open(os.path.join(root, key.replace('.', '/')), 'rb') as f:
+                values[key] = ' '.join(f.read().decode('utf-8', 'replace').split())
+        except OSError:
+            values[key] = None
+
+    return values
+
+
+def classify_password_hash(field):
+    """Classify a shadow password field as (algorithm, strength)."""
+    if field == '':
+        return 'empty', 'empty'
+    if field[0] in '!*':
+        return 'locked', 'locked'
+    for prefix, algorithm, strength in PASSWORD_HASH_PREFIXES:
+        if field.startswith(prefix):
+            return algorithm, strength
+    if len(field) == 13:
+        return 'des', 'weak'
+    return 'unknown', 'weak'
+
+
+def _int_field(value, default):
+    """Parse a numeric shadow or login.defs field."""
+    return int(value) if value.isdigit() else default
+
+
+def analyze_shadow(path, max_tracked=1000):
+    """Stream a shadow file, aggregating hash algorithms and aging per account.
+
+    Only counts, aging extremes and up to max_tracked account names per
+    finding are kept, so memory stays bounded for very large databases.
+    Password hashes are never retained.
+    """
+    summary = {
+        'accounts': 0,
+        'algorithms': {},
+        'empty': 0,
+        'locked': 0,
+        'weak_hash': 0,
+        'legacy_hash': 0,
+        'max_password_age': None,
+        'min_password_age': None,
+        'min_password_warn': None,
+        'examples': {'empty': [], 'weak_hash': [], 'legacy_hash': [], 'no_expiry': []}
+    }
+
+    def remember(finding, name):
+        if len(summary['examples'][finding]) < max_tracked:
+            summary['examples'][finding].append(name)
+
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            fields = line.rstrip('\n').split(':')
+            # Skip malformed lines and NIS compat entries
+            if len(fields) < 2 or not fields[0] or fields[0][0] in '+-':
+                continue
+
+            name = fields[0]
+            fields += [''] * (8 - len(fields))
+            algorithm, strength = classify_password_hash(fields[1])
+            summary['accounts'] += 1
+            summary['algorithms'][algorithm] = summary['algorithms'].get(algorithm, 0) + 1
+
+            if strength == 'locked':
+                summary['locked'] += 1
+                continue
+            if strength == 'empty':
+                summary['empty'] += 1
+                remember('empty', name)
+                continue
+            if strength == 'weak':
+                summary['weak_hash'] += 1
+                remember('weak_hash', name)
+            elif strength == 'legacy':
+                summary['legacy_hash'] += 1
+                remember('legacy_hash', name)
+
+            # Aging applies to accounts with a usable password; an empty
+            # maximum means the password never expires
+            max_days = _int_field(fields[4], 99999)
+            min_days = _int_field(fields[3], 0)
+            warn_days = _int_field(fields[5], 0)
+            if max_days >= 99999:
+                remember('no_expiry', name)
+            if summary['max_password_age'] is None or max_days > summary['max_password_age']:
+                summary['max_password_age'] = max_days
+            if summary['min_password_age'] is None or min_days < summary['min_password_age']:
+                summary['min_password_age'] = min_days
+            if summary['min_password_warn'] is None or warn_days < summary['min_password_warn']:
+                summary['min_password_warn'] = warn_days
+
+    return summary
+
+
+def parse_login_defs(path=LOGIN_DEFS_PATH):
+    """Parse the password settings of login.defs."""
+    settings = {}
+
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and not parts[0].startswith('#'):
+                    settings[parts[0].upper()] = parts[1]
+    except OSError:
+        pass
+
+    return {
+        'pass_max_days': _int_field(settings.get('PASS_MAX_DAYS', ''), None),
+        'pass_min_days': _int_field(settings.get('PASS_MIN_DAYS', ''), None),
+        'pass_warn_age': _int_field(settings.get('PASS_WARN_AGE', ''), None),
+        # Unset means unknown: current shadow-utils builds default to SHA512 or YESCRYPT
+        'encrypt_method': settings.get('ENCRYPT_METHOD', '').upper() or None
+    }
+
+
+def parse_pam_password(paths=PAM_PASSWORD_PATHS, login_encrypt_method=None):
+    """Summarise the PAM password stack: hash algorithm, quality checks and history.
+
+    pam_unix without a hash option uses ENCRYPT_METHOD from login.defs, so
+    the hash is inherited from login_encrypt_method (None if unknown).
+    """
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+
+        pam = {'file': path, 'hash': None, 'quality': False, 'remember': None}
+        unix_found = False
+        with open(path, 'r') as f:
+            for line in f:
+                match = PAM_PASSWORD_RE.match(line)
+                if not match:
+                    continue
+                module_name = os.path.basename(match.group(1))
+                options = match.group(2).split()
+
+                if module_name in ['pam_pwquality.so', 'pam_cracklib.so']:
+                    pam['quality'] = True
+                if module_name == 'pam_unix.so':
+                    unix_found = True
+                    pam['hash'] = next((option for option in options if option in PAM_HASH_OPTIONS),
+                                       login_encrypt_method.lower() if login_encrypt_method else None)
+                for option in options:
+                    if option.startswith('remember='):
+                        pam['remember'] = _int_field(option.split('=', 1)[1], 0)
+
+        if unix_found and pam['remember'] is None:
+            pam['remember'] = 0
+        return pam
+
+    return None
+
+
+def check_ssh_config(target, ethical_level, standards, rule_index=RULE_INDEX):
+    """Check SSH configuration for security issues."""
+    issues = []
+    
+    try:
+        rules = applicable_rules(rule_index, 'config', ethical_level, target)
+        issues = evaluate_rules(rules, parse_sshd_config(target), target)
     
     except Exception as e:
         issues.append({
@@ -248,78 +1917,20 @@ def check_ssh_config(target, ethical_level, standards):
     return issues
 
 
-def check_file_permissions(target, ethical_level):
+def check_file_permissions(target, ethical_level, rule_index=RULE_INDEX):
     """Check file permissions for security issues."""
     issues = []
     
     try:
         st = os.stat(target)
-        mode = st.st_mode
-        
-        # Check owner and group
-        owner = st.st_uid
-        group = st.st_gid
-        
-        if target in ['/etc/passwd', '/etc/shadow', '/etc/group', '/etc/gshadow']:
-            # Critical system files
-            
-            # Check world-readable for sensitive files
-            if target == '/etc/shadow' or target == '/etc/gshadow':
-                if mode & stat.S_IROTH:
-                    issues.append({
-                        'severity': 'critical',
-                        'description': f'{target} is world-readable',
-                        'recommendation': f'Remove world-readable permission: chmod o-r {target}',
-                        'ethical_impact': 'Exposes password hashes, severe privacy and security risk',
-                        'compliant': False,
-                        'standard': 'CIS 6.1.3'
-                    })
-            
-            # Check owner for system files
-            if owner != 0:  # Not owned by root
-                issues.append({
-                    'severity': 'high',
-                    'description': f'{target} is not owned by root',
-                    'recommendation': f'Change owner to root: chown root {target}',
-                    'ethical_impact': 'Improper ownership can lead to unauthorized modifications',
-                    'compliant': False,
-                    'standard': 'CIS 6.1.2'
-                })
-            
-            # Check group for sensitive files
-            if target == '/etc/shadow' or target == '/etc/gshadow':
-                if group != 0 and group != 42:  # Not root or shadow
-                    issues.append({
-                        'severity': 'high',
-                        'description': f'{target} has incorrect group',
-                        'recommendation': f'Change group to shadow: chgrp shadow {target}',
-                        'ethical_impact': 'Improper group can lead to unauthorized access',
-                        'compliant': False,
-                        'standard': 'CIS 6.1.3'
-                    })
-        
-        # Check world-writable for all files
-        if mode & stat.S_IWOTH:
-            issues.append({
-                'severity': 'high',
-                'description': f'{target} is world-writable',
-                'recommendation': f'Remove world-writable permission: chmod o-w {target}',
-                'ethical_impact': 'World-writable files can be modified by any user, risking integrity',
-                'compliant': False,
-                'standard': 'CIS 6.1.9'
-            })
+        state = {
+            'mode': st.st_mode,
+            'uid': st.st_uid,
+            'gid': st.st_gid
+        }
         
-        # In strict mode, check for SUID/SGID
-        if ethical_level == 'strict':
-            if mode & (stat.S_ISUID | stat.S_ISGID):
-                issues.append({
-                    'severity': 'medium',
-                    'description': f'{target} has SUID/SGID bit set',
-                    'recommendation': f'Review if SUID/SGID is necessary: chmod -s {target}',
-                    'ethical_impact': 'SUID/SGID files present privilege escalation risk if compromised',
-                    'compliant': False,
-                    'standard': 'CIS 6.1.14'
-                })
+        rules = applicable_rules(rule_index, 'permissions', ethical_level, target)
+        issues = evaluate_rules(rules, state, target)
     
     except Exception as e:
         issues.append({
@@ -334,117 +1945,165 @@ def check_file_permissions(target, ethical_level):
     return issues
 
 
-def check_network_security(target, ethical_level):
+def check_network_security(target, ethical_level, attribute_processes=True, rule_index=RULE_INDEX,
+                           baseline=None):
     """Check network interface security."""
     issues = []
+    listeners = []
     
     try:
-        # Check open ports using ss or netstat
-        try:
-            output = subprocess.check_output(['ss', '-tuln'], universal_newlines=True)
-        except (subprocess.SubprocessError, FileNotFoundError):
-            try:
-                output = subprocess.check_output(['netstat', '-tuln'], universal_newlines=True)
-            except (subprocess.SubprocessError, FileNotFoundError):
-                output = ""
-                issues.append({
-                    'severity': 'medium',
-                    'description': 'Unable to check for open ports, ss/netstat not available',
-                    'recommendation': 'Install iproute2 or net-tools package',
-                    'ethical_impact': 'Cannot verify network security posture',
-                    'compliant': False,
-                    'standard': 'N/A'
-                })
+        rules = applicable_rules(rule_index, 'network', ethical_level, target)
+        known_owners = baseline.get('socket_owners') if baseline is not None else None
+        state = collect_network_state({rule['fact'] for rule in rules}, attribute_processes, known_owners)
+        issues = evaluate_rules(rules, state, target)
+        listeners = state.get('listeners', [])
+        if baseline is not None:
+            baseline['socket_owners'] = state.get('socket_owners', {})
         
-        # Check for sensitive ports
-        sensitive_ports = {
-            '21': 'FTP',
-            '23': 'Telnet',
-            '25': 'SMTP',
-            '53': 'DNS',
-            '137': 'NetBIOS',
-            '139': 'NetBIOS',
-            '445': 'SMB',
-            '1433': 'MS SQL',
-            '3306': 'MySQL',
-            '5432': 'PostgreSQL'
+        # Point each port issue at the listeners (and processes) behind it
+        by_port = {}
+        for listener in listeners:
+            by_port.setdefault(listener['port'], []).append(listener)
+        for issue in issues:
+            if 'port' in issue:
+                issue['listeners'] = by_port.get(issue['port'], [])
+    
+    except Exception as e:
+        issues.append({
+            'severity': 'high',
+            'description': f'Error checking network security: {str(e)}',
+            'recommendation': 'Ensure network tools are installed and accessible',
+            'ethical_impact': 'Unable to verify network security posture',
+            'compliant': False,
+            'standard': 'N/A'
+        })
+    
+    return issues, listeners
+
+
+def check_auth_log(target, ethical_level, max_lines=10000, window=0, include_rotated=False,
+                   max_tracked=1000, rule_index=RULE_INDEX):
+    """Check an authentication log for failed login activity."""
+    issues = []
+    summary = {}
+    
+    try:
+        summary = analyze_auth_log(target, max_lines, window, include_rotated, max_tracked)
+        state = {
+            'failed_by_source': summary['by_source'],
+            'failed_root_logins': summary['failed_root_logins']
         }
         
-        for port, service in sensitive_ports.items():
-            if re.search(rf':{port}\s', output):
-                severity = 'medium'
-                if port in ['23', '137', '139']:  # Especially risky services
-                    severity = 'high'
-                
-                issues.append({
-                    'severity': severity,
-                    'description': f'Port {port} ({service}) is open',
-                    'recommendation': f'If not required, disable the {service} service or restrict access with firewall',
-                    'ethical_impact': f'Open {service} port may expose sensitive services to unauthorized access',
-                    'compliant': False,
-                    'standard': 'CIS 3.2'
-                })
+        rules = applicable_rules(rule_index, 'auth_log', ethical_level, target)
+        issues = evaluate_rules(rules, state, target)
+    
+    except Exception as e:
+        issues.append({
+            'severity': 'medium',
+            'description': f'Error analyzing authentication log: {str(e)}',
+            'recommendation': 'Ensure the authentication log exists and is readable',
+            'ethical_impact': 'Unable to detect attacks against user accounts',
+            'compliant': False,
+            'standard': 'N/A'
+        })
+    
+    return issues, summary
+
+
+def check_integrity(target, ethical_level, paths=None, manifest=None, workers=None, timeout=None,
+                    update=False, write=True, rule_index=RULE_INDEX):
+    """Check files for tampering against a stored integrity manifest."""
+    issues = []
+    summary = {}
+    
+    try:
+        deadline = time.monotonic() + timeout if timeout else None
+        summary = scan_integrity(paths or [target], manifest, workers, deadline, update, write)
+        state = {
+            'modified_count': len(summary['modified']),
+            'added_count': len(summary['added']),
+            'removed_count': len(summary['removed']),
+            'pending_count': summary['pending'],
+            'unreadable_count': len(summary['unreadable'])
+        }
+        
+        rules = applicable_rules(rule_index, 'integrity', ethical_level, target)
+        issues = evaluate_rules(rules, state, target)
+    
+    except Exception as e:
+        issues.append({
+            'severity': 'high',
+            'description': f'Error checking file integrity: {str(e)}',
+            'recommendation': 'Ensure the scanned paths and the manifest location are accessible',
+            'ethical_impact': 'Unable to detect tampered binaries or configuration',
+            'compliant': False,
+            'standard': 'N/A'
+        })
+    
+    return issues, summary
+
+
+def check_kernel_parameters(target, ethical_level, rule_index=RULE_INDEX):
+    """Check live kernel parameters against the profile for ethical_level."""
+    issues = []
+    values = {}
+    
+    try:
+        rules = applicable_rules(rule_index, 'kernel', ethical_level, target)
+        values = read_sysctls(sorted({rule['fact'] for rule in rules}))
+        issues = evaluate_rules(rules, values, target)
+    
+    except Exception as e:
+        issues.append({
+            'severity': 'medium',
+            'description': f'Error reading kernel parameters: {str(e)}',
+            'recommendation': 'Ensure /proc/sys is mounted and readable',
+            'ethical_impact': 'Unable to verify kernel hardening',
+            'compliant': False,
+            'standard': 'N/A'
+        })
+    
+    return issues, values
+
+
+def check_passwords(target, ethical_level, max_tracked=1000, rule_index=RULE_INDEX):
+    """Check stored password hashes, aging and password policy."""
+    issues = []
+    summary = {}
+    
+    try:
+        summary = analyze_shadow(target, max_tracked)
+        summary['login_defs'] = parse_login_defs()
+        summary['pam'] = parse_pam_password(login_encrypt_method=summary['login_defs']['encrypt_method'])
         
-        # Check for all listening on 0.0.0.0 (all interfaces)
-        if ethical_level in ['standard', 'strict']:
-            all_interfaces = re.findall(r'0\.0\.0\.0:(\d+)', output)
-            for port in all_interfaces:
-                if port not in ['22', '80', '443']:  # Common exceptions
-                    issues.append({
-                        'severity': 'medium',
-                        'description': f'Service on port {port} is listening on all interfaces (0.0.0.0)',
-                        'recommendation': 'Configure the service to listen only on required interfaces',
-                        'ethical_impact': 'Services exposed on all interfaces increase attack surface',
-                        'compliant': False,
-                        'standard': 'CIS 3.4'
-                    })
+        pam = summary['pam'] or {}
+        state = {
+            'empty_count': summary['empty'],
+            'weak_hash_count': summary['weak_hash'],
+            'legacy_hash_count': summary['legacy_hash'],
+            'max_password_age': summary['max_password_age'],
+            'min_password_age': summary['min_password_age'],
+            'min_password_warn': summary['min_password_warn'],
+            'login_encrypt_method': summary['login_defs']['encrypt_method'],
+            'pam_hash': pam.get('hash'),
+            'pam_quality': pam.get('quality'),
+            'pam_remember': pam.get('remember')
+        }
         
-        # Check firewall status if in strict mode
-        if ethical_level == 'strict':
-            try:
-                ufw_output = subprocess.check_output(['ufw', 'status'], universal_newlines=True)
-                if 'inactive' in ufw_output:
-                    issues.append({
-                        'severity': 'high',
-                        'description': 'Firewall (ufw) is inactive',
-                        'recommendation': 'Enable the firewall with appropriate rules',
-                        'ethical_impact': 'Systems without active firewalls are vulnerable to network attacks',
-                        'compliant': False,
-                        'standard': 'CIS 3.5'
-                    })
-            except (subprocess.SubprocessError, FileNotFoundError):
-                try:
-                    iptables_output = subprocess.check_output(['iptables', '-L'], universal_newlines=True)
-                    if 'Chain INPUT (policy ACCEPT)' in iptables_output and 'Chain FORWARD (policy ACCEPT)' in iptables_output:
-                        issues.append({
-                            'severity': 'high',
-                            'description': 'Firewall (iptables) has ACCEPT default policies',
-                            'recommendation': 'Configure iptables with restrictive default policies',
-                            'ethical_impact': 'Default ACCEPT policies allow unauthorized traffic by default',
-                            'compliant': False,
-                            'standard': 'CIS 3.5'
-                        })
-                except (subprocess.SubprocessError, FileNotFoundError):
-                    issues.append({
-                        'severity': 'high',
-                        'description': 'Unable to check firewall status',
-                        'recommendation': 'Install and configure a firewall (ufw, iptables)',
-                        'ethical_impact': 'Unknown firewall state may indicate lack of network protection',
-                        'compliant': False,
-                        'standard': 'CIS 3.5'
-                    })
+        rules = applicable_rules(rule_index, 'passwords', ethical_level, target)
+        issues = evaluate_rules(rules, state, target)
     
     except Exception as e:
         issues.append({
             'severity': 'high',
-            'description': f'Error checking network security: {str(e)}',
-            'recommendation': 'Ensure network tools are installed and accessible',
-            'ethical_impact': 'Unable to verify network security posture',
+            'description': f'Error checking passwords: {str(e)}',
+            'recommendation': 'Ensure the shadow file is readable (run with become)',
+            'ethical_impact': 'Unable to verify how user credentials are protected',
             'compliant': False,
             'standard': 'N/A'
         })
     
-    return issues
+    return issues, summary
 
 
 def calculate_score(issues):
@@ -566,10 +2225,23 @@ def main():
     module = AnsibleModule(
         argument_spec=dict(
             target=dict(type='str', required=True),
-            scan_type=dict(type='str', required=True, choices=['config', 'network', 'permissions', 'passwords', 'compliance']),
+            scan_type=dict(type='str', required=True, choices=['config', 'network', 'permissions', 'passwords',
+                                                               'compliance', 'auth_log', 'integrity', 'kernel']),
             ethical_level=dict(type='str', default='standard', choices=['minimal', 'standard', 'strict']),
             compliance_standards=dict(type='list', elements='str', default=['cis']),
-            timeout=dict(type='int', default=60)
+            timeout=dict(type='int', default=60),
+            rule_catalog=dict(type='path'),
+            max_lines=dict(type='int', default=10000),
+            window=dict(type='int', default=0),
+            include_rotated=dict(type='bool', default=False),
+            max_tracked=dict(type='int', default=1000),
+            attribute_processes=dict(type='bool', default=True),
+            baseline=dict(type='path'),
+            baseline_reset=dict(type='bool', default=False),
+            paths=dict(type='list', elements='path'),
+            manifest=dict(type='path', default='/var/lib/summitethic/security_check/integrity.json'),
+            manifest_update=dict(type='bool', default=False),
+            workers=dict(type='int')
         ),
         supports_check_mode=True
     )
@@ -580,32 +2252,101 @@ def main():
     standards = module.params['compliance_standards']
     timeout = module.params['timeout']
     
+    rule_index = RULE_INDEX
+    if module.params['rule_catalog']:
+        try:
+            rule_index = load_rule_catalog(module.params['rule_catalog'])
+        except (IOError, OSError, ValueError) as e:
+            module.fail_json(msg=f"Unable to load rule catalog: {str(e)}")
+    
     # Set timeout for long-running operations
     socket.setdefaulttimeout(timeout)
     
     issues = []
+    extra_results = {}
+    changed = False
+    
+    # Delta re-audit against the issues of the previous run
+    baseline_store = None
+    baseline_entry = None
+    previous_entry = {}
+    if module.params['baseline'] and scan_type in BASELINE_SCAN_TYPES:
+        baseline_store = load_baseline(module.params['baseline'])
+        baseline_key = f'{scan_type}:{target}:{ethical_level}'
+        if not module.params['baseline_reset']:
+            previous_entry = baseline_store['entries'].get(baseline_key, {})
+        baseline_entry = copy.deepcopy(previous_entry)
     
     # Perform the appropriate check based on scan_type
     if scan_type == 'config':
         if os.path.basename(target) == 'sshd_config':
-            issues = check_ssh_config(target, ethical_level, standards)
+            issues = check_ssh_config(target, ethical_level, standards, rule_index)
         else:
             module.fail_json(msg=f"Config scan for {target} not implemented")
     
     elif scan_type == 'permissions':
-        issues = check_file_permissions(target, ethical_level)
+        issues = check_file_permissions(target, ethical_level, rule_index)
     
     elif scan_type == 'network':
-        issues = check_network_security(target, ethical_level)
+        issues, extra_results['listeners'] = check_network_security(
+            target, ethical_level,
+            attribute_processes=module.params['attribute_processes'],
+            rule_index=rule_index,
+            baseline=baseline_entry
+        )
+    
+    elif scan_type == 'auth_log':
+        issues, extra_results['auth_log'] = check_auth_log(
+            target, ethical_level,
+            max_lines=module.params['max_lines'],
+            window=module.params['window'],
+            include_rotated=module.params['include_rotated'],
+            max_tracked=module.params['max_tracked'],
+            rule_index=rule_index
+        )
+    
+    elif scan_type == 'integrity':
+        issues, extra_results['integrity'] = check_integrity(
+            target, ethical_level,
+            paths=module.params['paths'],
+            manifest=module.params['manifest'],
+            workers=module.params['workers'],
+            timeout=timeout,
+            update=module.params['manifest_update'],
+            write=not module.check_mode,
+            rule_index=rule_index
+        )
+        changed = extra_results['integrity'].get('updated', False)
+    
+    elif scan_type == 'kernel':
+        issues, extra_results['sysctl'] = check_kernel_parameters(target, ethical_level, rule_index)
     
     elif scan_type == 'passwords':
-        # Check for weak passwords in shadow file or password policies
-        module.fail_json(msg="Password scan not implemented in this version")
+        issues, extra_results['passwords'] = check_passwords(
+            target, ethical_level,
+            max_tracked=module.params['max_tracked'],
+            rule_index=rule_index
+        )
     
     elif scan_type == 'compliance':
         # Comprehensive compliance check across multiple dimensions
         module.fail_json(msg="Comprehensive compliance scan not implemented in this version")
     
+    if baseline_entry is not None:
+        baseline_entry['issues'] = issues
+        delta = diff_issues(previous_entry.get('issues', []), issues)
+        delta['status'] = 'compared' if previous_entry else 'created'
+        extra_results['baseline'] = delta
+        
+        if baseline_entry != previous_entry:
+            changed = True
+            baseline_store['entries'][baseline_key] = baseline_entry
+            if not module.check_mode:
+                try:
+                    write_json_atomic(module.params['baseline'], baseline_store)
+                except (IOError, OSError) as e:
+                    module.fail_json(msg=f"Unable to write baseline: {str(e)}")
+    
     # Calculate score based on issues
     score = calculate_score(issues)
     
@@ -617,13 +2358,14 @@ def main():
     
     # Return results
     module.exit_json(
-        changed=False,
+        changed=changed,
         issues=issues,
         score=score,
         ethical_assessment=ethical_assessment,
-        compliance=compliance_status
+        compliance=compliance_status,
+        **extra_results
     )
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
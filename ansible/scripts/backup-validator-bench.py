@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+SummitEthic Backup Validator Benchmark
+
+This script generates a deterministic synthetic backup corpus (tar, tar.gz
+and zip archives, plain and gzipped SQL dumps), times the backup-validator
+functions and the directory mode against it, and reports MB/s and
+members/s (rows/s for SQL dumps) compared with a stored baseline.
+"""
+
+import io
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import tarfile
+import zipfile
+import argparse
+import importlib.util
+from datetime import datetime
+
+
+VALIDATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backup-validator.py')
+
+DEFAULT_CORPUS_DIR = '/var/tmp/summitethic-backup-bench'
+CORPUS_VERSION = 1
+
+WORDS = [b'alpha', b'backup', b'cluster', b'delta', b'ethic', b'summit', b'ledger', b'node',
+         b'replica', b'shard', b'volume', b'archive', b'journal', b'record', b'index', b'tenant']
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Benchmark backup-validator on a synthetic backup corpus')
+    parser.add_argument('--corpus-dir', default=DEFAULT_CORPUS_DIR,
+                        help=f'Directory for the generated corpus (default: {DEFAULT_CORPUS_DIR})')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Seed for the corpus generator (default: 42)')
+    parser.add_argument('--members', type=int, default=200,
+                        help='Members per archive (default: 200)')
+    parser.add_argument('--member-kb', type=int, default=64,
+                        help='Size of each archive member in KB (default: 64)')
+    parser.add_argument('--random-ratio', type=float, default=0.25,
+                        help='Share of incompressible bytes in archive members (default: 0.25)')
+    parser.add_argument('--tables', type=int, default=20,
+                        help='Tables per SQL dump (default: 20)')
+    parser.add_argument('--rows', type=int, default=20000,
+                        help='Rows per table in SQL dumps (default: 20000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per benchmark, the fastest is reported (default: 3)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Workers for the parallel directory benchmark (default: CPU count)')
+    parser.add_argument('--only',
+                        help='Comma-separated benchmark name prefixes to run (e.g. stream_backup,directory)')
+    parser.add_argument('--baseline',
+                        help='Baseline JSON file to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Write the results to the --baseline file instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown against the baseline before failing (default: 0.2)')
+    parser.add_argument('--format', '-f', default='text', choices=['text', 'json'],
+                        help='Output format (default: text)')
+    return parser.parse_args()
+
+
+def load_validator():
+    """Import backup-validator.py, whose file name is not a module name"""
+    spec = importlib.util.spec_from_file_location('backup_validator', VALIDATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so the directory mode's process pool can pickle its functions
+    sys.modules['backup_validator'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_bytes(rng, size, random_ratio):
+    """Return size bytes of word text mixed with incompressible runs"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        run = min(remaining, rng.randint(512, 8192))
+        if rng.random() < random_ratio:
+            chunks.append(rng.randbytes(run))
+        else:
+            text = b' '.join(rng.choice(WORDS) for _ in range(run // 6 + 1))
+            chunks.append(text[:run])
+        remaining -= run
+    return b''.join(chunks)
+
+
+def write_archive(path, params, rng):
+    """Write a tar, tar.gz or zip archive of synthetic members"""
+    size = params['member_kb'] * 1024
+    members = [(f'data/dir{i // 50:03d}/file{i:05d}.dat', synthetic_bytes(rng, size, params['random_ratio']))
+               for i in range(params['members'])]
+
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, data in members:
+                info = zipfile.ZipInfo(name, date_time=(2025, 1, 1, 0, 0, 0))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, data)
+        return
+
+    # A fixed gzip header mtime keeps compressed files byte-identical between runs
+    with open(path, 'wb') as raw:
+        fileobj = gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) if path.endswith('.gz') else raw
+        with tarfile.open(fileobj=fileobj, mode='w') as archive:
+            for name, data in members:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = 1735689600
+                archive.addfile(info, io.BytesIO(data))
+        if fileobj is not raw:
+            fileobj.close()
+
+
+def write_sql_dump(path, params, rng):
+    """Write a mysqldump-style SQL dump, gzipped when the path ends in .gz"""
+    if path.endswith('.gz'):
+        f = gzip.GzipFile(path, 'wb', mtime=0)
+    else:
+        f = open(path, 'wb')
+    with f:
+        f.write(b'-- MySQL dump 10.13  Distrib 8.0.36, for Linux (x86_64)\n--\n'
+                b'-- Host: localhost    Database: bench\n\n')
+        for t in range(params['tables']):
+            table = f'`bench_{t:03d}`'.encode()
+            f.write(b'DROP TABLE IF EXISTS ' + table + b';\n')
+            f.write(b'CREATE TABLE ' + table + b' (\n  `id` int NOT NULL,\n  `name` varchar(64),\n'
+                    b'  `amount` decimal(10,2),\n  PRIMARY KEY (`id`)\n) ENGINE=InnoDB;\n\n')
+            # Extended inserts of 500 rows, as mysqldump writes them
+            for start in range(0, params['rows'], 500):
+                rows = []
+                for row in range(start, min(start + 500, params['rows'])):
+                    name = b'-'.join(rng.choice(WORDS) for _ in range(3))
+                    rows.append(b"(%d,'%s',%d.%02d)" % (row, name, rng.randint(0, 99999), rng.randint(0, 99)))
+                f.write(b'INSERT INTO ' + table + b' VALUES ' + b','.join(rows) + b';\n')
+            f.write(b'\n')
+        f.write(b'-- Dump completed on 2025-01-01  0:00:00\n')
+
+
+def corpus_params(args):
+    """Return the parameters that define the corpus contents"""
+    return {
+        'version': CORPUS_VERSION,
+        'seed': args.seed,
+        'members': args.members,
+        'member_kb': args.member_kb,
+        'random_ratio': args.random_ratio,
+        'tables': args.tables,
+        'rows': args.rows
+    }
+
+
+def build_corpus(corpus_dir, params):
+    """Generate the corpus unless the directory already holds the same one"""
+    manifest_path = os.path.join(corpus_dir, 'corpus.json')
+    names = ['bench.tar', 'bench.tar.gz', 'bench.zip', 'bench-db.sql', 'bench-db.sql.gz']
+
+    try:
+        with open(manifest_path) as f:
+            if json.load(f) == params and all(os.path.exists(os.path.join(corpus_dir, n)) for n in names):
+                return [os.path.join(corpus_dir, n) for n in names]
+    except (OSError, ValueError):
+        pass
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    paths = []
+    for index, name in enumerate(names):
+        path = os.path.join(corpus_dir, name)
+        # One generator per file keeps each file reproducible on its own
+        rng = random.Random(params['seed'] * 1000 + index)
+        print(f'Generating {path}', file=sys.stderr)
+        if '.sql' in name:
+            write_sql_dump(path, params, rng)
+        else:
+            write_archive(path, params, rng)
+        paths.append(path)
+
+    with open(manifest_path, 'w') as f:
+        json.dump(params, f, indent=2)
+    return paths
+
+
+def time_best(func, repeat):
+    """Run func repeat times and return the fastest time and its last result"""
+    best = None
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def scan_members(scan):
+    """Return the members of an archive scan, or the rows of a SQL dump"""
+    if scan.get('members') is not None:
+        return len(scan['members'])
+    return (scan.get('sql') or {}).get('row_count', 0)
+
+
+def benchmarks(bv, paths, corpus_dir, workers):
+    """Yield (name, callable, path or directory) for every benchmark"""
+    for path in paths:
+        name = os.path.basename(path)
+        fmt = bv.sniff_backup_format(path)
+        validator = bv.validate_database_backup if '.sql' in name else bv.validate_files_backup
+
+        yield f'stream_backup[{name}]', lambda p=path: bv.stream_backup(p), path
+        yield f'{validator.__name__}[{name}]', lambda p=path, v=validator: v(p, True), path
+        if fmt['container'] in ['tar', 'zip']:
+            yield f'restore_test[{name}]', lambda p=path: bv.stream_backup(p, restore_test=True), path
+        if fmt['compression'] is None and fmt['container'] in ['tar', 'zip']:
+            yield f'scan_headers[{name}]', lambda p=path, f=fmt: bv.scan_headers(p, f), path
+        yield f'detect_encryption[{name}]', lambda p=path: bv.detect_encryption(p), path
+
+    yield 'directory[workers=1]', lambda: bv.validate_backup_directory(corpus_dir, True), corpus_dir
+    if workers > 1:
+        yield (f'directory[workers={workers}]',
+               lambda: bv.validate_backup_directory(corpus_dir, True, workers=workers), corpus_dir)
+
+
+def run_benchmarks(bv, paths, corpus_dir, args):
+    """Time every selected benchmark and return results keyed by name"""
+    sizes = {path: os.path.getsize(path) for path in paths}
+    members = {path: scan_members(bv.stream_backup(path)) for path in paths}
+    only = [prefix.strip() for prefix in args.only.split(',')] if args.only else None
+
+    results = {}
+    for name, func, target in benchmarks(bv, paths, corpus_dir, args.workers):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        seconds, _ = time_best(func, args.repeat)
+        if target == corpus_dir:
+            nbytes, count = sum(sizes.values()), sum(members.values())
+        elif name.startswith('detect_encryption'):
+            # Encryption detection only samples the file, so only its time is comparable
+            nbytes, count = None, 0
+        else:
+            nbytes, count = sizes[target], members[target]
+        results[name] = {
+            'seconds': round(seconds, 6),
+            'bytes': nbytes,
+            'mb_per_s': round(nbytes / seconds / (1024 * 1024), 1) if nbytes and seconds > 0 else None,
+            'members_per_s': round(count / seconds) if seconds > 0 and count else None
+        }
+        print(f'{name}: {seconds:.3f}s', file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Annotate results with their speed change against the baseline, returning the regressions
+
+    The change compares MB/s where there is one and run time otherwise,
+    so a negative change is always a slowdown.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        if result['mb_per_s'] and previous.get('mb_per_s'):
+            change = result['mb_per_s'] / previous['mb_per_s'] - 1
+            result['baseline_mb_per_s'] = previous['mb_per_s']
+        elif result['seconds'] and previous.get('seconds'):
+            change = previous['seconds'] / result['seconds'] - 1
+        else:
+            continue
+        result['baseline_seconds'] = previous['seconds']
+        result['change'] = round(change, 3)
+        if change < -tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def format_text(results):
+    """Format benchmark results as an aligned text table"""
+    columns = ['benchmark', 'ms', 'MB/s', 'members/s', 'baseline ms', 'baseline MB/s', 'change']
+    table = [columns]
+    for name, result in results.items():
+        change = result.get('change')
+        baseline_seconds = result.get('baseline_seconds')
+        table.append([name, f"{result['seconds'] * 1000:.2f}",
+                      '' if result['mb_per_s'] is None else str(result['mb_per_s']),
+                      '' if result['members_per_s'] is None else str(result['members_per_s']),
+                      '' if baseline_seconds is None else f'{baseline_seconds * 1000:.2f}',
+                      str(result.get('baseline_mb_per_s', '')),
+                      '' if change is None else f'{change:+.1%}'])
+    widths = [max(len(row[i]) for row in table) for i in range(len(columns))]
+
+    lines = []
+    for index, row in enumerate(table):
+        lines.append('  '.join(value.ljust(widths[i]) for i, value in enumerate(row)).rstrip())
+        if index == 0:
+            lines.append('  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+
+    if args.save_baseline and not args.baseline:
+        print('Error: --save-baseline requires --baseline')
+        sys.exit(1)
+
+    bv = load_validator()
+    params = corpus_params(args)
+    paths = build_corpus(args.corpus_dir, params)
+    results = run_benchmarks(bv, paths, args.corpus_dir, args)
+
+    run = {
+        'timestamp': datetime.now().isoformat(),
+        'host': os.uname().nodename,
+        'corpus': params,
+        'results': results
+    }
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f'Baseline written to: {args.baseline}', file=sys.stderr)
+        regressions = []
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('corpus') != params:
+            print('Warning: baseline was recorded on a different corpus', file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+    else:
+        regressions = []
+
+    if args.format == 'json':
+        print(json.dumps(run, indent=2))
+    else:
+        print(format_text(results))
+        if regressions:
+            print(f'\n{len(regressions)} regressions beyond {args.tolerance:.0%}: {", ".join(regressions)}')
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,20 +7,36 @@ ensuring that backups meet SummitEthic's ethical data handling requirements.
 """
 
 import os
+import re
+import io
 import sys
 import argparse
 import hashlib
 import tarfile
 import gzip
+import bz2
+import lzma
+import zlib
 import zipfile
 import sqlite3
 import json
-import yaml
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
-import tempfile
 import subprocess
 import shutil
+import math
+import time
+import random
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from collections import Counter, deque
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +46,154 @@ logging.basicConfig(
 )
 logger = logging.getLogger('backup-validator')
 
+# Size of each sequential read from a backup file
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Pages of a backup already read are dropped from the page cache in steps
+# of this size, so validation does not evict the cache of other services
+PAGE_CACHE_DROP_SIZE = 16 * 1024 * 1024
+
+# Longest piece of a SQL dump line held in memory at once; longer lines
+# (extended INSERTs) are analysed in pieces of this size
+SQL_LINE_LIMIT = 1024 * 1024
+
+SQL_CREATE_TABLE_RE = re.compile(rb'CREATE TABLE (?:IF NOT EXISTS )?([^\s(]+)', re.IGNORECASE)
+SQL_INSERT_RE = re.compile(rb'INSERT INTO ([^\s(]+)', re.IGNORECASE)
+SQL_COPY_RE = re.compile(rb'COPY ([^\s(]+).* FROM stdin;', re.IGNORECASE)
+
+# Last comment written by mysqldump and pg_dump once a dump is complete
+SQL_DUMP_TRAILERS = (b'-- Dump completed', b'-- PostgreSQL database dump complete')
+
+# Digests the hashing engine can compute in a single read
+HASH_ALGORITHMS = ['sha256', 'md5', 'blake2b']
+
+# Files at least this large count as large reads when validating in parallel
+LARGE_FILE_SIZE = 1024 * 1024 * 1024
+
+DEFAULT_CACHE_PATH = '/var/lib/summitethic/backup-validator/cache.db'
+
+CACHE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS validations (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    options TEXT NOT NULL,
+    validated_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    checksum TEXT,
+    member_count INTEGER,
+    result TEXT NOT NULL
+);
+'''
+
+# Backup file suffixes as (suffix, compression, container), compound first
+BACKUP_SUFFIXES = [
+    ('.tar.gz', 'gzip', 'tar'), ('.tgz', 'gzip', 'tar'),
+    ('.tar.xz', 'xz', 'tar'), ('.txz', 'xz', 'tar'),
+    ('.tar.bz2', 'bzip2', 'tar'), ('.tbz2', 'bzip2', 'tar'),
+    ('.tar.zst', 'zstd', 'tar'), ('.tzst', 'zstd', 'tar'),
+    ('.sql.gz', 'gzip', 'sql'), ('.sql.xz', 'xz', 'sql'),
+    ('.sql.bz2', 'bzip2', 'sql'), ('.sql.zst', 'zstd', 'sql'),
+    ('.tar', None, 'tar'), ('.zip', None, 'zip'), ('.sql', None, 'sql'),
+    ('.dump', None, 'pg_dump'), ('.dmp', None, 'pg_dump'),
+    ('.gz', 'gzip', None), ('.xz', 'xz', None), ('.bz2', 'bzip2', None), ('.zst', 'zstd', None),
+]
+
+# Leading bytes of each supported compression format
+COMPRESSION_MAGIC = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'BZh', 'bzip2'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+]
+
+# External decompressors, tried in order. They decompress in a separate
+# process (xz and lbzip2/pbzip2 also with several threads) while this
+# process hashes and parses, so validation can keep pace with the disk.
+EXTERNAL_DECOMPRESSORS = {
+    'xz': [['xz', '-dc', '-T0']],
+    'bzip2': [['lbzip2', '-dc'], ['pbzip2', '-dc']],
+    'zstd': [['zstd', '-dc']],
+}
+
+DECOMPRESSION_ERRORS = (zlib.error, lzma.LZMAError) + ((zstandard.ZstdError,) if zstandard else ())
+
+# Threads decompressing zip members concurrently in a restore test, and
+# how many members are queued for them at a time
+RESTORE_TEST_THREADS = min(8, os.cpu_count() or 1)
+RESTORE_TEST_BATCH = 1024
+
+# Blockwise Merkle checksum manifests, written next to the backup
+MANIFEST_SUFFIX = '.merkle.json'
+MANIFEST_PROGRESS_SUFFIX = '.merkle.progress'
+MANIFEST_VERSION = 1
+MANIFEST_BLOCK_SIZE = 64 * 1024 * 1024
+
+# Leading bytes of encrypted backups
+ENCRYPTION_SIGNATURES = [
+    (b'-----BEGIN PGP MESSAGE-----', 'gpg'),
+    (b'age-encryption.org/v1', 'age'),
+    (b'-----BEGIN AGE ENCRYPTED FILE-----', 'age'),
+    (b'Salted__', 'openssl'),
+]
+
+# First byte of a binary OpenPGP message: a public-key or symmetric-key
+# encrypted session key packet, in old or new packet format
+GPG_PACKET_TAGS = {0x84, 0x85, 0x86, 0x8c, 0x8d, 0x8e, 0xc1, 0xc3}
+
+# Encryption detection reads this many samples of this size, whatever
+# the size of the backup, and treats byte entropy within the margin (in
+# bits per byte) of what random data of that length reaches as ciphertext.
+# Files too small to judge are only recognised by their headers.
+ENTROPY_SAMPLES = 8
+ENTROPY_SAMPLE_SIZE = 4096
+ENTROPY_MARGIN = 0.5
+ENTROPY_MIN_SAMPLE = 256
+
+# PII detection: one compiled pattern with a named group per kind of data.
+# Card numbers are Luhn-checked; national IDs are US social security numbers.
+PII_RE = re.compile(
+    rb'(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})'
+    rb'|(?P<card>(?<![\d-])(?:\d[ -]?){12,18}\d(?![\d-]))'
+    rb'|(?P<national_id>(?<![\d-])(?!000|666|9\d\d)\d{3}-(?!00)\d{2}-(?!0000)\d{4}(?![\d-]))'
+    rb'|(?P<phone>(?<![\w+])(?:\+\d{1,3}[ .-]?)?\(?\d{3}\)?[ .-]\d{3}[ .-]\d{4}(?!\w)|(?<![\w+])\+\d{8,14}(?!\w))'
+)
+
+# Per-backup scanning budget, the most scanned from one member, and the
+# size of the chunks sent to the scanning processes
+PII_BUDGET = 256 * 1024 * 1024
+PII_MEMBER_SAMPLE = 4 * 1024 * 1024
+PII_CHUNK_SIZE = 1024 * 1024
+
+# Most members or tables listed with their own PII counts
+PII_MAX_KEYS = 1000
+
+# Fixed part of a zip local file header, the minimum preceding member data
+ZIP_LOCAL_HEADER_SIZE = 30
+
+# Bytes read from the start of a file (and decompressed) to sniff its format
+SNIFF_READ_SIZE = 64 * 1024
+SNIFF_HEAD_SIZE = 512
+
+SQL_HEAD_RE = re.compile(rb'\s*(--|/\*|SET |CREATE |INSERT |DROP |BEGIN|START TRANSACTION|USE |\\connect)',
+                         re.IGNORECASE)
+
+# node_exporter textfile collector metrics and their help text
+PROMETHEUS_PREFIX = 'summitethic_backup_validation'
+PROMETHEUS_METRICS = {
+    'status': ('gauge', 'Validation status of the backup (1 for the current status)'),
+    'age_seconds': ('gauge', 'Age of the backup file at validation time'),
+    'size_bytes': ('gauge', 'Size of the backup file'),
+    'duration_seconds': ('gauge', 'Time taken to validate the backup'),
+    'read_mb_per_second': ('gauge', 'Read throughput of the validation pass in MB/s'),
+    'last_success_timestamp_seconds': ('gauge', 'Unix time of the last validation that did not fail'),
+    'files': ('gauge', 'Number of backups by validation status in the last run'),
+    'last_run_timestamp_seconds': ('gauge', 'Unix time the last validation run finished'),
+}
+PROMETHEUS_STATUSES = ['valid', 'warning', 'error']
+PROMETHEUS_SAMPLE_RE = re.compile(r'^(\w+)\{file="((?:[^"\\]|\\.)*)"\} (\S+)$')
+
 
 def parse_arguments():
     """Parse command line arguments"""
@@ -41,35 +205,1298 @@ def parse_arguments():
                         help='Perform deep inspection of backup content')
     parser.add_argument('--output', '-o', default='backup-validation-report.json',
                         help='Output file for the validation report')
+    parser.add_argument('--format', '-f', default='json', choices=['json', 'ndjson'],
+                        help='Report format: one JSON document, or one line per file as it is '
+                             'validated followed by a summary line (default: json)')
+    parser.add_argument('--prometheus', metavar='PATH',
+                        help='Also write node_exporter textfile collector metrics to PATH '
+                             '(e.g. /var/lib/node_exporter/textfile/backup_validation.prom)')
     parser.add_argument('--verbose', '-v', action='store_true',
                         help='Enable verbose output')
     parser.add_argument('--ethical-check', action='store_true',
                         help='Perform ethical data handling checks')
+    parser.add_argument('--checksums', default='sha256',
+                        help='Comma-separated digests to compute in the same read '
+                             f'({", ".join(HASH_ALGORITHMS)}; default: sha256)')
+    parser.add_argument('--restore-test', action='store_true',
+                        help='Decompress every archive member to verify CRCs, header checksums and sizes')
+    parser.add_argument('--headers-only', action='store_true',
+                        help='Only read tar headers and zip central directories (no checksums) '
+                             'for uncompressed archives')
+    parser.add_argument('--write-manifest', action='store_true',
+                        help=f'Write a blockwise Merkle checksum manifest (<file>{MANIFEST_SUFFIX}) '
+                             'during the streaming pass')
+    parser.add_argument('--block-size-mb', type=int, default=MANIFEST_BLOCK_SIZE // (1024 * 1024),
+                        help='Block size for new Merkle manifests in MB (default: 64)')
+    parser.add_argument('--manifest-only', action='store_true',
+                        help='Verify files that have a manifest against it alone, re-reading blocks in '
+                             'parallel instead of the streaming pass (no checksum or content checks)')
+    parser.add_argument('--sample-blocks', type=int, metavar='N',
+                        help='Spot-check N random manifest blocks instead of every block '
+                             '(implies --manifest-only)')
+    parser.add_argument('--pii-scan', action='store_true',
+                        help='Scan archive members and SQL dumps for emails, phone numbers, '
+                             'card numbers and national IDs')
+    parser.add_argument('--pii-budget-mb', type=int, default=PII_BUDGET // (1024 * 1024),
+                        help='Maximum data scanned for PII per backup in MB (default: 256)')
+    parser.add_argument('--pii-workers', type=int,
+                        help='Processes used for PII scanning in each validating process '
+                             '(default: number of CPUs divided by --workers)')
+    parser.add_argument('--cache', default=os.environ.get('SUMMITETHIC_BACKUP_CACHE', DEFAULT_CACHE_PATH),
+                        help=f'SQLite cache of validation results for unchanged files (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Validate every file without consulting or updating the cache')
+    parser.add_argument('--revalidate-older-than', type=float, metavar='DAYS',
+                        help='Fully re-verify cached files last validated more than DAYS ago')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of backup files to validate concurrently (default: 1)')
+    parser.add_argument('--max-large-reads', type=int, default=2,
+                        help='Maximum concurrent reads of large files when using --workers (default: 2)')
+    parser.add_argument('--large-file-mb', type=int, default=LARGE_FILE_SIZE // (1024 * 1024),
+                        help='Size in MB from which a file counts as a large read (default: 1024)')
+    parser.add_argument('--max-read-mbps', type=float,
+                        help='Cap the total read bandwidth from backup files in MB/s (shared by all workers)')
+    parser.add_argument('--keep-page-cache', action='store_true',
+                        help='Leave backup file pages in the page cache instead of dropping them after reading')
+    parser.add_argument('--nice-io', action='store_true',
+                        help='Run with the lowest best-effort I/O priority (needs ionice and a scheduler '
+                             'that honours I/O priorities, such as BFQ)')
     return parser.parse_args()
 
 
-def detect_backup_type(filepath):
-    """Detect the type of backup based on file extension and content"""
-    # Check file extension
-    ext = os.path.splitext(filepath)[1].lower()
+def parse_algorithms(value):
+    """Parse a comma-separated list of digest names, always including sha256"""
+    algorithms = ['sha256']
+    for name in (value or '').split(','):
+        name = name.strip().lower()
+        if not name or name in algorithms:
+            continue
+        if name not in HASH_ALGORITHMS:
+            raise ValueError(f"Unsupported hash algorithm: {name}")
+        algorithms.append(name)
+    return algorithms
+
+
+def throughput(nbytes, elapsed):
+    """Summarise a read as bytes, seconds and MB/s"""
+    return {
+        'bytes': nbytes,
+        'seconds': round(elapsed, 3),
+        'mb_per_s': round(nbytes / (1024 * 1024) / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+class TokenBucket:
+    """Token bucket limiting the bytes read per second across threads and processes.
+    
+    The bucket lives in shared memory, so worker processes started with it
+    draw from the same budget. Reads are charged after they happen; a read
+    that overdraws the bucket sleeps until the debt is repaid, so large
+    chunks need no splitting.
+    """
+    
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = max(rate, READ_CHUNK_SIZE)
+        # Tokens and the time they were last topped up
+        self.state = multiprocessing.Array('d', [self.capacity, time.monotonic()])
+    
+    def consume(self, n):
+        with self.state.get_lock():
+            now = time.monotonic()
+            tokens = min(self.capacity, self.state[0] + (now - self.state[1]) * self.rate) - n
+            self.state[0], self.state[1] = tokens, now
+        if tokens < 0:
+            time.sleep(-tokens / self.rate)
+
+
+# Read policy of this process, see configure_io()
+_read_limiter = None
+_drop_page_cache = True
+
+
+def configure_io(max_read_mbps=None, drop_page_cache=True):
+    """Set the read bandwidth cap (MB/s) and page cache handling of this process"""
+    global _read_limiter, _drop_page_cache
+    _read_limiter = TokenBucket(max_read_mbps * 1024 * 1024) if max_read_mbps else None
+    _drop_page_cache = drop_page_cache
+
+
+def fadvise(fd, offset, length, advice):
+    """Give the kernel a page cache hint, where the platform supports it"""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, offset, length, advice)
+        except OSError:
+            pass
+
+
+def lower_io_priority():
+    """Move this process (and the workers it starts) to the lowest best-effort I/O priority"""
+    ionice = shutil.which('ionice')
+    if ionice is None:
+        logger.warning("ionice not found, --nice-io has no effect")
+        return False
+    
+    result = subprocess.run([ionice, '-c', '2', '-n', '7', '-p', str(os.getpid())],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.warning(f"Could not lower the I/O priority: {result.stderr.strip()}")
+        return False
+    return True
+
+
+class BackupFile(io.FileIO):
+    """Read-only backup file that follows the process read policy.
+    
+    Reads are charged to the bandwidth cap, the kernel is told how the file
+    will be read, and pages already read are dropped from the page cache
+    as the file is consumed and when it is closed.
+    """
+    
+    def __init__(self, filepath, sequential=True):
+        super().__init__(filepath, 'rb')
+        self._dropped = 0
+        if hasattr(os, 'posix_fadvise'):
+            fadvise(self.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL if sequential else os.POSIX_FADV_RANDOM)
+    
+    def read(self, size=-1):
+        data = super().read(size)
+        if data:
+            self._account(len(data))
+        return data
+    
+    def readinto(self, b):
+        n = super().readinto(b)
+        if n:
+            self._account(n)
+        return n
+    
+    def _account(self, n):
+        if _read_limiter is not None:
+            _read_limiter.consume(n)
+        if _drop_page_cache and hasattr(os, 'posix_fadvise'):
+            position = self.tell()
+            if position - self._dropped >= PAGE_CACHE_DROP_SIZE:
+                fadvise(self.fileno(), self._dropped, position - self._dropped, os.POSIX_FADV_DONTNEED)
+                self._dropped = position
+    
+    def close(self):
+        if not self.closed and _drop_page_cache and hasattr(os, 'posix_fadvise'):
+            fadvise(self.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        super().close()
+
+
+def open_backup(filepath, sequential=True, buffering=True):
+    """Open a backup file for reading under the process read policy"""
+    raw = BackupFile(filepath, sequential)
+    return io.BufferedReader(raw) if buffering else raw
+
+
+class HashingReader(io.RawIOBase):
+    """File-like wrapper that feeds every byte read through it into hashers"""
+    
+    def __init__(self, fileobj, hashers):
+        super().__init__()
+        self.fileobj = fileobj
+        self.hashers = list(hashers)
+        self.bytes_read = 0
+        self._buffer = None
+    
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        for h in self.hashers:
+            h.update(data)
+        self.bytes_read += len(data)
+        return data
+    
+    def readinto(self, b):
+        n = self.fileobj.readinto(b)
+        if n:
+            chunk = memoryview(b)[:n]
+            for h in self.hashers:
+                h.update(chunk)
+            self.bytes_read += n
+        return n
+    
+    def readable(self):
+        return True
+    
+    def drain(self):
+        """Read (and hash) whatever the parser did not consume.
+        
+        Reads land in one preallocated buffer that every hasher consumes
+        through a memoryview, so no per-chunk bytes objects are created.
+        """
+        if self._buffer is None:
+            self._buffer = memoryview(bytearray(READ_CHUNK_SIZE))
+        buf = self._buffer
+        
+        while True:
+            n = self.fileobj.readinto(buf)
+            if not n:
+                break
+            chunk = buf[:n]
+            for h in self.hashers:
+                h.update(chunk)
+            self.bytes_read += n
+
+
+class ValidationCache:
+    """SQLite cache of validation results keyed by path, inode, size and mtime.
+    
+    Backups are immutable once written, so a file whose identity and
+    metadata are unchanged does not need to be read again. Results are only
+    reused when they were produced with the same validation options.
+    """
+    
+    def __init__(self, path):
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, mode=0o750, exist_ok=True)
+        
+        # Parallel workers each hold a connection to the same database
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(CACHE_SCHEMA)
+    
+    def get(self, filepath, st, options, max_age_days=None):
+        """Return the cached result for an unchanged file, or None"""
+        row = self.conn.execute(
+            'SELECT inode, size, mtime_ns, options, validated_at, result FROM validations WHERE path = ?',
+            (filepath,)
+        ).fetchone()
+        
+        if row is None or tuple(row[:4]) != (st.st_ino, st.st_size, st.st_mtime_ns, options):
+            return None
+        
+        if max_age_days is not None and time.time() - row[4] > max_age_days * 86400:
+            return None
+        
+        return json.loads(row[5])
+    
+    def put(self, filepath, st, options, results):
+        """Store the result of a full validation"""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO validations (path, inode, size, mtime_ns, options, validated_at, '
+            'status, checksum, member_count, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (filepath, st.st_ino, st.st_size, st.st_mtime_ns, options, time.time(),
+             results['status'], results.get('checksum'),
+             results.get('content_checks', {}).get('file_count'),
+             json.dumps(results, default=str))
+        )
+        self.conn.commit()
+
+
+# Open caches, one per database path in each process
+_caches = {}
+
+
+def open_cache(path):
+    """Return this process's cache for a path, or None if it cannot be opened"""
+    if path not in _caches:
+        try:
+            _caches[path] = ValidationCache(path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Validation cache unavailable ({path}): {str(e)}")
+            _caches[path] = None
+    return _caches[path]
+
+
+class BlockHasher:
+    """Hasher-like object computing one digest per fixed-size block of a stream.
+    
+    It is fed alongside the whole-file hashers, so a Merkle manifest costs
+    no extra read.
+    """
+    
+    def __init__(self, block_size, algorithm='sha256'):
+        self.block_size = block_size
+        self.algorithm = algorithm
+        self.blocks = []
+        self.current = hashlib.new(algorithm)
+        self.filled = 0
+    
+    def update(self, data):
+        view = memoryview(data)
+        while len(view):
+            n = min(len(view), self.block_size - self.filled)
+            self.current.update(view[:n])
+            self.filled += n
+            view = view[n:]
+            if self.filled == self.block_size:
+                self.blocks.append(self.current.hexdigest())
+                self.current = hashlib.new(self.algorithm)
+                self.filled = 0
+    
+    def digests(self):
+        """Return the block digests, including a final partial block"""
+        if self.filled:
+            return self.blocks + [self.current.hexdigest()]
+        return list(self.blocks)
+
+
+def merkle_root(digests, algorithm='sha256'):
+    """Compute the Merkle root of hex block digests (an odd node is carried up)"""
+    level = [bytes.fromhex(d) for d in digests]
+    if not level:
+        return hashlib.new(algorithm, b'').hexdigest()
+    
+    while len(level) > 1:
+        paired = [hashlib.new(algorithm, level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+def write_json_atomic(path, data):
+    """Write JSON through a temporary file so readers never see a partial file"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def build_manifest(filepath, block_hasher):
+    """Build a Merkle manifest from the block digests of a streaming pass"""
+    blocks = block_hasher.digests()
+    return {
+        'version': MANIFEST_VERSION,
+        'file': os.path.basename(filepath),
+        'size': os.path.getsize(filepath),
+        'algorithm': block_hasher.algorithm,
+        'block_size': block_hasher.block_size,
+        'blocks': blocks,
+        'root': merkle_root(blocks, block_hasher.algorithm)
+    }
+
+
+def load_manifest(filepath):
+    """Load the Merkle manifest of a backup, or None if it has none"""
+    manifest_path = filepath + MANIFEST_SUFFIX
+    if not os.path.exists(manifest_path):
+        return None
+    
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('algorithm') not in HASH_ALGORITHMS:
+            raise ValueError('unsupported manifest version or algorithm')
+        int(manifest['block_size']), int(manifest['size']), list(manifest['blocks'])
+        return manifest
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable manifest {manifest_path}: {str(e)}")
+        return None
+
+
+def hash_block(fd, index, block_size, algorithm):
+    """Hash one manifest block with positional reads (safe across threads)"""
+    h = hashlib.new(algorithm)
+    offset = index * block_size
+    end = offset + block_size
+    while offset < end:
+        data = os.pread(fd, min(READ_CHUNK_SIZE, end - offset), offset)
+        if not data:
+            break
+        if _read_limiter is not None:
+            _read_limiter.consume(len(data))
+        h.update(data)
+        offset += len(data)
+    if _drop_page_cache and hasattr(os, 'posix_fadvise'):
+        fadvise(fd, index * block_size, block_size, os.POSIX_FADV_DONTNEED)
+    return h.hexdigest()
+
+
+def verify_manifest(filepath, manifest, blocks=None, workers=RESTORE_TEST_THREADS, sample=None):
+    """Verify a backup against its Merkle manifest.
+    
+    Block digests from the streaming pass are compared directly. Otherwise
+    blocks are re-read with positional reads in parallel threads; a full
+    verification records its progress so an interrupted run resumes where
+    it stopped, and sample checks only that many random blocks.
+    """
+    expected = manifest['blocks']
+    result = {
+        'verified': False,
+        'method': 'merkle',
+        'root': manifest['root'],
+        'blocks_total': len(expected),
+        'blocks_checked': 0,
+        'mismatched_blocks': []
+    }
+    
+    if merkle_root(expected, manifest['algorithm']) != manifest['root']:
+        result['reason'] = 'Manifest root does not match its block digests'
+        return result
+    
+    if os.path.getsize(filepath) != manifest['size']:
+        result['reason'] = 'Size mismatch'
+        return result
+    
+    if blocks is not None:
+        result['blocks_checked'] = len(blocks)
+        result['mismatched_blocks'] = [i for i, (a, b) in enumerate(zip(expected, blocks)) if a != b]
+        if len(blocks) != len(expected):
+            result['reason'] = 'Block count mismatch'
+            return result
+    else:
+        progress_path = filepath + MANIFEST_PROGRESS_SUFFIX
+        done = set()
+        if sample:
+            pending = sorted(random.sample(range(len(expected)), min(sample, len(expected))))
+            result['sampled'] = True
+        else:
+            try:
+                with open(progress_path, 'r') as f:
+                    progress = json.load(f)
+                if progress.get('root') == manifest['root']:
+                    done = set(progress['verified'])
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            pending = [i for i in range(len(expected)) if i not in done]
+            result['resumed_blocks'] = len(done)
+        
+        fd = os.open(filepath, os.O_RDONLY)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for start in range(0, len(pending), workers * 4):
+                    batch = pending[start:start + workers * 4]
+                    digests = pool.map(lambda i: hash_block(fd, i, manifest['block_size'], manifest['algorithm']),
+                                       batch)
+                    for i, digest in zip(batch, digests):
+                        if digest == expected[i]:
+                            done.add(i)
+                        else:
+                            result['mismatched_blocks'].append(i)
+                    if not sample:
+                        write_json_atomic(progress_path, {'root': manifest['root'], 'verified': sorted(done)})
+        finally:
+            os.close(fd)
+        
+        result['blocks_checked'] = len(pending)
+        if not sample and os.path.exists(progress_path) and not result['mismatched_blocks']:
+            os.remove(progress_path)
+    
+    if result['mismatched_blocks']:
+        result['reason'] = 'Checksum mismatch'
+        result['mismatched_blocks'] = result['mismatched_blocks'][:20]
+    else:
+        result['verified'] = True
+    return result
+
+
+def calculate_checksums(filepath, algorithms=('sha256',)):
+    """Compute several digests of a file in a single read.
+    
+    Hashing goes through HashingReader, as in the streaming pass of
+    stream_backup(); this standalone read only backs calculate_checksum()
+    for files that pass did not hash. Returns the hex digests keyed by
+    algorithm along with the read throughput, which shows whether hashing
+    is disk-bound or CPU-bound.
+    """
+    start = time.perf_counter()
+    
+    with open_backup(filepath, buffering=False) as f:
+        hashers = {name: hashlib.new(name) for name in algorithms}
+        reader = HashingReader(f, hashers.values())
+        reader.drain()
+    
+    digests = {name: h.hexdigest() for name, h in hashers.items()}
+    return digests, throughput(reader.bytes_read, time.perf_counter() - start)
+
+
+def normalise_member_path(name):
+    """Normalise an archive member name to a relative path without ./ or slashes"""
+    path = os.path.normpath(name.replace('\\', '/').lstrip('/'))
+    return '' if path in ('.', '..') else path
+
+
+class MemberIndex:
+    """Compact index of archive members built while streaming the archive.
+    
+    Holds the set of normalised file paths, the set of directories (listed
+    or implied by a file's parents) and per-extension counters, so content
+    checks are set lookups instead of scans over the member list.
+    """
+    
+    def __init__(self):
+        self.paths = set()
+        self.dirs = set()
+        self.extensions = {}
+        self.count = 0
+    
+    def add(self, name, is_dir=False):
+        path = normalise_member_path(name)
+        if not path:
+            return
+        
+        self.count += 1
+        if is_dir:
+            self.dirs.add(path)
+        else:
+            self.paths.add(path)
+            ext = os.path.splitext(path)[1].lower()
+            self.extensions[ext] = self.extensions.get(ext, 0) + 1
+        
+        parent = os.path.dirname(path)
+        while parent and parent not in self.dirs:
+            self.dirs.add(parent)
+            parent = os.path.dirname(parent)
+    
+    def __contains__(self, path):
+        return normalise_member_path(path) in self.paths
+    
+    def __len__(self):
+        return self.count
+    
+    def has_dir(self, path):
+        return normalise_member_path(path) in self.dirs
+
+
+def _sql_name(raw):
+    """Decode a table name from a SQL statement, dropping identifier quotes"""
+    return raw.decode('utf-8', errors='replace').replace('`', '').replace('"', '')
+
+
+def luhn_valid(number):
+    """Check the Luhn checksum of a card number (separators are ignored)"""
+    digits = [c - 48 for c in number if 48 <= c <= 57]
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def scan_pii(segments):
+    """Count PII matches by kind in a batch of (key, data) segments (runs in a worker process)"""
+    results = []
+    for key, data in segments:
+        counts = {}
+        for m in PII_RE.finditer(data):
+            kind = m.lastgroup
+            if kind == 'card' and not luhn_valid(m.group()):
+                continue
+            counts[kind] = counts.get(kind, 0) + 1
+        if counts:
+            results.append((key, counts))
+    return results
+
+
+# Scanning processes, one pool per process reused for every backup
+_pii_pools = {}
+
+
+def open_pii_pool(workers):
+    """Return this process's PII scanning pool with the given number of workers"""
+    if workers not in _pii_pools:
+        _pii_pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _pii_pools[workers]
+
+
+class PiiScanner:
+    """Shards PII scanning of a backup over a process pool within a byte budget.
+    
+    Data is fed per key (an archive member or a SQL table) into a single
+    batch; small members share a batch and a full batch is cut at a line
+    end. Only one batch and a bounded number of tasks in flight are held
+    at once, and at most PII_MAX_KEYS keys are reported individually, so
+    memory stays flat however large the backup is.
+    """
+    
+    def __init__(self, pool, workers, budget=PII_BUDGET):
+        self.pool = pool
+        self.max_pending = workers * 2
+        self.budget = budget
+        self.scanned = 0
+        self.segments = []
+        self.batch_size = 0
+        self.pending = deque()
+        self.counts = {}
+        self.other_keys = 0
+    
+    @property
+    def exhausted(self):
+        return self.scanned >= self.budget
+    
+    def feed(self, key, data):
+        """Queue data for scanning; returns False once the budget is spent"""
+        if self.exhausted:
+            return False
+        data = data[:self.budget - self.scanned]
+        self.scanned += len(data)
+        
+        if self.segments and self.segments[-1][0] == key:
+            self.segments[-1][1].extend(data)
+        else:
+            self.segments.append((key, bytearray(data)))
+        self.batch_size += len(data)
+        
+        if self.batch_size >= PII_CHUNK_SIZE:
+            # Keep the last partial line with its key for the next batch
+            key, buf = self.segments[-1]
+            cut = buf.rfind(b'\n') + 1 or len(buf)
+            rest = buf[cut:]
+            del buf[cut:]
+            self._submit()
+            if rest:
+                self.segments.append((key, rest))
+                self.batch_size = len(rest)
+        return True
+    
+    def _submit(self):
+        segments = [(key, bytes(buf)) for key, buf in self.segments if buf]
+        self.segments = []
+        self.batch_size = 0
+        if not segments:
+            return
+        self.pending.append(self.pool.submit(scan_pii, segments))
+        while len(self.pending) > self.max_pending:
+            self._collect(self.pending.popleft())
+    
+    def _collect(self, future):
+        for key, counts in future.result():
+            if key not in self.counts and len(self.counts) >= PII_MAX_KEYS:
+                # Findings beyond the reported keys are aggregated
+                self.other_keys += 1
+                key = '(other)'
+            totals = self.counts.setdefault(key, {})
+            for kind, n in counts.items():
+                totals[kind] = totals.get(kind, 0) + n
+    
+    def summary(self):
+        """Scan what is left and return counts per key and in total"""
+        self._submit()
+        while self.pending:
+            self._collect(self.pending.popleft())
+        
+        totals = {}
+        for counts in self.counts.values():
+            for kind, n in counts.items():
+                totals[kind] = totals.get(kind, 0) + n
+        return {
+            'bytes_scanned': self.scanned,
+            'budget_bytes': self.budget,
+            'budget_exhausted': self.exhausted,
+            'totals': totals,
+            'by_key': self.counts,
+            'keys_not_listed': self.other_keys
+        }
+
+
+def analyse_sql_stream(stream, pii=None):
+    """Analyse a whole SQL dump from a binary stream with bounded memory.
+    
+    Lines are read in pieces of at most SQL_LINE_LIMIT bytes. Tables are
+    counted from CREATE TABLE statements, rows per table from INSERT
+    statements (including extended multi-row INSERTs) and COPY ... FROM
+    stdin blocks. A dump is only considered complete when its
+    mysqldump/pg_dump trailer is present. With a PiiScanner, each line is
+    also queued for PII scanning under the table it belongs to.
+    """
+    analysis = {
+        'sql_syntax_found': False,
+        'db_type': 'unknown',
+        'trailer_found': False,
+        'table_count': 0,
+        'row_count': 0,
+        'tables': {}
+    }
+    tables = analysis['tables']
+    markers = set()
+    copy_table = None
+    insert_table = None
+    at_line_start = True
+    nbytes = 0
+    start = time.perf_counter()
+    
+    while True:
+        line = stream.readline(SQL_LINE_LIMIT)
+        if not line:
+            break
+        nbytes += len(line)
+        
+        if at_line_start and copy_table is not None:
+            # Every line of a COPY block is a row until the \. terminator
+            if line.startswith(b'\\.'):
+                copy_table = None
+            else:
+                tables[copy_table] += 1
+        elif at_line_start and insert_table is None:
+            m = SQL_INSERT_RE.match(line)
+            if m:
+                insert_table = _sql_name(m.group(1))
+                tables[insert_table] = tables.get(insert_table, 0) + 1
+                analysis['sql_syntax_found'] = True
+            elif line.startswith(b'COPY '):
+                m = SQL_COPY_RE.match(line)
+                if m:
+                    copy_table = _sql_name(m.group(1))
+                    tables.setdefault(copy_table, 0)
+            elif line.startswith(b'CREATE TABLE'):
+                m = SQL_CREATE_TABLE_RE.match(line)
+                if m:
+                    tables.setdefault(_sql_name(m.group(1)), 0)
+                    analysis['table_count'] += 1
+                    analysis['sql_syntax_found'] = True
+            elif line.startswith(SQL_DUMP_TRAILERS):
+                analysis['trailer_found'] = True
+            else:
+                for marker in (b'CREATE EXTENSION IF NOT EXISTS', b'pg_catalog', b'PostgreSQL database dump',
+                               b'CREATE DATABASE', b'ENGINE=', b'MySQL dump'):
+                    if marker in line:
+                        markers.add(marker)
+        
+        if pii is not None and not pii.exhausted:
+            pii.feed(copy_table or insert_table or '(schema)', line)
+        
+        if insert_table is not None:
+            # Additional rows of an extended INSERT, on one line or several
+            tables[insert_table] += line.count(b'),(') + (1 if line.rstrip().endswith(b'),') else 0)
+            if b'ENGINE=' in line:
+                markers.add(b'ENGINE=')
+            if line.rstrip().endswith(b';'):
+                insert_table = None
+        
+        at_line_start = line.endswith(b'\n')
+    
+    # Try to determine database type
+    if markers & {b'CREATE EXTENSION IF NOT EXISTS', b'pg_catalog', b'PostgreSQL database dump'}:
+        analysis['db_type'] = 'postgresql'
+    elif b'MySQL dump' in markers or {b'CREATE DATABASE', b'ENGINE='} <= markers:
+        analysis['db_type'] = 'mysql'
+    
+    analysis['row_count'] = sum(tables.values())
+    analysis['throughput'] = throughput(nbytes, time.perf_counter() - start)
+    return analysis
+
+
+def _sniff_container(head):
+    """Identify an (uncompressed) backup container from its first bytes"""
+    if head.startswith((b'PK\x03\x04', b'PK\x05\x06')):
+        return 'zip'
+    if head.startswith(b'PGDMP'):
+        return 'pg_dump'
+    if head[257:262] == b'ustar':
+        return 'tar'
+    if SQL_HEAD_RE.match(head):
+        return 'sql'
+    return None
+
+
+def _decompress_head(data, compression):
+    """Decompress the start of a compressed stream, or return b'' if impossible"""
+    try:
+        if compression == 'gzip':
+            return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(data, SNIFF_HEAD_SIZE)
+        if compression == 'xz':
+            return lzma.LZMADecompressor().decompress(data, SNIFF_HEAD_SIZE)
+        if compression == 'zstd' and zstandard is not None:
+            return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read(SNIFF_HEAD_SIZE)
+    except DECOMPRESSION_ERRORS:
+        pass
+    # bzip2 only yields output once a whole (100-900 KB) block is read
+    return b''
+
+
+def sniff_backup_format(filepath):
+    """Detect a backup's compression and container from magic bytes.
+    
+    Only the first SNIFF_READ_SIZE bytes are read. Compressed files have
+    their head decompressed to look for the tar, zip, pg_dump or SQL
+    signature inside. Compound suffixes (.tar.gz, .sql.xz, ...) are the
+    fallback when the content is inconclusive, e.g. for empty files or
+    bzip2 streams.
+    """
+    name = filepath.lower()
+    compression, container = None, None
+    for suffix, suffix_compression, suffix_container in BACKUP_SUFFIXES:
+        if name.endswith(suffix):
+            compression, container = suffix_compression, suffix_container
+            break
+    
+    with open_backup(filepath) as f:
+        head = f.read(SNIFF_READ_SIZE)
+    
+    magic = next((fmt for signature, fmt in COMPRESSION_MAGIC if head.startswith(signature)), None)
+    if magic:
+        compression = magic
+        head = _decompress_head(head, magic)
+    elif head:
+        compression = None
+    
+    container = _sniff_container(head) or container
+    return {'compression': compression, 'container': container}
+
+
+class PipeDecompressor:
+    """Decompress a reader through an external tool.
+    
+    A feeder thread copies the (hashing) reader into the tool's stdin while
+    the caller consumes its stdout, so reading, hashing, decompression and
+    parsing overlap. The pipes keep memory bounded.
+    """
+    
+    def __init__(self, reader, command):
+        self.command = command
+        self.eof = False
+        self.proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE, bufsize=READ_CHUNK_SIZE)
+        self.feeder = threading.Thread(target=self._feed, args=(reader,), daemon=True)
+        self.feeder.start()
+    
+    def _feed(self, reader):
+        try:
+            while True:
+                chunk = reader.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.proc.stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            pass
+        finally:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass
+    
+    def read(self, size=-1):
+        data = self.proc.stdout.read(size)
+        if not data and size != 0:
+            self.eof = True
+        return data
+    
+    def readline(self, limit=-1):
+        line = self.proc.stdout.readline(limit)
+        if not line:
+            self.eof = True
+        return line
+    
+    def close(self):
+        """Stop the tool and raise if it failed after the stream was consumed"""
+        if self.proc.stdout.closed:
+            return
+        if not self.eof:
+            self.proc.kill()
+        self.proc.stdout.close()
+        self.feeder.join()
+        returncode = self.proc.wait()
+        stderr = self.proc.stderr.read().decode('utf-8', errors='replace').strip()
+        self.proc.stderr.close()
+        if self.eof and returncode != 0:
+            raise OSError(stderr or f"{self.command[0]} exited with status {returncode}")
+
+
+def open_decompressed(reader, compression):
+    """Wrap a reader in a streaming decompressor, or None if unsupported.
+    
+    xz, bzip2 and zstd go through an external (multi-threaded) tool when one
+    is installed and fall back to lzma, bz2 or the optional zstandard
+    module otherwise.
+    """
+    if compression is None:
+        return io.BufferedReader(reader, READ_CHUNK_SIZE)
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=reader, mode='rb')
+    
+    for command in EXTERNAL_DECOMPRESSORS.get(compression, []):
+        if shutil.which(command[0]):
+            return PipeDecompressor(reader, command)
+    
+    if compression == 'xz':
+        return lzma.LZMAFile(reader, mode='rb')
+    if compression == 'bzip2':
+        return bz2.BZ2File(reader, mode='rb')
+    if compression == 'zstd' and zstandard is not None:
+        dctx = zstandard.ZstdDecompressor()
+        return io.BufferedReader(dctx.stream_reader(reader, read_size=READ_CHUNK_SIZE, read_across_frames=True),
+                                 READ_CHUNK_SIZE)
+    return None
+
+
+class RecordingReader:
+    """Pass-through reader remembering the last two chunks read with their offsets.
+    
+    tarfile silently stops at an invalid header in stream mode; keeping the
+    most recent data lets the restore test look at the block it stopped on.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.offset = 0
+        self.chunks = [(0, b''), (0, b'')]
+    
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.chunks = [self.chunks[1], (self.offset, data)]
+        self.offset += len(data)
+        return data
+    
+    def close(self):
+        self.stream.close()
+    
+    def block(self, offset, size=tarfile.BLOCKSIZE):
+        """Return up to size bytes at an offset, if still held"""
+        (first, older), (second, newer) = self.chunks
+        if offset >= second:
+            data = newer[offset - second:]
+        elif offset >= first and first + len(older) == second:
+            data = (older + newer)[offset - first:]
+        else:
+            return None
+        return data[:size]
+
+
+def new_restore_test():
+    """Return an empty restore test result"""
+    return {
+        'status': 'passed',
+        'members_tested': 0,
+        'bytes_restored': 0,
+        'corrupt_members': 0,
+        'first_corrupt_member': None
+    }
+
+
+def record_corrupt_member(restore, name, offset, error):
+    """Record a corrupt member, keeping the one at the lowest offset as the first"""
+    restore['status'] = 'failed'
+    restore['corrupt_members'] += 1
+    first = restore['first_corrupt_member']
+    if first is None or offset < first['offset']:
+        restore['first_corrupt_member'] = {'name': name, 'offset': offset, 'error': error}
+
+
+def restore_to_null(f, name=None, pii=None, full=True):
+    """Read a member without keeping it, returning the bytes read.
+    
+    The start of the member is queued for PII scanning when a scanner is
+    given. Without full, reading stops once that sample is taken.
+    """
+    total = 0
+    while True:
+        if pii is not None and total < PII_MEMBER_SAMPLE and not pii.exhausted:
+            chunk = f.read(min(READ_CHUNK_SIZE, PII_MEMBER_SAMPLE - total))
+            pii.feed(name, chunk)
+        elif full:
+            chunk = f.read(READ_CHUNK_SIZE)
+        else:
+            return total
+        if not chunk:
+            return total
+        total += len(chunk)
+
+
+def check_tar_end(recorder, offset, last_member, restore):
+    """Check that a streamed tar archive stopped at its end-of-archive marker.
+    
+    Offsets are positions in the (decompressed) tar stream.
+    """
+    block = recorder.block(offset)
+    if block is None:
+        return
+    
+    # The member at this offset could not be read, so name it by position
+    name = f'header after {last_member}' if last_member else 'first header'
+    if len(block) < tarfile.BLOCKSIZE:
+        record_corrupt_member(restore, name, offset, 'Archive ends without an end-of-archive marker')
+    elif block.count(0) != len(block):
+        try:
+            tarfile.TarInfo.frombuf(block, tarfile.ENCODING, 'surrogateescape')
+            error = 'Unreadable tar header'
+        except tarfile.HeaderError as e:
+            error = f'Invalid tar header: {str(e)}'
+        record_corrupt_member(restore, name, offset, error)
+
+
+def restore_test_zip(filepath, workers=RESTORE_TEST_THREADS):
+    """Decompress every zip member to a null sink, verifying CRC-32 and sizes.
+    
+    Members are independent, so several threads test them at once, each
+    with its own file handle. Offsets are local header positions.
+    """
+    restore = new_restore_test()
+    local = threading.local()
+    handles = []
+    
+    def test_member(info):
+        z = getattr(local, 'zip', None)
+        if z is None:
+            f = open_backup(filepath)
+            z = local.zip = zipfile.ZipFile(f, 'r')
+            handles.append((z, f))
+        try:
+            with z.open(info) as f:
+                restored = restore_to_null(f)
+        except (zipfile.BadZipFile, OSError, EOFError, RuntimeError, NotImplementedError) + DECOMPRESSION_ERRORS as e:
+            return info, 0, str(e)
+        if restored != info.file_size:
+            return info, restored, f'Size mismatch: {restored} bytes restored, {info.file_size} declared'
+        return info, restored, None
+    
+    with open_backup(filepath) as f, zipfile.ZipFile(f, 'r') as z:
+        members = iter([info for info in z.infolist() if not info.is_dir()])
+    
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                batch = list(islice(members, RESTORE_TEST_BATCH))
+                if not batch:
+                    break
+                for info, restored, error in pool.map(test_member, batch):
+                    restore['members_tested'] += 1
+                    restore['bytes_restored'] += restored
+                    if error:
+                        record_corrupt_member(restore, info.filename, info.header_offset, error)
+    finally:
+        for z, f in handles:
+            z.close()
+            f.close()
+    
+    return restore
+
+
+def stream_backup(filepath, algorithms=('sha256',), restore_test=False, fmt=None, block_size=None, pii=None):
+    """Read a backup from disk once, hashing it while its content is parsed.
+    
+    Tar archives are parsed in streaming mode from the same reads that feed
+    the hasher, and SQL dumps are analysed in full from them. Zip archives need their
+    central directory, which is read separately after the hashing pass.
+    
+    With restore_test, every tar member is read to its end and the archive
+    must stop at a valid end-of-archive marker; zip members are tested
+    separately with restore_test_zip(). With block_size, per-block digests
+    for a Merkle manifest are computed from the same reads. With a
+    PiiScanner, the start of each member or the SQL dump is scanned too.
+    """
+    if fmt is None:
+        fmt = sniff_backup_format(filepath)
+    scan = {'checksum': None, 'checksums': {}, 'format': fmt, 'members': None, 'sql': None, 'error': None,
+            'restore_test': None, 'unchecked': None}
+    hashers = {name: hashlib.new(name) for name in algorithms}
+    block_hasher = BlockHasher(block_size) if block_size else None
+    start = time.perf_counter()
+    
+    with open_backup(filepath) as raw:
+        reader = HashingReader(raw, list(hashers.values()) + ([block_hasher] if block_hasher else []))
+        stream = None
+        try:
+            if fmt['container'] in ['tar', 'sql']:
+                stream = open_decompressed(reader, fmt['compression'])
+                if stream is None:
+                    logger.warning(f"No {fmt['compression']} decompressor available, only hashing {filepath}")
+                    scan['unchecked'] = f"{fmt['compression']} decompressor unavailable, content was not checked"
+            
+            if stream is not None and fmt['container'] == 'tar':
+                index = MemberIndex()
+                restore = None
+                if restore_test:
+                    restore = scan['restore_test'] = new_restore_test()
+                    stream = RecordingReader(stream)
+                last_member = None
+                with tarfile.open(fileobj=stream, mode='r|', bufsize=READ_CHUNK_SIZE) as t:
+                    for member in t:
+                        index.add(member.name, member.isdir())
+                        last_member = member.name
+                        if pii is not None and restore is None and member.isreg() and not pii.exhausted:
+                            restore_to_null(t.extractfile(member), member.name, pii, full=False)
+                        if restore is not None and member.isreg():
+                            restore['members_tested'] += 1
+                            try:
+                                restored = restore_to_null(t.extractfile(member), member.name, pii)
+                            except (tarfile.TarError, OSError, EOFError) + DECOMPRESSION_ERRORS as e:
+                                record_corrupt_member(restore, member.name, member.offset, str(e))
+                                raise
+                            restore['bytes_restored'] += restored
+                            if restored != member.size:
+                                record_corrupt_member(restore, member.name, member.offset,
+                                                      f'Size mismatch: {restored} bytes restored, '
+                                                      f'{member.size} declared')
+                    if restore is not None:
+                        check_tar_end(stream, t.offset, last_member, restore)
+                scan['members'] = index
+                # Consume the rest of the stream so truncation is detected
+                while stream.read(READ_CHUNK_SIZE):
+                    pass
+            elif stream is not None:
+                scan['sql'] = analyse_sql_stream(stream, pii)
+        except (tarfile.TarError, OSError, EOFError) + DECOMPRESSION_ERRORS as e:
+            scan['error'] = str(e)
+        finally:
+            # Closing also reports failures of external decompressors
+            if stream is not None:
+                try:
+                    stream.close()
+                except OSError as e:
+                    scan['error'] = scan['error'] or str(e)
+        reader.drain()
+    
+    scan['checksums'] = {name: h.hexdigest() for name, h in hashers.items()}
+    scan['checksum'] = scan['checksums'].get('sha256')
+    scan['block_hasher'] = block_hasher
+    scan['throughput'] = throughput(reader.bytes_read, time.perf_counter() - start)
+    logger.debug(f"Read {filepath} at {scan['throughput']['mb_per_s']} MB/s")
+    
+    if fmt['container'] == 'zip' and fmt['compression'] is None:
+        try:
+            index = MemberIndex()
+            with open_backup(filepath) as f, zipfile.ZipFile(f, 'r') as z:
+                for info in z.infolist():
+                    index.add(info.filename, info.is_dir())
+                    if pii is not None and not info.is_dir() and not pii.exhausted:
+                        with z.open(info) as f:
+                            restore_to_null(f, info.filename, pii, full=False)
+            scan['members'] = index
+            if restore_test:
+                scan['restore_test'] = restore_test_zip(filepath)
+        except (zipfile.BadZipFile, OSError) as e:
+            scan['error'] = str(e)
+    
+    return scan
+
+
+def scan_headers(filepath, fmt):
+    """Metadata-only scan of an uncompressed tar or zip archive.
+    
+    Tar archives are opened seekable, so only the 512-byte headers are read
+    and member data is skipped with seeks; the archive must end with an
+    end-of-archive marker and no member may extend past the end of the
+    file. Zip archives are read from their end-of-central-directory record
+    and central directory only; members must not overlap each other or the
+    central directory. Nothing is hashed, so the scan has no checksum.
+    """
+    scan = {'checksum': None, 'checksums': {}, 'format': fmt, 'members': None, 'sql': None, 'error': None,
+            'restore_test': None, 'throughput': None}
+    index = MemberIndex()
+    headers = {'member_count': 0, 'total_size': 0}
+    file_size = os.path.getsize(filepath)
+    start = time.perf_counter()
+    
+    try:
+        if fmt['container'] == 'tar':
+            with open_backup(filepath) as f, tarfile.open(fileobj=f, mode='r:') as t:
+                for member in t:
+                    index.add(member.name, member.isdir())
+                    headers['total_size'] += member.size
+                    if member.offset_data + member.size > file_size:
+                        raise tarfile.ReadError(f'{member.name} extends past the end of the file')
+                end = t.offset
+            
+            # tarfile stops silently at an invalid header, so check where it stopped
+            with open_backup(filepath) as f:
+                f.seek(end)
+                block = f.read(tarfile.BLOCKSIZE)
+            if len(block) < tarfile.BLOCKSIZE:
+                raise tarfile.ReadError('Archive ends without an end-of-archive marker')
+            if block.count(0) != len(block):
+                tarfile.TarInfo.frombuf(block, tarfile.ENCODING, 'surrogateescape')
+                raise tarfile.ReadError(f'Unreadable tar header at offset {end}')
+        else:
+            with open_backup(filepath) as f, zipfile.ZipFile(f, 'r') as z:
+                infos = sorted(z.infolist(), key=lambda info: info.header_offset)
+                central_directory = z.start_dir
+            
+            headers['compressed_size'] = 0
+            previous_end = 0
+            for info in infos:
+                if info.header_offset < previous_end:
+                    raise zipfile.BadZipFile(f'{info.filename} overlaps the previous member')
+                previous_end = info.header_offset + ZIP_LOCAL_HEADER_SIZE + info.compress_size
+                if previous_end > central_directory:
+                    raise zipfile.BadZipFile(f'{info.filename} extends into the central directory')
+                index.add(info.filename, info.is_dir())
+                headers['total_size'] += info.file_size
+                headers['compressed_size'] += info.compress_size
+    except tarfile.HeaderError as e:
+        scan['error'] = f'Invalid tar header at offset {end}: {str(e)}'
+    except (tarfile.TarError, zipfile.BadZipFile, OSError) as e:
+        scan['error'] = str(e)
+    
+    headers['member_count'] = len(index)
+    headers['seconds'] = round(time.perf_counter() - start, 3)
+    scan['members'] = index
+    scan['headers'] = headers
+    return scan
+
+
+def byte_entropy(data):
+    """Shannon entropy of a byte string in bits per byte"""
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum(count / total * math.log2(count / total) for count in Counter(data).values())
+
+
+def random_entropy(n):
+    """Expected entropy of n random bytes, corrected for small-sample bias"""
+    return 8 - 255 / (2 * n * math.log(2))
+
+
+def detect_encryption(filepath):
+    """Decide whether a backup is encrypted from its content, in constant time.
+    
+    Armored GPG, age and OpenSSL files are recognised by their headers. Files in a
+    known compression or archive format are not encrypted (compressed data
+    also has high entropy). Anything else is judged by the byte entropy of
+    a fixed number of small samples spread over the file.
+    """
+    size = os.path.getsize(filepath)
+    with open_backup(filepath, sequential=False) as f:
+        head = f.read(SNIFF_HEAD_SIZE)
+        
+        for signature, scheme in ENCRYPTION_SIGNATURES:
+            if head.startswith(signature):
+                return {'encrypted': True, 'method': 'header', 'scheme': scheme}
+        
+        if any(head.startswith(signature) for signature, _ in COMPRESSION_MAGIC) or _sniff_container(head):
+            return {'encrypted': False, 'method': 'format', 'scheme': None}
+        
+        # Sample positions only depend on the size, so results are repeatable
+        rng = random.Random(size)
+        span = max(0, size - ENTROPY_SAMPLE_SIZE)
+        offsets = sorted(rng.randint(0, span) for _ in range(ENTROPY_SAMPLES)) if span else [0]
+        samples = []
+        for offset in offsets:
+            f.seek(offset)
+            samples.append(f.read(ENTROPY_SAMPLE_SIZE))
+    
+    sampled = sum(len(sample) for sample in samples)
+    if len(samples[0]) < ENTROPY_MIN_SAMPLE:
+        return {'encrypted': False, 'method': 'too_small', 'scheme': None}
+    
+    entropy = sum(byte_entropy(sample) for sample in samples) / len(samples)
+    encrypted = entropy >= random_entropy(sampled / len(samples)) - ENTROPY_MARGIN
+    
+    # A binary OpenPGP message is only recognisable by its first byte, so
+    # it is confirmed by the entropy of the ciphertext that follows
+    gpg = encrypted and bool(head) and head[0] in GPG_PACKET_TAGS
+    return {
+        'encrypted': encrypted,
+        'method': 'header' if gpg else 'entropy',
+        'scheme': 'gpg' if gpg else None,
+        'entropy': round(entropy, 3)
+    }
+
+
+def detect_backup_type(filepath, members=None, fmt=None):
+    """Detect the type of backup based on magic bytes, file suffixes and content"""
+    if fmt is None:
+        fmt = sniff_backup_format(filepath)
     
-    if ext in ['.sql', '.sql.gz', '.dump', '.dmp']:
+    if fmt['container'] in ['sql', 'pg_dump']:
         return 'database'
-    elif ext in ['.tar', '.tar.gz', '.tgz', '.zip']:
+    elif fmt['container'] in ['tar', 'zip']:
         # Check content to determine if it's a system or files backup
-        if ext == '.zip':
-            with zipfile.ZipFile(filepath, 'r') as z:
-                filelist = z.namelist()
-        elif ext in ['.tar.gz', '.tgz']:
-            with tarfile.open(filepath, 'r:gz') as t:
-                filelist = t.getnames()
-        elif ext == '.tar':
-            with tarfile.open(filepath, 'r') as t:
-                filelist = t.getnames()
+        if members is None:
+            members = stream_backup(filepath)['members'] or MemberIndex()
         
         # Check for system backup indicators
-        system_indicators = ['etc/', 'var/lib/dpkg', 'boot/', 'root/']
-        if any(indicator in filelist for indicator in system_indicators):
+        system_indicators = ['etc', 'var/lib/dpkg', 'boot', 'root']
+        if any(members.has_dir(indicator) for indicator in system_indicators):
             return 'system'
         return 'files'
     
@@ -79,21 +1506,14 @@ def detect_backup_type(filepath):
 
 def calculate_checksum(filepath, algorithm='sha256'):
     """Calculate file checksum"""
-    if algorithm == 'sha256':
-        h = hashlib.sha256()
-    elif algorithm == 'md5':
-        h = hashlib.md5()
-    else:
+    if algorithm not in HASH_ALGORITHMS:
         raise ValueError(f"Unsupported hash algorithm: {algorithm}")
     
-    with open(filepath, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b''):
-            h.update(chunk)
-    
-    return h.hexdigest()
+    digests, _ = calculate_checksums(filepath, [algorithm])
+    return digests[algorithm]
 
 
-def verify_checksum_file(filepath):
+def verify_checksum_file(filepath, calculated_checksum=None):
     """Verify file against its checksum file if available"""
     checksum_file = filepath + '.sha256'
     if not os.path.exists(checksum_file):
@@ -103,12 +1523,13 @@ def verify_checksum_file(filepath):
         with open(checksum_file, 'r') as f:
             expected_checksum = f.read().split()[0]
         
-        calculated_checksum = calculate_checksum(filepath)
+        if calculated_checksum is None:
+            calculated_checksum = calculate_checksum(filepath)
         
         if calculated_checksum == expected_checksum:
             return {'verified': True}
         else:
-            return {'verified': False, 'reason': 'Checksum mismatch', 
+            return {'verified': False, 'reason': 'Checksum mismatch',
                     'expected': expected_checksum, 'calculated': calculated_checksum}
     
     except Exception as e:
@@ -124,21 +1545,51 @@ def check_backup_age(filepath):
     age_days = (now - file_date).days
     
     if age_days > 30:
-        return {'status': 'warning', 'age_days': age_days, 
+        return {'status': 'warning', 'age_days': age_days,
                 'message': f'Backup is {age_days} days old'}
     else:
         return {'status': 'ok', 'age_days': age_days}
 
 
-def validate_system_backup(filepath, check_content=False):
+def checksum_verification(filepath, scan):
+    """Verify the checksum file against the checksum from the scan"""
+    if scan['checksum'] is None:
+        return {'verified': False, 'reason': 'Not hashed in headers-only mode'}
+    return verify_checksum_file(filepath, scan['checksum'])
+
+
+def check_restore_test(results, scan):
+    """Add restore test results, marking the backup as an error if it failed"""
+    restore = scan.get('restore_test')
+    if restore is None:
+        return False
+    
+    results['content_checks']['restore_test'] = restore
+    if restore['status'] != 'failed':
+        return False
+    
+    corrupt = restore['first_corrupt_member']
+    results['status'] = 'error'
+    results['error'] = (f"Restore test failed at {corrupt['name']} "
+                        f"(offset {corrupt['offset']}): {corrupt['error']}")
+    return True
+
+
+def validate_system_backup(filepath, check_content=False, scan=None):
     """Validate system backup file"""
+    if scan is None:
+        scan = stream_backup(filepath)
+    
     results = {
         'type': 'system',
         'file': filepath,
         'size': os.path.getsize(filepath),
         'age': check_backup_age(filepath),
-        'checksum': calculate_checksum(filepath),
-        'checksum_verification': verify_checksum_file(filepath),
+        'format': scan['format'],
+        'checksum': scan['checksum'],
+        'checksums': scan['checksums'],
+        'checksum_verification': checksum_verification(filepath, scan),
+        'throughput': scan['throughput'],
         'content_checks': {},
         'status': 'unknown'
     }
@@ -149,62 +1600,49 @@ def validate_system_backup(filepath, check_content=False):
         results['error'] = 'File does not exist or is not a regular file'
         return results
     
-    # Extract file extension
-    ext = os.path.splitext(filepath)[1].lower()
+    # A failed restore test names the corrupt member
+    if check_restore_test(results, scan):
+        return results
     
     # Check if file is a valid archive
-    try:
-        if ext in ['.tar.gz', '.tgz']:
-            with tarfile.open(filepath, 'r:gz') as t:
-                results['content_checks']['valid_archive'] = True
-                if check_content:
-                    results['content_checks']['file_count'] = len(t.getnames())
-                    
-                    # Check for critical system files
-                    critical_files = ['/etc/passwd', '/etc/shadow', '/etc/fstab', '/etc/hosts']
-                    found_critical = [f for f in critical_files if any(f.lstrip('/') in name for name in t.getnames())]
-                    results['content_checks']['critical_files_found'] = found_critical
-        
-        elif ext == '.tar':
-            with tarfile.open(filepath, 'r') as t:
-                results['content_checks']['valid_archive'] = True
-                if check_content:
-                    results['content_checks']['file_count'] = len(t.getnames())
-                    
-                    # Check for critical system files
-                    critical_files = ['/etc/passwd', '/etc/shadow', '/etc/fstab', '/etc/hosts']
-                    found_critical = [f for f in critical_files if any(f.lstrip('/') in name for name in t.getnames())]
-                    results['content_checks']['critical_files_found'] = found_critical
-        
-        elif ext == '.zip':
-            with zipfile.ZipFile(filepath, 'r') as z:
-                results['content_checks']['valid_archive'] = True
-                if check_content:
-                    results['content_checks']['file_count'] = len(z.namelist())
-                    
-                    # Check for critical system files
-                    critical_files = ['/etc/passwd', '/etc/shadow', '/etc/fstab', '/etc/hosts']
-                    found_critical = [f for f in critical_files if any(f.lstrip('/') in name for name in z.namelist())]
-                    results['content_checks']['critical_files_found'] = found_critical
-        
-        results['status'] = 'valid'
-    
-    except Exception as e:
+    if scan['error']:
         results['status'] = 'error'
-        results['error'] = f'Invalid archive file: {str(e)}'
+        results['error'] = f'Invalid archive file: {scan["error"]}'
+        return results
+    
+    if scan['members'] is not None:
+        results['content_checks']['valid_archive'] = True
+        if 'headers' in scan:
+            results['content_checks']['headers'] = scan['headers']
+        if check_content:
+            members = scan['members']
+            results['content_checks']['file_count'] = len(members)
+            
+            # Check for critical system files
+            critical_files = ['/etc/passwd', '/etc/shadow', '/etc/fstab', '/etc/hosts']
+            found_critical = [f for f in critical_files if f in members]
+            results['content_checks']['critical_files_found'] = found_critical
+    
+    results['status'] = 'valid'
     
     return results
 
 
-def validate_database_backup(filepath, check_content=False):
+def validate_database_backup(filepath, check_content=False, scan=None):
     """Validate database backup file"""
+    if scan is None:
+        scan = stream_backup(filepath)
+    
     results = {
         'type': 'database',
         'file': filepath,
         'size': os.path.getsize(filepath),
         'age': check_backup_age(filepath),
-        'checksum': calculate_checksum(filepath),
-        'checksum_verification': verify_checksum_file(filepath),
+        'format': scan['format'],
+        'checksum': scan['checksum'],
+        'checksums': scan['checksums'],
+        'checksum_verification': checksum_verification(filepath, scan),
+        'throughput': scan['throughput'],
         'content_checks': {},
         'status': 'unknown'
     }
@@ -215,70 +1653,60 @@ def validate_database_backup(filepath, check_content=False):
         results['error'] = 'File does not exist or is not a regular file'
         return results
     
-    # Extract file extension
-    ext = os.path.splitext(filepath)[1].lower()
-    
     # Check if file is a valid SQL dump
-    try:
-        temp_dir = None
-        sql_file = filepath
-        
-        # If file is compressed, decompress to a temporary file for analysis
-        if ext == '.gz':
-            temp_dir = tempfile.mkdtemp()
-            sql_file = os.path.join(temp_dir, 'temp.sql')
-            with gzip.open(filepath, 'rb') as f_in:
-                with open(sql_file, 'wb') as f_out:
-                    f_out.write(f_in.read(1024 * 1024))  # Read first MB for analysis
-        
-        # Perform basic SQL file validation
-        with open(sql_file, 'r', errors='ignore') as f:
-            content = f.read(1024 * 1024)  # Read first MB for analysis
-            
-            # Check for SQL dump indicators
-            if 'CREATE TABLE' in content or 'INSERT INTO' in content:
-                results['content_checks']['sql_syntax_found'] = True
-                
-                # Try to determine database type
-                if 'CREATE EXTENSION IF NOT EXISTS' in content or 'pg_catalog' in content:
-                    results['content_checks']['db_type'] = 'postgresql'
-                elif 'CREATE DATABASE' in content and 'ENGINE=' in content:
-                    results['content_checks']['db_type'] = 'mysql'
-                else:
-                    results['content_checks']['db_type'] = 'unknown'
-                
-                if check_content:
-                    # Count tables (rough estimate)
-                    tables = content.count('CREATE TABLE')
-                    results['content_checks']['table_count'] = tables
-            else:
-                results['content_checks']['sql_syntax_found'] = False
-        
-        if temp_dir:
-            shutil.rmtree(temp_dir)
+    if scan['error']:
+        results['status'] = 'error'
+        results['error'] = f'Error validating SQL file: {scan["error"]}'
+        return results
+    
+    # pg_dump custom format archives are binary and need pg_restore to inspect
+    if scan['format']['container'] == 'pg_dump':
+        results['content_checks']['db_type'] = 'postgresql'
+        results['content_checks']['dump_format'] = 'custom'
+        results['status'] = 'valid'
+        return results
+    
+    # The whole dump was analysed (and decompressed) during the streaming pass
+    sql = scan['sql'] or {}
+    results['content_checks']['sql_syntax_found'] = sql.get('sql_syntax_found', False)
+    
+    if results['content_checks']['sql_syntax_found']:
+        results['content_checks']['db_type'] = sql['db_type']
+        results['content_checks']['dump_complete'] = sql['trailer_found']
+        results['content_checks']['throughput'] = sql['throughput']
         
-        if results['content_checks'].get('sql_syntax_found', False):
-            results['status'] = 'valid'
-        else:
-            results['status'] = 'warning'
-            results['warning'] = 'File may not be a valid SQL dump'
+        if check_content:
+            results['content_checks']['table_count'] = sql['table_count']
+            results['content_checks']['row_count'] = sql['row_count']
+            results['content_checks']['table_rows'] = sql['tables']
     
-    except Exception as e:
-        results['status'] = 'error'
-        results['error'] = f'Error validating SQL file: {str(e)}'
+    if not results['content_checks']['sql_syntax_found']:
+        results['status'] = 'warning'
+        results['warning'] = 'File may not be a valid SQL dump'
+    elif not sql['trailer_found']:
+        results['status'] = 'warning'
+        results['warning'] = 'Dump completion trailer not found, the dump may be truncated'
+    else:
+        results['status'] = 'valid'
     
     return results
 
 
-def validate_files_backup(filepath, check_content=False):
+def validate_files_backup(filepath, check_content=False, scan=None):
     """Validate files backup"""
+    if scan is None:
+        scan = stream_backup(filepath)
+    
     results = {
         'type': 'files',
         'file': filepath,
         'size': os.path.getsize(filepath),
         'age': check_backup_age(filepath),
-        'checksum': calculate_checksum(filepath),
-        'checksum_verification': verify_checksum_file(filepath),
+        'format': scan['format'],
+        'checksum': scan['checksum'],
+        'checksums': scan['checksums'],
+        'checksum_verification': checksum_verification(filepath, scan),
+        'throughput': scan['throughput'],
         'content_checks': {},
         'status': 'unknown'
     }
@@ -289,64 +1717,27 @@ def validate_files_backup(filepath, check_content=False):
         results['error'] = 'File does not exist or is not a regular file'
         return results
     
-    # Extract file extension
-    ext = os.path.splitext(filepath)[1].lower()
+    # A failed restore test names the corrupt member
+    if check_restore_test(results, scan):
+        return results
     
     # Check if file is a valid archive
-    try:
-        if ext in ['.tar.gz', '.tgz']:
-            with tarfile.open(filepath, 'r:gz') as t:
-                results['content_checks']['valid_archive'] = True
-                if check_content:
-                    results['content_checks']['file_count'] = len(t.getnames())
-                    
-                    # Categorize files
-                    file_types = {}
-                    for name in t.getnames():
-                        if name.endswith('/'):
-                            continue
-                        ext = os.path.splitext(name)[1].lower()
-                        file_types[ext] = file_types.get(ext, 0) + 1
-                    
-                    results['content_checks']['file_types'] = file_types
-        
-        elif ext == '.tar':
-            with tarfile.open(filepath, 'r') as t:
-                results['content_checks']['valid_archive'] = True
-                if check_content:
-                    results['content_checks']['file_count'] = len(t.getnames())
-                    
-                    # Categorize files
-                    file_types = {}
-                    for name in t.getnames():
-                        if name.endswith('/'):
-                            continue
-                        ext = os.path.splitext(name)[1].lower()
-                        file_types[ext] = file_types.get(ext, 0) + 1
-                    
-                    results['content_checks']['file_types'] = file_types
-        
-        elif ext == '.zip':
-            with zipfile.ZipFile(filepath, 'r') as z:
-                results['content_checks']['valid_archive'] = True
-                if check_content:
-                    results['content_checks']['file_count'] = len(z.namelist())
-                    
-                    # Categorize files
-                    file_types = {}
-                    for name in z.namelist():
-                        if name.endswith('/'):
-                            continue
-                        ext = os.path.splitext(name)[1].lower()
-                        file_types[ext] = file_types.get(ext, 0) + 1
-                    
-                    results['content_checks']['file_types'] = file_types
-        
-        results['status'] = 'valid'
-    
-    except Exception as e:
+    if scan['error']:
         results['status'] = 'error'
-        results['error'] = f'Invalid archive file: {str(e)}'
+        results['error'] = f'Invalid archive file: {scan["error"]}'
+        return results
+    
+    if scan['members'] is not None:
+        results['content_checks']['valid_archive'] = True
+        if 'headers' in scan:
+            results['content_checks']['headers'] = scan['headers']
+        if check_content:
+            results['content_checks']['file_count'] = len(scan['members'])
+            
+            # Categorize files
+            results['content_checks']['file_types'] = dict(scan['members'].extensions)
+    
+    results['status'] = 'valid'
     
     return results
 
@@ -355,12 +1746,15 @@ def check_ethical_data_handling(results, filepath):
     """Perform ethical data handling checks on the backup"""
     ethical_results = {}
     
-    # Check if backup is encrypted
-    is_encrypted = False
-    if filepath.endswith('.gpg') or filepath.endswith('.enc'):
-        is_encrypted = True
+    # Check if backup is encrypted, from its content rather than its name
+    encryption = detect_encryption(filepath)
+    is_encrypted = encryption['encrypted']
     
     ethical_results['encrypted'] = is_encrypted
+    ethical_results['encryption'] = encryption
+    
+    if filepath.endswith(('.gpg', '.enc', '.age')) and not is_encrypted:
+        ethical_results['encryption_suffix_mismatch'] = True
     
     # Check for potential PII based on backup type
     if results['type'] == 'database':
@@ -388,6 +1782,20 @@ def check_ethical_data_handling(results, filepath):
         ethical_results['potential_pii'] = 'unknown'
         ethical_results['privacy_risk'] = 'medium' if not is_encrypted else 'low'
     
+    # A PII scan replaces the assumption with what was actually found
+    pii_scan = results.get('pii_scan')
+    if pii_scan is not None:
+        if pii_scan['totals']:
+            ethical_results['potential_pii'] = True
+            ethical_results['pii_found'] = pii_scan['totals']
+            ethical_results['privacy_risk'] = 'high' if not is_encrypted else 'medium'
+        elif pii_scan['budget_exhausted']:
+            ethical_results['potential_pii'] = 'unknown'
+        else:
+            ethical_results['potential_pii'] = False
+            if not ethical_results.get('sensitive_content'):
+                ethical_results['privacy_risk'] = 'low'
+    
     # Check backup age for compliance with retention policies
     if results['age']['age_days'] > 180:  # 6 months
         ethical_results['retention_concern'] = True
@@ -411,8 +1819,36 @@ def check_ethical_data_handling(results, filepath):
     return ethical_results
 
 
-def validate_backup(filepath, backup_type='auto', check_content=False, ethical_check=False):
+def manifest_only_results(filepath, backup_type, fmt):
+    """Result skeleton for a backup verified against its manifest alone.
+    
+    Nothing is hashed or parsed, so there is no checksum and no content
+    checks, and archives are typed from their format alone; the status
+    comes from the manifest verification.
+    """
+    return {
+        'type': backup_type,
+        'file': filepath,
+        'size': os.path.getsize(filepath),
+        'age': check_backup_age(filepath),
+        'format': fmt,
+        'checksum': None,
+        'checksums': {},
+        'checksum_verification': {'verified': False, 'reason': 'Not hashed in manifest-only mode'},
+        'throughput': None,
+        'content_checks': {},
+        'status': 'valid'
+    }
+
+
+def validate_backup(filepath, backup_type='auto', check_content=False, ethical_check=False,
+                    algorithms=('sha256',), cache_path=None, revalidate_older_than=None,
+                    restore_test=False, headers_only=False, write_manifest=False,
+                    block_size=MANIFEST_BLOCK_SIZE, sample_blocks=None, pii_scan=False,
+                    pii_budget=PII_BUDGET, pii_workers=1, manifest_only=False):
     """Validate backup file based on type"""
+    start = time.perf_counter()
+    
     # Check if file exists
     if not os.path.exists(filepath):
         return {
@@ -420,38 +1856,194 @@ def validate_backup(filepath, backup_type='auto', check_content=False, ethical_c
             'error': f'File not found: {filepath}'
         }
     
+    cache = open_cache(cache_path) if cache_path else None
+    if cache is not None:
+        st = os.stat(filepath)
+        options = json.dumps([backup_type, bool(check_content), sorted(algorithms), bool(restore_test),
+                              bool(headers_only), bool(write_manifest), sample_blocks, bool(manifest_only),
+                              pii_budget if pii_scan else None])
+        results = cache.get(filepath, st, options, revalidate_older_than)
+        if results is not None:
+            logger.debug(f"Using cached validation of {filepath}")
+            # Age and the checksum file can change without touching the backup
+            results['age'] = check_backup_age(filepath)
+            results['checksum_verification'] = checksum_verification(filepath, results)
+            results['cached'] = True
+            # Nothing was read, so timings of the original run do not apply
+            results['throughput'] = None
+            results.get('content_checks', {}).pop('throughput', None)
+            results.get('content_checks', {}).get('headers', {}).pop('seconds', None)
+            if ethical_check:
+                results['ethical_checks'] = check_ethical_data_handling(results, filepath)
+            results['duration_seconds'] = round(time.perf_counter() - start, 3)
+            return results
+    
+    # Block digests for an existing manifest (or a new one) ride along the same pass
+    manifest = load_manifest(filepath)
+    if manifest is not None:
+        block_size = manifest['block_size']
+    elif not write_manifest:
+        block_size = None
+    
+    # Sampled or parallel block checks replace the streaming pass, unless
+    # the content has to be read anyway
+    manifest_only = bool(manifest_only or sample_blocks)
+    if manifest_only and (manifest is None or check_content or restore_test or pii_scan):
+        logger.warning(f"Reading {filepath} in full: "
+                       + ("it has no manifest" if manifest is None else "content checks need the streaming pass"))
+        manifest_only = sample_blocks = False
+    
+    # A single pass over the file yields the checksum and the content
+    # needed both for auto-detection and for validation
+    fmt = sniff_backup_format(filepath)
+    if (headers_only and not restore_test and not pii_scan
+            and fmt['compression'] is None and fmt['container'] in ['tar', 'zip']):
+        # Uncompressed archives can be checked from their metadata alone
+        scan = scan_headers(filepath, fmt)
+    elif manifest_only:
+        scan = None
+    elif pii_scan:
+        pii = PiiScanner(open_pii_pool(max(1, pii_workers)), max(1, pii_workers), pii_budget)
+        scan = stream_backup(filepath, algorithms, restore_test, fmt, block_size, pii)
+        scan['pii_scan'] = pii.summary()
+    else:
+        scan = stream_backup(filepath, algorithms, restore_test, fmt, block_size)
+    
     # Auto-detect backup type if not specified
     if backup_type == 'auto':
-        backup_type = detect_backup_type(filepath)
+        backup_type = detect_backup_type(filepath, (scan or {}).get('members') or MemberIndex(), fmt)
     
     # Validate based on backup type
-    if backup_type == 'system':
-        results = validate_system_backup(filepath, check_content)
+    if scan is None:
+        results = manifest_only_results(filepath, backup_type, fmt)
+        scan = {}
+    elif backup_type == 'system':
+        results = validate_system_backup(filepath, check_content, scan)
     elif backup_type == 'database':
-        results = validate_database_backup(filepath, check_content)
+        results = validate_database_backup(filepath, check_content, scan)
     elif backup_type == 'files':
-        results = validate_files_backup(filepath, check_content)
+        results = validate_files_backup(filepath, check_content, scan)
     else:
         return {
             'status': 'error',
             'error': f'Unknown backup type: {backup_type}'
         }
     
+    # Hashing alone says nothing about the content; fail runs that asked for it
+    if scan.get('unchecked') and results['status'] != 'error':
+        if check_content or restore_test:
+            results['status'] = 'error'
+            results['error'] = scan['unchecked']
+            results.pop('warning', None)
+        else:
+            results['status'] = 'warning'
+            results['warning'] = scan['unchecked']
+    
+    if 'pii_scan' in scan:
+        pii_results = dict(scan['pii_scan'])
+        by_key = pii_results.pop('by_key')
+        pii_results['by_table' if results['type'] == 'database' else 'by_member'] = by_key
+        results['pii_scan'] = pii_results
+    
+    block_hasher = scan.get('block_hasher')
+    if manifest is not None:
+        blocks = block_hasher.digests() if block_hasher is not None else None
+        verification = verify_manifest(filepath, manifest, blocks, sample=sample_blocks)
+        results['manifest_verification'] = verification
+        if not verification['verified']:
+            results['status'] = 'error'
+            results['error'] = f"Manifest verification failed: {verification['reason']}"
+    
+    # A manifest that failed verification is evidence of corruption and is
+    # never replaced, nor is a new one written for a broken backup
+    if write_manifest and block_hasher is not None and results['status'] != 'error':
+        manifest_path = filepath + MANIFEST_SUFFIX
+        write_json_atomic(manifest_path, build_manifest(filepath, block_hasher))
+        results['manifest'] = manifest_path
+    
+    # Errors and unread content are always re-checked on the next run
+    if cache is not None and results['status'] != 'error' and not scan.get('unchecked'):
+        cache.put(filepath, st, options, results)
+    
     # Add ethical data handling checks if requested
     if ethical_check:
         results['ethical_checks'] = check_ethical_data_handling(results, filepath)
     
+    results['duration_seconds'] = round(time.perf_counter() - start, 3)
     return results
 
 
-def validate_backup_directory(directory, check_content=False, ethical_check=False):
-    """Validate all backup files in a directory"""
+def _init_worker(read_limiter=None, drop_page_cache=True):
+    """Process pool initializer sharing the read policy"""
+    global _read_limiter, _drop_page_cache
+    _read_limiter = read_limiter
+    _drop_page_cache = drop_page_cache
+
+
+def _admit_next(large, small, large_in_flight, max_large_reads):
+    """Pick the next scheduled file: largest first, small ones while the large read slots are full"""
+    if large and large_in_flight < max_large_reads:
+        return large.popleft(), True
+    if small:
+        return small.popleft(), False
+    return None, False
+
+
+def _validate_scheduled(filepath, check_content, ethical_check, options):
+    """Validate one file from the directory schedule, never raising"""
+    try:
+        return validate_backup(filepath, 'auto', check_content, ethical_check, **options)
+    except Exception as e:
+        return {'file': filepath, 'status': 'error', 'error': f'Validation failed: {str(e)}'}
+
+
+def find_backup_files(directory):
+    """Return the backup files below a directory in a stable (sorted) order"""
+    # Find all potential backup files
+    backup_extensions = [suffix for suffix, _, container in BACKUP_SUFFIXES if container] + ['.gpg', '.enc']
+    found = []
+    
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            filepath = os.path.join(root, filename)
+            
+            # Skip checksum files and temporary files
+            if any(filepath.endswith(ext)
+                   for ext in ['.sha256', '.md5', '.tmp', MANIFEST_SUFFIX, MANIFEST_PROGRESS_SUFFIX]):
+                continue
+            
+            # Skip files that don't have backup extensions unless they have a checksum file
+            if (not any(filepath.endswith(ext) for ext in backup_extensions)
+                    and not os.path.exists(filepath + '.sha256')):
+                continue
+            
+            found.append(filepath)
+    
+    return sorted(found)
+
+
+def validate_backup_directory(directory, check_content=False, ethical_check=False, workers=1,
+                              max_large_reads=2, large_file_size=LARGE_FILE_SIZE, on_result=None, **options):
+    """Validate all backup files in a directory.
+    
+    With more than one worker, files are validated in a process pool and
+    scheduled largest first so a few huge tarballs do not end up running
+    alone at the end. At most max_large_reads files of large_file_size or
+    more are read at the same time; the parent holds them back and hands
+    small files to free workers instead, so no worker sits waiting for a
+    large read slot. Results keep the sorted file order.
+    When on_result is given, each file result is passed to it as soon as
+    it is ready (in completion order) instead of being kept in 'files',
+    so memory stays flat for very large trees. Remaining options are
+    passed to validate_backup().
+    """
     results = {
         'directory': directory,
         'files_count': 0,
         'valid_count': 0,
         'warning_count': 0,
         'error_count': 0,
+        'ethical_assessments': {},
         'files': []
     }
     
@@ -460,32 +2052,66 @@ def validate_backup_directory(directory, check_content=False, ethical_check=Fals
         results['error'] = f'Not a directory: {directory}'
         return results
     
-    # Find all potential backup files
-    backup_extensions = ['.sql', '.sql.gz', '.dump', '.dmp', '.tar', '.tar.gz', '.tgz', '.zip', '.gpg', '.enc']
+    filepaths = find_backup_files(directory)
+    sizes = {}
+    for filepath in filepaths:
+        try:
+            sizes[filepath] = os.path.getsize(filepath)
+        except OSError:
+            sizes[filepath] = 0
     
-    for root, _, files in os.walk(directory):
-        for filename in files:
-            filepath = os.path.join(root, filename)
-            
-            # Skip checksum files and temporary files
-            if any(filepath.endswith(ext) for ext in ['.sha256', '.md5', '.tmp']):
-                continue
-            
-            # Skip files that don't have backup extensions unless they have a checksum file
-            if not any(filepath.endswith(ext) for ext in backup_extensions) and not os.path.exists(filepath + '.sha256'):
-                continue
-            
-            # Validate the backup file
-            file_result = validate_backup(filepath, 'auto', check_content, ethical_check)
-            results['files'].append(file_result)
-            
-            results['files_count'] += 1
-            if file_result['status'] == 'valid':
-                results['valid_count'] += 1
-            elif file_result['status'] == 'warning':
-                results['warning_count'] += 1
-            elif file_result['status'] == 'error':
-                results['error_count'] += 1
+    file_results = [None] * len(filepaths) if on_result is None else None
+    schedule = sorted(range(len(filepaths)), key=lambda i: sizes[filepaths[i]], reverse=True)
+    
+    def record(i, file_result):
+        results['files_count'] += 1
+        if file_result['status'] == 'valid':
+            results['valid_count'] += 1
+        elif file_result['status'] == 'warning':
+            results['warning_count'] += 1
+        elif file_result['status'] == 'error':
+            results['error_count'] += 1
+        
+        assessment = file_result.get('ethical_checks', {}).get('assessment')
+        if assessment:
+            results['ethical_assessments'][assessment] = results['ethical_assessments'].get(assessment, 0) + 1
+        
+        if on_result is not None:
+            on_result(file_result)
+        else:
+            file_results[i] = file_result
+    
+    if workers > 1 and len(filepaths) > 1:
+        logger.info(f"Validating {len(filepaths)} files with {workers} workers")
+        large = deque(i for i in schedule if sizes[filepaths[i]] >= large_file_size)
+        small = deque(i for i in schedule if sizes[filepaths[i]] < large_file_size)
+        large_in_flight = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(_read_limiter, _drop_page_cache)) as pool:
+            # Submit no more files than there are workers, so every submitted
+            # file is running and the large read count is exact
+            pending = {}
+            while True:
+                while len(pending) < workers:
+                    i, is_large = _admit_next(large, small, large_in_flight, max(1, max_large_reads))
+                    if i is None:
+                        break
+                    future = pool.submit(_validate_scheduled, filepaths[i], check_content, ethical_check, options)
+                    pending[future] = (i, is_large)
+                    large_in_flight += is_large
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, is_large = pending.pop(future)
+                    large_in_flight -= is_large
+                    record(i, future.result())
+    else:
+        for i in schedule:
+            record(i, _validate_scheduled(filepaths[i], check_content, ethical_check, options))
+    
+    if file_results is not None:
+        results['files'] = file_results
     
     # Set overall status
     if results['error_count'] > 0:
@@ -500,6 +2126,100 @@ def validate_backup_directory(directory, check_content=False, ethical_check=Fals
     return results
 
 
+def write_ndjson(stream, record, data):
+    """Write one NDJSON record and flush it so partial reports survive interruptions"""
+    stream.write(json.dumps({'record': record, **data}, default=str) + '\n')
+    stream.flush()
+
+
+def prometheus_label(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_samples(file_result, now=None):
+    """Return the (metric, labels, value) samples for one validated file"""
+    now = time.time() if now is None else now
+    filepath = file_result.get('file')
+    if not filepath:
+        return []
+    
+    labels = {'file': filepath}
+    samples = [('status', dict(labels, status=status), int(file_result.get('status') == status))
+               for status in PROMETHEUS_STATUSES]
+    
+    try:
+        samples.append(('age_seconds', labels, round(now - os.path.getmtime(filepath))))
+    except OSError:
+        pass
+    if 'size' in file_result:
+        samples.append(('size_bytes', labels, file_result['size']))
+    if 'duration_seconds' in file_result:
+        samples.append(('duration_seconds', labels, file_result['duration_seconds']))
+    mb_per_s = (file_result.get('throughput') or {}).get('mb_per_s')
+    if mb_per_s is not None:
+        samples.append(('read_mb_per_second', labels, mb_per_s))
+    if file_result.get('status') in ['valid', 'warning']:
+        samples.append(('last_success_timestamp_seconds', labels, round(now)))
+    
+    return samples
+
+
+def previous_successes(path):
+    """Read the last success times of an existing textfile, keyed by file"""
+    metric = f'{PROMETHEUS_PREFIX}_last_success_timestamp_seconds'
+    successes = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                match = PROMETHEUS_SAMPLE_RE.match(line.rstrip('\n'))
+                if match and match.group(1) == metric:
+                    filepath = re.sub(r'\\(.)', lambda m: '\n' if m.group(1) == 'n' else m.group(1),
+                                      match.group(2))
+                    successes[filepath] = float(match.group(3))
+    except (OSError, ValueError):
+        pass
+    return successes
+
+
+def write_prometheus_textfile(path, samples, status_counts):
+    """Write node_exporter textfile metrics atomically
+    
+    Files that failed this run keep the last success time recorded by the
+    previous run, so alerts can fire on how long a backup has gone without
+    a good validation. Series of files that no longer exist (rotated out
+    by retention) are not carried forward.
+    """
+    now = time.time()
+    validated = {labels['file'] for _, labels, _ in samples if 'file' in labels}
+    succeeded = {labels['file'] for name, labels, _ in samples if name == 'last_success_timestamp_seconds'}
+    for filepath, timestamp in previous_successes(path).items():
+        if filepath not in succeeded and (filepath in validated or os.path.exists(filepath)):
+            samples.append(('last_success_timestamp_seconds', {'file': filepath}, round(timestamp)))
+    
+    samples.extend(('files', {'status': status}, status_counts.get(status, 0)) for status in PROMETHEUS_STATUSES)
+    samples.append(('last_run_timestamp_seconds', {}, round(now)))
+    
+    lines = []
+    for name, (metric_type, help_text) in PROMETHEUS_METRICS.items():
+        metric_samples = [sample for sample in samples if sample[0] == name]
+        if not metric_samples:
+            continue
+        metric = f'{PROMETHEUS_PREFIX}_{name}'
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {metric_type}')
+        for _, labels, value in metric_samples:
+            label_text = ','.join(f'{key}="{prometheus_label(label)}"' for key, label in labels.items())
+            lines.append(f'{metric}{{{label_text}}} {value}' if label_text else f'{metric} {value}')
+    
+    # The collector only reads *.prom files, so the temporary file is never scraped
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
 def generate_report(results):
     """Generate a detailed validation report"""
     report = {
@@ -521,11 +2241,9 @@ def generate_report(results):
         }
         
         # Add ethical compliance summary if available
-        if any('ethical_checks' in file_result for file_result in results['files']):
-            ethical_compliant = sum(1 for file in results['files'] 
-                                   if file.get('ethical_checks', {}).get('assessment') == 'compliant')
-            ethical_noncompliant = sum(1 for file in results['files'] 
-                                      if file.get('ethical_checks', {}).get('assessment') == 'non_compliant')
+        if results.get('ethical_assessments'):
+            ethical_compliant = results['ethical_assessments'].get('compliant', 0)
+            ethical_noncompliant = results['ethical_assessments'].get('non_compliant', 0)
             
             report['summary']['ethical_compliance'] = {
                 'compliant_files': ethical_compliant,
@@ -538,7 +2256,8 @@ def generate_report(results):
             'path': results['file'],
             'status': results['status'],
             'size': results['size'],
-            'age_days': results['age']['age_days']
+            'age_days': results['age']['age_days'],
+            'mb_per_s': (results.get('throughput') or {}).get('mb_per_s')
         }
         
         # Add ethical compliance summary if available
@@ -567,28 +2286,91 @@ def main():
     if args.verbose:
         logger.setLevel(logging.DEBUG)
     
+    try:
+        algorithms = parse_algorithms(args.checksums)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    
+    cache_path = None if args.no_cache else args.cache
+    
+    # PII scanning processes are shared out between the validating processes
+    pii_workers = args.pii_workers or max(1, (os.cpu_count() or 1) // max(1, args.workers))
+    
+    configure_io(args.max_read_mbps, not args.keep_page_cache)
+    if args.nice_io:
+        lower_io_priority()
+    
     logger.info(f"Starting backup validation of {args.backup_path}")
     
+    # NDJSON reports are written one line per file as results arrive
+    stream = open(args.output, 'w') if args.format == 'ndjson' else None
+    metric_samples = [] if args.prometheus else None
+    
+    def on_result(file_result):
+        write_ndjson(stream, 'file', file_result)
+        if metric_samples is not None:
+            metric_samples.extend(prometheus_samples(file_result))
+    
     # Validate backup file or directory
     if os.path.isdir(args.backup_path):
         logger.info(f"Validating backup directory: {args.backup_path}")
-        results = validate_backup_directory(args.backup_path, args.check_content, args.ethical_check)
+        results = validate_backup_directory(args.backup_path, args.check_content, args.ethical_check,
+                                            workers=args.workers,
+                                            max_large_reads=args.max_large_reads,
+                                            large_file_size=args.large_file_mb * 1024 * 1024,
+                                            algorithms=algorithms, cache_path=cache_path,
+                                            revalidate_older_than=args.revalidate_older_than,
+                                            restore_test=args.restore_test,
+                                            headers_only=args.headers_only,
+                                            write_manifest=args.write_manifest,
+                                            block_size=args.block_size_mb * 1024 * 1024,
+                                            sample_blocks=args.sample_blocks,
+                                            manifest_only=args.manifest_only,
+                                            pii_scan=args.pii_scan,
+                                            pii_budget=args.pii_budget_mb * 1024 * 1024,
+                                            pii_workers=pii_workers,
+                                            on_result=on_result if stream else None)
     else:
         logger.info(f"Validating backup file: {args.backup_path}")
-        results = validate_backup(args.backup_path, args.type, args.check_content, args.ethical_check)
+        results = validate_backup(args.backup_path, args.type, args.check_content, args.ethical_check,
+                                  algorithms, cache_path, args.revalidate_older_than, args.restore_test,
+                                  args.headers_only, args.write_manifest, args.block_size_mb * 1024 * 1024,
+                                  args.sample_blocks, args.pii_scan, args.pii_budget_mb * 1024 * 1024,
+                                  pii_workers, args.manifest_only)
+        if stream:
+            on_result(results)
     
     # Generate validation report
     report = generate_report(results)
     
     # Write report to file
-    with open(args.output, 'w') as f:
-        json.dump(report, f, indent=2)
+    if stream:
+        report.pop('validation_results', None)
+        write_ndjson(stream, 'summary', report)
+        stream.close()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
     
     logger.info(f"Validation report written to: {args.output}")
     
+    if metric_samples is not None:
+        if not stream:
+            for file_result in results.get('files', [results]):
+                metric_samples.extend(prometheus_samples(file_result))
+        if 'directory' in results:
+            status_counts = {'valid': results['valid_count'], 'warning': results['warning_count'],
+                             'error': results['error_count']}
+        else:
+            status_counts = {results['status']: 1}
+        write_prometheus_textfile(args.prometheus, metric_samples, status_counts)
+        logger.info(f"Prometheus metrics written to: {args.prometheus}")
+    
     # Print summary to console
     if 'directory' in results:
-        logger.info(f"Summary: {results['valid_count']} valid, {results['warning_count']} warnings, {results['error_count']} errors")
+        logger.info(f"Summary: {results['valid_count']} valid, {results['warning_count']} warnings, "
+                    f"{results['error_count']} errors")
     else:
         logger.info(f"Status: {results['status']}")
     
@@ -602,4 +2384,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
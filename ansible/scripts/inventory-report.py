@@ -6,7 +6,6 @@ This script generates a comprehensive report of the Ansible inventory,
 including hosts, groups, variables, and resource allocation.
 """
 
-import os
 import sys
 import json
 import yaml
@@ -207,7 +206,8 @@ def generate_markdown_report(environment, groups, hosts, resources, consideratio
                         host_data.get('ansible_host', 'N/A'),
                         host_data.get('cpus', 'N/A'),
                         host_data.get('memory', 'N/A'),
-                        f"{host_data.get('ansible_distribution', 'N/A')} {host_data.get('ansible_distribution_version', '')}"
+                        f"{host_data.get('ansible_distribution', 'N/A')} "
+                        f"{host_data.get('ansible_distribution_version', '')}"
                     ])
             
             report += "```\n" + hosts_table.get_string() + "\n```\n\n"
@@ -225,7 +225,8 @@ def generate_markdown_report(environment, groups, hosts, resources, consideratio
     report += "## Resource Allocation\n\n"
     
     resource_table = PrettyTable()
-    resource_table.field_names = ["Group", "Hosts", "Total CPUs", "Total Memory (GB)", "Average CPU/Host", "Average Memory/Host (GB)"]
+    resource_table.field_names = ["Group", "Hosts", "Total CPUs", "Total Memory (GB)",
+                                  "Average CPU/Host", "Average Memory/Host (GB)"]
     resource_table.align = "l"
     
     for group_name, group_resources in sorted(resources.items()):
@@ -296,7 +297,8 @@ def generate_text_report(environment, groups, hosts, resources, considerations):
                         host_data.get('ansible_host', 'N/A'),
                         host_data.get('cpus', 'N/A'),
                         host_data.get('memory', 'N/A'),
-                        f"{host_data.get('ansible_distribution', 'N/A')} {host_data.get('ansible_distribution_version', '')}"
+                        f"{host_data.get('ansible_distribution', 'N/A')} "
+                        f"{host_data.get('ansible_distribution_version', '')}"
                     ])
             
             report += hosts_table.get_string() + "\n\n"
@@ -308,7 +310,8 @@ def generate_text_report(environment, groups, hosts, resources, considerations):
     report += "===================\n\n"
     
     resource_table = PrettyTable()
-    resource_table.field_names = ["Group", "Hosts", "Total CPUs", "Total Memory (GB)", "Average CPU/Host", "Average Memory/Host (GB)"]
+    resource_table.field_names = ["Group", "Hosts", "Total CPUs", "Total Memory (GB)",
+                                  "Average CPU/Host", "Average Memory/Host (GB)"]
     resource_table.align = "l"
     
     for group_name, group_resources in sorted(resources.items()):
@@ -399,4 +402,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
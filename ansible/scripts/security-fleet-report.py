@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+SummitEthic Security Fleet Report
+
+This script answers fleet-wide roll-ups over the security_check results
+collected by the security_fleet callback plugin, such as the worst scoring
+hosts or the most common CIS failures across the fleet.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+
+
+DEFAULT_DB_PATH = '/var/log/summitethic/security/fleet.db'
+
+# Latest run of every host audited on the report date, so repeated audits
+# on the same day are not counted twice
+LATEST_RUNS = '''
+    WITH latest AS (
+        SELECT host, MAX(run_id) AS run_id
+          FROM results
+         WHERE run_date = :run_date
+         GROUP BY host
+    )
+'''
+
+QUERIES = {
+    'worst-hosts': LATEST_RUNS + '''
+        SELECT r.host, ROUND(AVG(r.score), 1) AS avg_score, MIN(r.score) AS min_score,
+               COUNT(*) AS checks,
+               (SELECT COUNT(*) FROM issues i JOIN results ri ON ri.id = i.result_id
+                 WHERE ri.host = r.host AND ri.run_id = r.run_id
+                   AND i.severity IN ('critical', 'high')) AS critical_high
+          FROM results r
+          JOIN latest l ON l.host = r.host AND l.run_id = r.run_id
+         GROUP BY r.host
+         ORDER BY avg_score ASC, critical_high DESC
+         LIMIT :limit
+    ''',
+    'common-failures': LATEST_RUNS + '''
+        SELECT i.standard, i.severity, COUNT(DISTINCT i.host) AS hosts, COUNT(*) AS occurrences,
+               MIN(i.description) AS example
+          FROM issues i
+          JOIN results r ON r.id = i.result_id
+          JOIN latest l ON l.host = r.host AND l.run_id = r.run_id
+         WHERE i.standard_id = :standard
+         GROUP BY i.standard, i.severity
+         ORDER BY hosts DESC, occurrences DESC
+         LIMIT :limit
+    ''',
+    'severity': LATEST_RUNS + '''
+        SELECT i.severity, COUNT(*) AS occurrences, COUNT(DISTINCT i.host) AS hosts
+          FROM issues i
+          JOIN results r ON r.id = i.result_id
+          JOIN latest l ON l.host = r.host AND l.run_id = r.run_id
+         GROUP BY i.severity
+         ORDER BY occurrences DESC
+    ''',
+    'host-history': '''
+        SELECT r.run_date, r.run_id, ROUND(AVG(r.score), 1) AS avg_score, COUNT(*) AS checks,
+               (SELECT COUNT(*) FROM issues i JOIN results ri ON ri.id = i.result_id
+                 WHERE ri.host = r.host AND ri.run_id = r.run_id) AS issues
+          FROM results r
+         WHERE r.host = :host
+         GROUP BY r.run_id
+         ORDER BY r.run_id DESC
+         LIMIT :limit
+    ''',
+}
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Query fleet-wide security_check results')
+    parser.add_argument('report', choices=sorted(QUERIES),
+                        help='Roll-up to produce')
+    parser.add_argument('--db', default=os.environ.get('SUMMITETHIC_SECURITY_FLEET_DB', DEFAULT_DB_PATH),
+                        help=f'Path to the fleet database (default: {DEFAULT_DB_PATH})')
+    parser.add_argument('--date',
+                        help='Run date (YYYY-MM-DD) to report on (default: latest run)')
+    parser.add_argument('--standard', default='cis',
+                        help='Compliance standard for common-failures (default: cis)')
+    parser.add_argument('--host',
+                        help='Host for host-history')
+    parser.add_argument('--limit', type=int, default=20,
+                        help='Maximum number of rows to return (default: 20)')
+    parser.add_argument('--format', '-f', default='text', choices=['text', 'json'],
+                        help='Output format (default: text)')
+    return parser.parse_args()
+
+
+def latest_run_date(conn):
+    """Return the most recent run date recorded in the database"""
+    row = conn.execute('SELECT MAX(run_date) FROM results').fetchone()
+    return row[0]
+
+
+def run_report(conn, report, run_date=None, standard='cis', host=None, limit=20):
+    """Run a roll-up query and return its column names and rows"""
+    params = {
+        'run_date': run_date or latest_run_date(conn),
+        'standard': standard.lower(),
+        'host': host,
+        'limit': limit
+    }
+    cursor = conn.execute(QUERIES[report], params)
+    columns = [column[0] for column in cursor.description]
+    return columns, cursor.fetchall()
+
+
+def format_text(columns, rows):
+    """Format rows as an aligned text table"""
+    table = [columns] + [['' if value is None else str(value) for value in row] for row in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(columns))]
+
+    lines = []
+    for index, row in enumerate(table):
+        lines.append('  '.join(value.ljust(widths[i]) for i, value in enumerate(row)).rstrip())
+        if index == 0:
+            lines.append('  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+
+def main():
+    """Main function"""
+    args = parse_arguments()
+
+    if args.report == 'host-history' and not args.host:
+        print('Error: --host is required for host-history')
+        sys.exit(1)
+
+    if not os.path.exists(args.db):
+        print(f'Error: fleet database not found: {args.db}')
+        print('Enable the security_fleet callback plugin and run the security playbooks first.')
+        sys.exit(1)
+
+    # Open read-only so reports never contend with a running playbook
+    conn = sqlite3.connect(f'file:{args.db}?mode=ro', uri=True)
+
+    start = time.perf_counter()
+    columns, rows = run_report(conn, args.report, args.date, args.standard, args.host, args.limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    conn.close()
+
+    if args.format == 'json':
+        print(json.dumps([dict(zip(columns, row)) for row in rows], indent=2))
+    else:
+        print(format_text(columns, rows))
+        print(f'\n{len(rows)} rows in {elapsed_ms:.1f} ms')
+
+
+if __name__ == "__main__":
+    main()
@@ -14,9 +14,7 @@ It checks for things like:
 import os
 import re
 import sys
-import yaml
 import argparse
-from pathlib import Path
 from colorama import Fore, Style, init
 
 # Initialize colorama
@@ -78,6 +76,7 @@ ETHICAL_GUIDELINES = {
     ]
 }
 
+
 def check_file(filepath):
     """Check a file for ethical considerations"""
     if not os.path.isfile(filepath):
@@ -99,7 +98,7 @@ def check_file(filepath):
                         line_start = content.rfind('\n', 0, match.start()) + 1
                         line = content[line_start:content.find('\n', match.start())]
                         
-                        if line.strip().startswith('#') or line.strip().startswith('//') or line.strip().startswith('/*'):
+                        if line.strip().startswith(('#', '//', '/*')):
                             continue
                             
                         if category == "ethical_tags" and name == "missing_ethical_tag":
@@ -121,7 +120,8 @@ def check_file(filepath):
             
             # Check for missing ethical considerations
             if file_ext in ['.py', '.yml', '.yaml', '.tf', '.sh']:
-                has_ethical_comment = re.search(r'ethical|privacy|security|accessibility|fairness|sustainability', content, re.IGNORECASE)
+                has_ethical_comment = re.search(r'ethical|privacy|security|accessibility|fairness|sustainability',
+                                                content, re.IGNORECASE)
                 if not has_ethical_comment:
                     issues.append({
                         'file': filepath,
@@ -144,6 +144,7 @@ def check_file(filepath):
     
     return issues
 
+
 def print_issue(issue):
     """Print an issue with colors"""
     color = Fore.RED if issue['severity'] == 'high' else (Fore.YELLOW if issue['severity'] == 'medium' else Fore.BLUE)
@@ -153,6 +154,7 @@ def print_issue(issue):
     print(f"  {issue['snippet']}")
     print()
 
+
 def print_guidance(file_ext):
     """Print ethical coding guidance for a file type"""
     if file_ext not in ETHICAL_GUIDELINES:
@@ -162,6 +164,7 @@ def print_guidance(file_ext):
     for guideline in ETHICAL_GUIDELINES[file_ext]:
         print(f"  - {guideline}")
 
+
 def main():
     parser = argparse.ArgumentParser(description='Check code for ethical considerations')
     parser.add_argument('files', nargs='*', help='Files to check')
@@ -227,11 +230,13 @@ def main():
         print(f"\n{Fore.RED}✖ Ethical check failed. Please address the high severity issues.{Style.RESET_ALL}")
         return 1
     elif medium_count > 0:
-        print(f"\n{Fore.YELLOW}⚠ Ethical check passed with warnings. Consider addressing the medium severity issues.{Style.RESET_ALL}")
+        print(f"\n{Fore.YELLOW}⚠ Ethical check passed with warnings. "
+              f"Consider addressing the medium severity issues.{Style.RESET_ALL}")
         return 0
     else:
         print(f"\n{Fore.GREEN}✓ Ethical check passed!{Style.RESET_ALL}")
         return 0
 
+
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
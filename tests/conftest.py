@@ -0,0 +1,35 @@
+"""Shared fixtures for the functional tests of the repository scripts."""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(name, relative_path):
+    """Import a script by path, registering it so process pools can pickle its functions"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+@pytest.fixture(scope='session')
+def backup_validator():
+    return load_script('backup_validator', 'ansible/scripts/backup-validator.py')
+
+
+@pytest.fixture(scope='session')
+def security_check():
+    pytest.importorskip('ansible.module_utils.basic')
+    return load_script('security_check', 'ansible/roles/core/security/library/security_check.py')
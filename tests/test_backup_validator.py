@@ -0,0 +1,681 @@
+"""Functional tests for ansible/scripts/backup-validator.py."""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import REPO_ROOT
+
+VALIDATOR = os.path.join(REPO_ROOT, 'ansible/scripts/backup-validator.py')
+
+MYSQL_DUMP = b"""-- MySQL dump 10.13  Distrib 8.0.36
+CREATE TABLE `users` (
+  `id` int NOT NULL,
+  `email` varchar(255)
+) ENGINE=InnoDB;
+INSERT INTO `users` VALUES (1,'alice@example.com'),(2,'bob@example.com'),(3,'carol@example.com');
+INSERT INTO `orders` VALUES
+(1,2),
+(2,3);
+-- Dump completed on 2024-01-01  0:00:00
+"""
+
+PG_DUMP = b"""--
+-- PostgreSQL database dump
+--
+CREATE TABLE public.users (
+    id integer NOT NULL
+);
+COPY public.users (id, email) FROM stdin;
+1\talice@example.com
+2\tbob@example.com
+\\.
+-- PostgreSQL database dump complete
+"""
+
+
+def make_tar(path, members, mode='w'):
+    """Write a tar archive of {name: bytes} members"""
+    with tarfile.open(path, mode) as t:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            t.addfile(info, io.BytesIO(data))
+    return str(path)
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        for name, data in members.items():
+            z.writestr(name, data)
+    return str(path)
+
+
+@pytest.fixture
+def tar_backup(tmp_path):
+    return make_tar(tmp_path / 'files.tar', {
+        'data/a.txt': b'a' * 10000,
+        'data/b.csv': b'id,name\n1,x\n',
+    })
+
+
+# Streaming pass
+
+def test_stream_tar_lists_members_and_hashes(backup_validator, tar_backup):
+    scan = backup_validator.stream_backup(tar_backup, algorithms=('sha256', 'md5'))
+
+    with open(tar_backup, 'rb') as f:
+        data = f.read()
+    assert scan['error'] is None
+    assert scan['checksum'] == hashlib.sha256(data).hexdigest()
+    assert scan['checksums']['md5'] == hashlib.md5(data).hexdigest()
+    assert 'data/a.txt' in scan['members']
+    assert scan['members'].has_dir('data')
+    assert len(scan['members']) == 2
+
+
+def test_stream_truncated_tgz_reports_error(backup_validator, tmp_path):
+    tgz = make_tar(tmp_path / 'files.tar.gz', {'a.bin': os.urandom(200000)}, mode='w:gz')
+    with open(tgz, 'rb') as f:
+        data = f.read()
+    with open(tgz, 'wb') as f:
+        f.write(data[:len(data) // 2])
+
+    scan = backup_validator.stream_backup(tgz)
+
+    assert scan['error']
+
+
+def test_stream_sql_analyses_dump(backup_validator, tmp_path):
+    path = tmp_path / 'db.sql.gz'
+    path.write_bytes(gzip.compress(MYSQL_DUMP))
+
+    scan = backup_validator.stream_backup(str(path))
+
+    assert scan['error'] is None
+    assert scan['sql']['tables'] == {'users': 3, 'orders': 2}
+    assert scan['checksum'] == hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_validate_backup_reads_once(backup_validator, tar_backup):
+    results = backup_validator.validate_backup(tar_backup, check_content=True)
+
+    assert results['status'] == 'valid'
+    assert results['type'] == 'files'
+    assert results['content_checks']['file_count'] == 2
+    assert results['throughput']['bytes'] == os.path.getsize(tar_backup)
+
+
+# Hashing engine
+
+def test_calculate_checksums_in_one_read(backup_validator, tmp_path):
+    path = tmp_path / 'blob.bin'
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    path.write_bytes(data)
+
+    digests, read = backup_validator.calculate_checksums(str(path), ['sha256', 'md5', 'blake2b'])
+
+    assert digests == {name: hashlib.new(name, data).hexdigest() for name in ['sha256', 'md5', 'blake2b']}
+    assert read['bytes'] == len(data)
+    assert backup_validator.calculate_checksum(str(path)) == hashlib.sha256(data).hexdigest()
+
+
+def test_verify_checksum_file(backup_validator, tar_backup):
+    with open(tar_backup, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    with open(tar_backup + '.sha256', 'w') as f:
+        f.write(f'{digest}  files.tar\n')
+
+    assert backup_validator.verify_checksum_file(tar_backup) == {'verified': True}
+    assert backup_validator.verify_checksum_file(tar_backup, '0' * 64)['reason'] == 'Checksum mismatch'
+
+
+def test_parse_algorithms_rejects_unknown_digests(backup_validator):
+    assert backup_validator.parse_algorithms('sha256, md5') == ['sha256', 'md5']
+    with pytest.raises(ValueError, match='Unsupported hash algorithm: crc32'):
+        backup_validator.parse_algorithms('sha256,crc32')
+
+
+# Directory scheduling
+
+def test_admit_next_prefers_small_files_when_large_slots_are_full(backup_validator):
+    large, small = deque([0, 1]), deque([2, 3])
+
+    assert backup_validator._admit_next(large, small, 0, 2) == (0, True)
+    assert backup_validator._admit_next(large, small, 2, 2) == (2, False)
+    assert backup_validator._admit_next(large, small, 1, 2) == (1, True)
+    assert backup_validator._admit_next(large, small, 2, 2) == (3, False)
+    assert backup_validator._admit_next(large, small, 0, 2) == (None, False)
+
+
+def test_directory_pool_limits_large_reads_without_idle_workers(backup_validator, tmp_path, monkeypatch):
+    for n in range(4):
+        (tmp_path / f'large{n}.tar').write_bytes(b'x' * 1000)
+    for n in range(8):
+        (tmp_path / f'small{n}.tar').write_bytes(b'x' * 10)
+
+    lock = threading.Lock()
+    running = {'large': 0, 'all': 0}
+    peak = {'large': 0, 'all': 0}
+
+    def fake_validate(filepath, backup_type, check_content, ethical_check, **options):
+        kind = 'large' if 'large' in filepath else 'small'
+        with lock:
+            running['all'] += 1
+            running['large'] += kind == 'large'
+            peak['all'] = max(peak['all'], running['all'])
+            peak['large'] = max(peak['large'], running['large'])
+        time.sleep(0.05 if kind == 'large' else 0.02)
+        with lock:
+            running['all'] -= 1
+            running['large'] -= kind == 'large'
+        return {'file': filepath, 'status': 'valid'}
+
+    # Threads share the monkeypatched module, unlike worker processes
+    monkeypatch.setattr(backup_validator, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setattr(backup_validator, 'validate_backup', fake_validate)
+
+    results = backup_validator.validate_backup_directory(str(tmp_path), workers=4, max_large_reads=2,
+                                                         large_file_size=100)
+
+    assert results['valid_count'] == 12
+    assert [os.path.basename(r['file']) for r in results['files']] == sorted(os.listdir(tmp_path))
+    assert peak == {'large': 2, 'all': 4}
+
+
+# Validation cache
+
+def test_cache_hit_drops_timings(backup_validator, tmp_path, tar_backup):
+    cache_path = str(tmp_path / 'cache.db')
+
+    first = backup_validator.validate_backup(tar_backup, cache_path=cache_path)
+    second = backup_validator.validate_backup(tar_backup, cache_path=cache_path)
+
+    assert first['throughput'] is not None
+    assert 'cached' not in first
+    assert second['cached']
+    assert second['throughput'] is None
+    assert second['checksum'] == first['checksum']
+
+
+def test_cache_misses_on_changed_file_or_options(backup_validator, tmp_path, tar_backup):
+    cache_path = str(tmp_path / 'cache.db')
+    backup_validator.validate_backup(tar_backup, cache_path=cache_path)
+
+    assert 'cached' not in backup_validator.validate_backup(tar_backup, check_content=True, cache_path=cache_path)
+
+    make_tar(tar_backup, {'data/c.txt': b'c' * 500})
+    os.utime(tar_backup, ns=(0, 10 ** 9))
+    changed = backup_validator.validate_backup(tar_backup, cache_path=cache_path)
+
+    assert 'cached' not in changed
+    assert changed['checksum'] == hashlib.sha256((tmp_path / 'files.tar').read_bytes()).hexdigest()
+
+
+def test_cache_skips_errors_and_stale_entries(backup_validator, tmp_path):
+    cache_path = str(tmp_path / 'cache.db')
+    broken = tmp_path / 'broken.tar.gz'
+    broken.write_bytes(gzip.compress(b'x' * 2048)[:-8])
+    good = make_tar(tmp_path / 'good.tar', {'a.txt': b'a'})
+
+    backup_validator.validate_backup(str(broken), cache_path=cache_path)
+    backup_validator.validate_backup(good, cache_path=cache_path)
+
+    assert 'cached' not in backup_validator.validate_backup(str(broken), cache_path=cache_path)
+    assert 'cached' not in backup_validator.validate_backup(good, cache_path=cache_path,
+                                                            revalidate_older_than=-1)
+
+
+# SQL analysis
+
+def test_analyse_mysqldump_extended_inserts(backup_validator):
+    analysis = backup_validator.analyse_sql_stream(io.BytesIO(MYSQL_DUMP))
+
+    assert analysis['db_type'] == 'mysql'
+    assert analysis['sql_syntax_found']
+    assert analysis['trailer_found']
+    assert analysis['table_count'] == 1
+    assert analysis['tables'] == {'users': 3, 'orders': 2}
+    assert analysis['row_count'] == 5
+
+
+def test_analyse_pg_copy_blocks(backup_validator):
+    analysis = backup_validator.analyse_sql_stream(io.BytesIO(PG_DUMP))
+
+    assert analysis['db_type'] == 'postgresql'
+    assert analysis['trailer_found']
+    assert analysis['tables'] == {'public.users': 2}
+    assert analysis['row_count'] == 2
+
+
+def test_analyse_dump_without_trailer(backup_validator):
+    analysis = backup_validator.analyse_sql_stream(io.BytesIO(MYSQL_DUMP.rsplit(b'-- Dump', 1)[0]))
+
+    assert not analysis['trailer_found']
+    assert analysis['row_count'] == 5
+
+
+# Format detection
+
+def test_sniff_plain_containers(backup_validator, tmp_path, tar_backup):
+    zip_path = make_zip(tmp_path / 'files.zip', {'a.txt': b'a'})
+    sql_path = tmp_path / 'db.sql'
+    sql_path.write_bytes(MYSQL_DUMP)
+
+    assert backup_validator.sniff_backup_format(tar_backup) == {'compression': None, 'container': 'tar'}
+    assert backup_validator.sniff_backup_format(zip_path) == {'compression': None, 'container': 'zip'}
+    assert backup_validator.sniff_backup_format(str(sql_path)) == {'compression': None, 'container': 'sql'}
+
+
+def test_sniff_uses_content_over_suffix(backup_validator, tmp_path):
+    tgz = make_tar(tmp_path / 'nightly.bin', {'a.txt': b'a'}, mode='w:gz')
+    sql_gz = tmp_path / 'db.backup'
+    sql_gz.write_bytes(gzip.compress(MYSQL_DUMP))
+
+    assert backup_validator.sniff_backup_format(tgz) == {'compression': 'gzip', 'container': 'tar'}
+    assert backup_validator.sniff_backup_format(str(sql_gz)) == {'compression': 'gzip', 'container': 'sql'}
+
+
+def test_sniff_falls_back_to_suffix_for_empty_files(backup_validator, tmp_path):
+    empty = tmp_path / 'empty.tar.gz'
+    empty.write_bytes(b'')
+
+    assert backup_validator.sniff_backup_format(str(empty)) == {'compression': 'gzip', 'container': 'tar'}
+
+
+# Missing decompressors
+
+@pytest.fixture
+def zstd_without_decompressor(backup_validator, tmp_path, monkeypatch):
+    monkeypatch.setattr(backup_validator, 'EXTERNAL_DECOMPRESSORS', {})
+    monkeypatch.setattr(backup_validator, 'zstandard', None)
+    path = tmp_path / 'files.tar.zst'
+    path.write_bytes(b'\x28\xb5\x2f\xfd' + os.urandom(1024))
+    return str(path)
+
+
+def test_unchecked_content_is_a_warning(backup_validator, zstd_without_decompressor, tmp_path):
+    cache_path = str(tmp_path / 'cache.db')
+
+    results = backup_validator.validate_backup(zstd_without_decompressor, cache_path=cache_path)
+
+    assert results['status'] == 'warning'
+    assert 'decompressor unavailable' in results['warning']
+    assert results['checksum'] is not None
+    assert 'cached' not in backup_validator.validate_backup(zstd_without_decompressor, cache_path=cache_path)
+
+
+def test_unchecked_content_fails_content_checks(backup_validator, zstd_without_decompressor):
+    for options in ({'check_content': True}, {'restore_test': True}):
+        results = backup_validator.validate_backup(zstd_without_decompressor, **options)
+
+        assert results['status'] == 'error'
+        assert 'decompressor unavailable' in results['error']
+
+
+# Restore test
+
+def test_restore_test_names_corrupt_tar_header(backup_validator, tmp_path):
+    path = make_tar(tmp_path / 'files.tar', {'first.txt': b'x' * 100, 'second.txt': b'y' * 100})
+    # The second header follows the first header and its single data block
+    with open(path, 'r+b') as f:
+        f.seek(2 * tarfile.BLOCKSIZE)
+        f.write(b'\xff' * tarfile.BLOCKSIZE)
+
+    restore = backup_validator.stream_backup(path, restore_test=True)['restore_test']
+
+    assert restore['status'] == 'failed'
+    assert restore['members_tested'] == 1
+    assert restore['first_corrupt_member']['name'] == 'header after first.txt'
+    assert restore['first_corrupt_member']['offset'] == 2 * tarfile.BLOCKSIZE
+
+
+def test_restore_test_passes_intact_tar(backup_validator, tar_backup):
+    restore = backup_validator.stream_backup(tar_backup, restore_test=True)['restore_test']
+
+    assert restore['status'] == 'passed'
+    assert restore['members_tested'] == 2
+    assert restore['bytes_restored'] == 10000 + 12
+
+
+def test_stream_zip_members_and_restore_test(backup_validator, tmp_path):
+    path = make_zip(tmp_path / 'files.zip', {'docs/a.txt': b'a' * 5000, 'docs/b.txt': b'b'})
+
+    scan = backup_validator.stream_backup(path, restore_test=True)
+
+    assert scan['error'] is None
+    assert 'docs/a.txt' in scan['members']
+    assert scan['restore_test']['status'] == 'passed'
+    assert scan['restore_test']['bytes_restored'] == 5001
+
+
+def test_failed_restore_test_fails_validation(backup_validator, tmp_path):
+    path = make_tar(tmp_path / 'files.tar', {'first.txt': b'x' * 100, 'second.txt': b'y' * 100})
+    with open(path, 'r+b') as f:
+        f.seek(2 * tarfile.BLOCKSIZE)
+        f.write(b'\xff' * tarfile.BLOCKSIZE)
+
+    results = backup_validator.validate_backup(path, restore_test=True)
+
+    assert results['status'] == 'error'
+    assert results['error'].startswith('Restore test failed at header after first.txt')
+
+
+# Merkle manifests
+
+def test_manifest_round_trip(backup_validator, tmp_path):
+    path = tmp_path / 'blob.bin'
+    data = os.urandom(10000)
+    path.write_bytes(data)
+    hasher = backup_validator.BlockHasher(4096)
+    hasher.update(data)
+
+    manifest = backup_validator.build_manifest(str(path), hasher)
+    backup_validator.write_json_atomic(str(path) + backup_validator.MANIFEST_SUFFIX, manifest)
+    loaded = backup_validator.load_manifest(str(path))
+
+    assert loaded == manifest
+    assert len(manifest['blocks']) == 3
+    assert manifest['blocks'][0] == hashlib.sha256(data[:4096]).hexdigest()
+    assert backup_validator.verify_manifest(str(path), loaded, hasher.digests())['verified']
+    assert backup_validator.verify_manifest(str(path), loaded, workers=2)['verified']
+
+
+def test_manifest_detects_flipped_byte(backup_validator, tmp_path):
+    path = tmp_path / 'blob.bin'
+    data = bytearray(os.urandom(10000))
+    path.write_bytes(bytes(data))
+    hasher = backup_validator.BlockHasher(4096)
+    hasher.update(data)
+    manifest = backup_validator.build_manifest(str(path), hasher)
+
+    data[5000] ^= 0xff
+    path.write_bytes(bytes(data))
+    result = backup_validator.verify_manifest(str(path), manifest, workers=2)
+
+    assert not result['verified']
+    assert result['reason'] == 'Checksum mismatch'
+    assert result['mismatched_blocks'] == [1]
+
+
+def test_load_manifest_ignores_unreadable_manifest(backup_validator, tmp_path):
+    path = tmp_path / 'blob.bin'
+    path.write_bytes(b'data')
+    (tmp_path / ('blob.bin' + backup_validator.MANIFEST_SUFFIX)).write_text('{"version": 99}')
+
+    assert backup_validator.load_manifest(str(path)) is None
+
+
+def test_failed_verification_keeps_manifest(backup_validator, tmp_path):
+    path = make_tar(tmp_path / 'files.tar', {'a.bin': os.urandom(20000)})
+    manifest_path = path + backup_validator.MANIFEST_SUFFIX
+
+    first = backup_validator.validate_backup(path, write_manifest=True, block_size=4096)
+    assert first['status'] != 'error'
+    with open(manifest_path) as f:
+        original = json.load(f)
+
+    # Corrupt member data; the archive itself still parses
+    with open(path, 'r+b') as f:
+        f.seek(tarfile.BLOCKSIZE + 10000)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xff]))
+    second = backup_validator.validate_backup(path, write_manifest=True, block_size=4096)
+
+    assert second['status'] == 'error'
+    assert second['error'] == 'Manifest verification failed: Checksum mismatch'
+    assert second['manifest_verification']['mismatched_blocks'] == [2]
+    with open(manifest_path) as f:
+        assert json.load(f) == original
+
+
+def flip_member_byte(path):
+    with open(path, 'r+b') as f:
+        f.seek(tarfile.BLOCKSIZE + 10000)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xff]))
+
+
+def test_manifest_only_skips_the_streaming_pass(backup_validator, tmp_path, monkeypatch):
+    path = make_tar(tmp_path / 'files.tar', {'a.bin': os.urandom(20000)})
+    backup_validator.validate_backup(path, write_manifest=True, block_size=4096)
+
+    def no_stream(*args, **kwargs):
+        raise AssertionError('streamed')
+    monkeypatch.setattr(backup_validator, 'stream_backup', no_stream)
+
+    full = backup_validator.validate_backup(path, manifest_only=True)
+    sampled = backup_validator.validate_backup(path, sample_blocks=2)
+    flip_member_byte(path)
+    corrupt = backup_validator.validate_backup(path, manifest_only=True)
+
+    assert full['status'] == 'valid'
+    assert full['checksum'] is None
+    assert full['manifest_verification']['blocks_checked'] == 8
+    assert sampled['manifest_verification']['sampled']
+    assert sampled['manifest_verification']['blocks_checked'] == 2
+    assert corrupt['status'] == 'error'
+    assert corrupt['manifest_verification']['mismatched_blocks'] == [2]
+
+
+def test_sample_blocks_falls_back_to_a_full_read(backup_validator, tmp_path, caplog):
+    path = make_tar(tmp_path / 'files.tar', {'a.bin': os.urandom(20000)})
+
+    unmanifested = backup_validator.validate_backup(path, sample_blocks=2)
+    backup_validator.validate_backup(path, write_manifest=True, block_size=4096)
+    content = backup_validator.validate_backup(path, sample_blocks=2, check_content=True)
+
+    assert unmanifested['checksum'] is not None
+    assert content['content_checks']['file_count'] == 1
+    assert content['manifest_verification']['blocks_checked'] == 8
+    assert 'sampled' not in content['manifest_verification']
+    assert [r.getMessage().split(': ')[1] for r in caplog.records if r.getMessage().startswith('Reading')] == [
+        'it has no manifest', 'content checks need the streaming pass']
+
+
+# Encryption detection
+
+def test_detect_encryption_from_headers(backup_validator, tmp_path):
+    for name, head, scheme in [('a.gpg', b'-----BEGIN PGP MESSAGE-----\n', 'gpg'),
+                               ('b.age', b'age-encryption.org/v1\n', 'age'),
+                               ('c.enc', b'Salted__12345678', 'openssl')]:
+        (tmp_path / name).write_bytes(head + b'\0' * 64)
+
+        assert backup_validator.detect_encryption(str(tmp_path / name)) == {
+            'encrypted': True, 'method': 'header', 'scheme': scheme}
+
+
+def test_detect_encryption_from_entropy(backup_validator, tmp_path):
+    ciphertext = tmp_path / 'backup.bin'
+    ciphertext.write_bytes(b'\x85' + os.urandom(200000))
+    text = tmp_path / 'notes.gpg'
+    text.write_bytes(b'not really encrypted\n' * 10000)
+
+    gpg = backup_validator.detect_encryption(str(ciphertext))
+    plain = backup_validator.detect_encryption(str(text))
+
+    assert (gpg['encrypted'], gpg['method'], gpg['scheme']) == (True, 'header', 'gpg')
+    assert (plain['encrypted'], plain['method']) == (False, 'entropy')
+    assert backup_validator.validate_backup(str(text), ethical_check=True)['ethical_checks'][
+        'encryption_suffix_mismatch']
+
+
+def test_compressed_and_tiny_files_are_not_encrypted(backup_validator, tmp_path, tar_backup):
+    tgz = tmp_path / 'random.gz'
+    tgz.write_bytes(gzip.compress(os.urandom(100000)))
+    tiny = tmp_path / 'tiny.bin'
+    tiny.write_bytes(os.urandom(100))
+
+    assert backup_validator.detect_encryption(str(tgz))['method'] == 'format'
+    assert backup_validator.detect_encryption(tar_backup)['method'] == 'format'
+    assert backup_validator.detect_encryption(str(tiny)) == {'encrypted': False, 'method': 'too_small', 'scheme': None}
+
+
+# PII scanning
+
+@pytest.fixture
+def synchronous_pool():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        yield pool
+
+
+def test_pii_scanner_cuts_batches_at_line_ends(backup_validator, synchronous_pool):
+    line = b'contact alice@example.com today\n'
+    count = backup_validator.PII_CHUNK_SIZE // len(line) * 3
+    scanner = backup_validator.PiiScanner(synchronous_pool, 1)
+    for start in range(0, count, 1000):
+        scanner.feed('users', line * min(1000, count - start))
+
+    summary = scanner.summary()
+
+    assert summary['totals'] == {'email': count}
+    assert summary['by_key'] == {'users': {'email': count}}
+    assert summary['bytes_scanned'] == count * len(line)
+
+
+def test_pii_scanner_caps_listed_keys(backup_validator, synchronous_pool, monkeypatch):
+    monkeypatch.setattr(backup_validator, 'PII_MAX_KEYS', 3)
+    scanner = backup_validator.PiiScanner(synchronous_pool, 1)
+    for i in range(5):
+        scanner.feed(f'member{i}', b'bob@example.com\n')
+
+    summary = scanner.summary()
+
+    assert summary['totals'] == {'email': 5}
+    assert set(summary['by_key']) == {'member0', 'member1', 'member2', '(other)'}
+    assert summary['by_key']['(other)'] == {'email': 2}
+    assert summary['keys_not_listed'] == 2
+
+
+def test_pii_scanner_stops_at_budget(backup_validator, synchronous_pool):
+    scanner = backup_validator.PiiScanner(synchronous_pool, 1, budget=20)
+
+    assert scanner.feed('a', b'x' * 15)
+    assert scanner.feed('a', b'x' * 15)
+    assert not scanner.feed('a', b'x')
+    assert scanner.summary()['budget_exhausted']
+
+
+def test_pii_scan_of_sql_dump_counts_by_table(backup_validator, tmp_path):
+    path = tmp_path / 'db.sql'
+    path.write_bytes(MYSQL_DUMP)
+
+    results = backup_validator.validate_backup(str(path), pii_scan=True)
+
+    assert results['pii_scan']['totals'] == {'email': 3}
+    assert results['pii_scan']['by_table'] == {'users': {'email': 3}}
+
+
+# Streaming reports
+
+def test_directory_streams_results(backup_validator, tmp_path):
+    make_tar(tmp_path / 'one.tar', {'a.txt': b'a'})
+    make_tar(tmp_path / 'two.tar', {'b.txt': b'b'})
+    seen = []
+
+    results = backup_validator.validate_backup_directory(str(tmp_path), on_result=seen.append)
+
+    assert results['files_count'] == 2
+    assert results['files'] == []
+    assert sorted(os.path.basename(r['file']) for r in seen) == ['one.tar', 'two.tar']
+
+
+def test_ndjson_report_has_file_lines_and_summary(tmp_path):
+    backups = tmp_path / 'backups'
+    backups.mkdir()
+    make_tar(backups / 'one.tar', {'a.txt': b'a'})
+    make_tar(backups / 'two.tar', {'b.txt': b'b'})
+    report = tmp_path / 'report.ndjson'
+
+    subprocess.run([sys.executable, VALIDATOR, str(backups), '--no-cache', '--format', 'ndjson',
+                    '--output', str(report), '--workers', '2'], check=True, capture_output=True)
+    records = [json.loads(line) for line in report.read_text().splitlines()]
+
+    assert [r['record'] for r in records] == ['file', 'file', 'summary']
+    assert sorted(os.path.basename(r['file']) for r in records[:2]) == ['one.tar', 'two.tar']
+    assert 'validation_results' not in records[2]
+    assert (records[2]['summary']['valid_files'], records[2]['summary']['status']) == (2, 'all_valid')
+
+
+# Prometheus textfile
+
+def test_prometheus_textfile_format(backup_validator, tmp_path, tar_backup):
+    textfile = tmp_path / 'backups.prom'
+    result = backup_validator.validate_backup(tar_backup)
+
+    samples = backup_validator.prometheus_samples(result)
+    samples += backup_validator.prometheus_samples({'file': 'odd "name"\n.tar', 'status': 'error'})
+    backup_validator.write_prometheus_textfile(str(textfile), samples, {'valid': 1, 'error': 1})
+    lines = textfile.read_text().splitlines()
+
+    prefix = backup_validator.PROMETHEUS_PREFIX
+    assert f'# TYPE {prefix}_status gauge' in lines
+    assert f'{prefix}_status{{file="{tar_backup}",status="valid"}} 1' in lines
+    assert f'{prefix}_status{{file="odd \\"name\\"\\n.tar",status="error"}} 1' in lines
+    assert f'{prefix}_size_bytes{{file="{tar_backup}"}} {os.path.getsize(tar_backup)}' in lines
+    assert f'{prefix}_files{{status="warning"}} 0' in lines
+    assert any(line.startswith(f'{prefix}_last_run_timestamp_seconds ') for line in lines)
+    assert not os.path.exists(f'{textfile}.tmp')
+    assert oct(textfile.stat().st_mode & 0o777) == '0o644'
+
+
+def test_prometheus_carries_forward_existing_files(backup_validator, tmp_path):
+    kept = tmp_path / 'kept.tar'
+    failed = tmp_path / 'failed.tar'
+    rotated = tmp_path / 'rotated.tar'
+    for path in (kept, failed, rotated):
+        path.write_bytes(b'x')
+    textfile = str(tmp_path / 'backups.prom')
+
+    samples = []
+    for path in (kept, failed, rotated):
+        samples += backup_validator.prometheus_samples({'file': str(path), 'status': 'valid'})
+    backup_validator.write_prometheus_textfile(textfile, samples, {'valid': 3})
+
+    rotated.unlink()
+    samples = backup_validator.prometheus_samples({'file': str(failed), 'status': 'error'})
+    backup_validator.write_prometheus_textfile(textfile, samples, {'error': 1})
+    successes = backup_validator.previous_successes(textfile)
+
+    assert set(successes) == {str(kept), str(failed)}
+
+
+# Read bandwidth cap
+
+def test_token_bucket_sleeps_off_overdrafts(backup_validator):
+    mb = 1024 * 1024
+    bucket = backup_validator.TokenBucket(4 * mb)
+
+    start = time.monotonic()
+    bucket.consume(4 * mb)
+    assert time.monotonic() - start < 0.1
+    bucket.consume(mb)
+    assert time.monotonic() - start >= 0.2
+
+
+def test_read_cap_is_shared_by_worker_processes(backup_validator, tmp_path, monkeypatch):
+    mb = 1024 * 1024
+    for name in ('one.sql', 'two.sql'):
+        (tmp_path / name).write_bytes(MYSQL_DUMP + b'-- padding\n' * (3 * mb // 11))
+    monkeypatch.setattr(backup_validator, '_read_limiter', backup_validator.TokenBucket(4 * mb))
+
+    start = time.monotonic()
+    results = backup_validator.validate_backup_directory(str(tmp_path), workers=2)
+
+    # 6 MB against a 4 MB burst at 4 MB/s; separate buckets would not wait at all
+    assert time.monotonic() - start >= 0.4
+    assert results['files_count'] == 2
@@ -0,0 +1,61 @@
+"""Functional tests for ansible/scripts/backup-validator-bench.py."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import REPO_ROOT, load_script
+
+BENCH = os.path.join(REPO_ROOT, 'ansible/scripts/backup-validator-bench.py')
+
+
+@pytest.fixture(scope='module')
+def bench():
+    return load_script('backup_validator_bench', 'ansible/scripts/backup-validator-bench.py')
+
+
+def run_bench(corpus_dir, *args):
+    result = subprocess.run([sys.executable, BENCH, '--corpus-dir', str(corpus_dir), '--members', '4',
+                             '--member-kb', '4', '--tables', '2', '--rows', '50', '--repeat', '1',
+                             '--workers', '2', '--format', 'json', *args],
+                            capture_output=True, text=True)
+    return result.returncode, json.loads(result.stdout), result.stderr
+
+
+def test_bench_builds_corpus_once_and_compares_to_baseline(tmp_path):
+    corpus_dir = tmp_path / 'corpus'
+    baseline = tmp_path / 'baseline.json'
+
+    code, first, log = run_bench(corpus_dir, '--baseline', str(baseline), '--save-baseline')
+    assert code == 0
+    assert 'Generating' in log
+    assert sorted(os.listdir(corpus_dir)) == ['bench-db.sql', 'bench-db.sql.gz', 'bench.tar', 'bench.tar.gz',
+                                              'bench.zip', 'corpus.json']
+    assert first['results']['stream_backup[bench.tar]']['members_per_s']
+    assert first['results']['validate_database_backup[bench-db.sql]']['bytes'] == os.path.getsize(
+        corpus_dir / 'bench-db.sql')
+    assert 'directory[workers=2]' in first['results']
+
+    code, second, log = run_bench(corpus_dir, '--baseline', str(baseline), '--tolerance', '1000',
+                                  '--only', 'stream_backup')
+    assert code == 0
+    assert 'Generating' not in log
+    assert set(second['results']) == {name for name in first['results'] if name.startswith('stream_backup')}
+    assert all('change' in result for result in second['results'].values())
+
+
+def test_compare_flags_slowdowns_beyond_tolerance(bench):
+    baseline = {'results': {'fast': {'seconds': 1.0, 'mb_per_s': 100.0},
+                            'slow': {'seconds': 1.0, 'mb_per_s': 100.0},
+                            'timed': {'seconds': 1.0, 'mb_per_s': None}}}
+    results = {'fast': {'seconds': 0.9, 'mb_per_s': 110.0},
+               'slow': {'seconds': 2.0, 'mb_per_s': 50.0},
+               'timed': {'seconds': 2.0, 'mb_per_s': None},
+               'new': {'seconds': 1.0, 'mb_per_s': 1.0}}
+
+    assert bench.compare(results, baseline, 0.2) == ['slow', 'timed']
+    assert (results['fast']['change'], results['slow']['change'], results['timed']['change']) == (0.1, -0.5, -0.5)
+    assert 'change' not in results['new']
@@ -0,0 +1,544 @@
+"""Functional tests for the scan types of the security_check module.
+
+The module imports Ansible, so these tests are skipped where it is not installed.
+"""
+
+import gzip
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import REPO_ROOT
+
+MODULE = os.path.join(REPO_ROOT, 'ansible/roles/core/security/library/security_check.py')
+
+SSHD_CONFIG = """# Managed by Ansible
+PermitRootLogin yes
+PermitRootLogin no
+PasswordAuthentication yes # temporary
+ClientAliveInterval 300
+ClientAliveCountMax 3
+"""
+
+SS_OUTPUT = """Netid State  Recv-Q Send-Q Local Address:Port Peer Address:Port
+tcp   LISTEN 0      128    0.0.0.0:22         0.0.0.0:*
+tcp   LISTEN 0      128    127.0.0.1:5432     0.0.0.0:*
+tcp   LISTEN 0      128    [::]:3306          [::]:*
+udp   UNCONN 0      0      *:123              *:*
+"""
+
+SHADOW = """root:$6$salt$hash:19000:0:99999:7:::
+alice:$y$j9T$salt$hash:19000:1:90:14:::
+bob:$1$salt$hash:19000:0:60:7:::
+carol:abcdefghijklm:19000:0:30:7:::
+legacy:$5$salt$hash:19000:0:45:7:::
+nopass::19000:0:99999:7:::
+daemon:*:19000:0:99999:7:::
++nisuser::::::::
+"""
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def failed_login(timestamp, user='admin', source='203.0.113.5'):
+    return (f'{timestamp} host sshd[100]: Failed password for invalid user {user} '
+            f'from {source} port 40000 ssh2\n')
+
+
+def run_module(tmp_path, **args):
+    """Run the module as Ansible would, returning its JSON result"""
+    args_path = tmp_path / 'args.json'
+    args_path.write_text(json.dumps({'ANSIBLE_MODULE_ARGS': args}))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    output = subprocess.run([sys.executable, MODULE, str(args_path)], check=True, capture_output=True, text=True,
+                            cwd=tmp_path, env=env).stdout
+    return json.loads(output)
+
+
+# Rule catalog
+
+def test_compile_rules_expands_matrix(security_check):
+    rules = security_check.RULE_INDEX[('kernel', 'minimal')]
+
+    assert 'kernel_sysctl_net.ipv4.conf.all.accept_source_route' in {rule['id'] for rule in rules}
+    assert all(rule['scan_type'] == 'kernel' for rule in rules)
+
+
+def test_compile_rules_rejects_incomplete_rules(security_check):
+    with pytest.raises(ValueError, match='custom_rule is missing keys: severity'):
+        security_check.compile_rules([{
+            'id': 'custom_rule', 'scan_type': 'config', 'fact': 'port', 'op': 'ne', 'value': '22',
+            'description': 'd', 'recommendation': 'r', 'ethical_impact': 'e', 'standard': 'NIST AC-17'
+        }])
+
+
+def test_compile_rules_rejects_unknown_operators(security_check):
+    with pytest.raises(ValueError, match='unknown operator: matches'):
+        security_check.compile_rules([{
+            'id': 'custom_rule', 'scan_type': 'config', 'fact': 'port', 'op': 'matches', 'value': '22',
+            'severity': 'low', 'description': 'd', 'recommendation': 'r', 'ethical_impact': 'e',
+            'standard': 'NIST AC-17'
+        }])
+
+
+def test_load_rule_catalog_extends_builtin_rules(security_check, tmp_path):
+    path = write(tmp_path / 'rules.json', json.dumps([{
+        'id': 'ssh_port', 'scan_type': 'config', 'levels': ['strict'], 'fact': 'port', 'op': 'ne',
+        'value': '22', 'severity': 'low', 'description': 'SSH listens on port {item}',
+        'recommendation': 'Document the port', 'ethical_impact': 'None', 'standard': 'NIST CM-7'
+    }]))
+    target = write(tmp_path / 'sshd_config',
+                   'Port 2222\nPermitRootLogin no\nProtocol 2\nClientAliveInterval 300\nClientAliveCountMax 2\n')
+
+    index = security_check.load_rule_catalog(path)
+    issues = security_check.check_ssh_config(target, 'strict', ['nist'], index)
+
+    assert len(index[('config', 'strict')]) == len(security_check.RULE_INDEX[('config', 'strict')]) + 1
+    assert [issue['rule'] for issue in issues] == ['ssh_port']
+    assert issues[0]['description'] == 'SSH listens on port 2222'
+
+
+def test_load_rule_catalog_requires_a_list(security_check, tmp_path):
+    path = write(tmp_path / 'rules.json', '{"id": "ssh_port"}')
+
+    with pytest.raises(ValueError, match='must contain a list of rules'):
+        security_check.load_rule_catalog(path)
+
+
+# SSH configuration
+
+def test_parse_sshd_config_keeps_first_value(security_check, tmp_path):
+    directives = security_check.parse_sshd_config(write(tmp_path / 'sshd_config', SSHD_CONFIG))
+
+    assert directives['permitrootlogin'] == 'yes'
+    assert directives['passwordauthentication'] == 'yes'
+    assert directives['clientalive_timeout'] == 900
+
+
+def test_check_ssh_config_by_level(security_check, tmp_path):
+    target = write(tmp_path / 'sshd_config', SSHD_CONFIG)
+
+    minimal = {issue['rule'] for issue in security_check.check_ssh_config(target, 'minimal', ['cis'])}
+    strict = {issue['rule'] for issue in security_check.check_ssh_config(target, 'strict', ['cis'])}
+
+    assert minimal == {'ssh_permit_root_login'}
+    assert strict == {'ssh_permit_root_login', 'ssh_password_authentication'}
+
+
+def test_check_ssh_config_reports_unreadable_file(security_check, tmp_path):
+    issues = security_check.check_ssh_config(str(tmp_path / 'missing'), 'standard', ['cis'])
+
+    assert len(issues) == 1
+    assert issues[0]['description'].startswith('Error checking SSH config')
+
+
+# File permissions
+
+def test_check_file_permissions(security_check, tmp_path):
+    target = write(tmp_path / 'tool', '')
+    os.chmod(target, 0o4777)
+
+    standard = {issue['rule'] for issue in security_check.check_file_permissions(target, 'standard')}
+    strict = {issue['rule'] for issue in security_check.check_file_permissions(target, 'strict')}
+
+    assert standard == {'perm_world_writable'}
+    assert strict == {'perm_world_writable', 'perm_suid_sgid'}
+
+    os.chmod(target, stat.S_IRUSR | stat.S_IWUSR)
+    assert security_check.check_file_permissions(target, 'strict') == []
+
+
+# Authentication log
+
+def test_analyze_auth_log_counts_failures(security_check, tmp_path):
+    lines = [failed_login('2024-01-01T10:00:00', source='203.0.113.5') for _ in range(3)]
+    lines.append(failed_login('2024-01-01T10:00:01', user='root', source='198.51.100.7'))
+    lines.append('2024-01-01T10:00:02 host sshd[101]: Accepted publickey for alice from 192.0.2.1\n')
+    path = write(tmp_path / 'auth.log', ''.join(lines))
+
+    summary = security_check.analyze_auth_log(path)
+
+    assert summary['lines_scanned'] == 5
+    assert summary['failed_logins'] == 4
+    assert summary['failed_root_logins'] == 1
+    assert summary['by_source'] == {'203.0.113.5': 3, '198.51.100.7': 1}
+    assert summary['by_user'] == {'admin': 3, 'root': 1}
+    assert 'window_start' not in summary
+
+
+def test_analyze_auth_log_reads_newest_lines(security_check, tmp_path):
+    lines = [failed_login('2024-01-01T10:00:00', source='203.0.113.5') for _ in range(5)]
+    lines += [failed_login('2024-01-01T11:00:00', source='198.51.100.7') for _ in range(2)]
+    path = write(tmp_path / 'auth.log', ''.join(lines))
+
+    summary = security_check.analyze_auth_log(path, max_lines=3)
+
+    assert summary['lines_scanned'] == 3
+    assert summary['by_source'] == {'198.51.100.7': 2, '203.0.113.5': 1}
+
+
+def test_analyze_auth_log_reads_rotated_logs(security_check, tmp_path):
+    path = write(tmp_path / 'auth.log', failed_login('2024-01-02T10:00:00') * 2)
+    write(tmp_path / 'auth.log.1', failed_login('2024-01-01T10:00:00') * 2)
+    with gzip.open(tmp_path / 'auth.log.2.gz', 'wt') as f:
+        f.write(failed_login('2023-12-31T10:00:00') * 2)
+
+    summary = security_check.analyze_auth_log(path, include_rotated=True)
+
+    assert summary['files'] == [path, f'{path}.1', f'{path}.2.gz']
+    assert summary['failed_logins'] == 6
+
+
+def test_analyze_auth_log_stops_before_older_logs(security_check, tmp_path, monkeypatch):
+    path = write(tmp_path / 'auth.log', failed_login('2024-01-02T10:00:00') * 3)
+    with gzip.open(tmp_path / 'auth.log.1.gz', 'wt') as f:
+        f.write(failed_login('2024-01-01T10:00:00') * 3)
+
+    def fail(path, limit):
+        raise AssertionError(f'{path} should not be read')
+
+    monkeypatch.setattr(security_check, 'read_lines_tail', fail)
+    summary = security_check.analyze_auth_log(path, max_lines=3, include_rotated=True)
+
+    assert summary['files'] == [path]
+    assert summary['lines_scanned'] == 3
+
+
+def test_analyze_auth_log_window(security_check, tmp_path):
+    now = datetime.now()
+    old = (now - timedelta(hours=2)).strftime('%Y-%m-%dT%H:%M:%S')
+    recent = (now - timedelta(minutes=5)).strftime('%Y-%m-%dT%H:%M:%S')
+    path = write(tmp_path / 'auth.log', failed_login(old) * 4 + failed_login(recent) * 2)
+
+    summary = security_check.analyze_auth_log(path, window=60)
+
+    assert summary['failed_logins'] == 2
+    assert 'window_start' in summary
+
+
+def test_check_auth_log_flags_root_attempts(security_check, tmp_path):
+    path = write(tmp_path / 'auth.log', failed_login('2024-01-01T10:00:00', user='root') * 11)
+
+    minimal, _ = security_check.check_auth_log(path, 'minimal')
+    strict, summary = security_check.check_auth_log(path, 'strict')
+
+    assert minimal == []
+    assert {issue['rule'] for issue in strict} == {'auth_failed_source_strict', 'auth_failed_root'}
+    assert summary['failed_root_logins'] == 11
+
+
+# Network
+
+def test_parse_listeners(security_check):
+    listeners = security_check.parse_listeners(SS_OUTPUT)
+
+    assert [(entry['proto'], entry['address'], entry['port']) for entry in listeners] == [
+        ('tcp', '0.0.0.0', '22'),
+        ('tcp', '127.0.0.1', '5432'),
+        ('tcp', '[::]', '3306'),
+        ('udp', '*', '123'),
+    ]
+
+
+def test_read_proc_listeners_finds_socket_owner(security_check):
+    if not os.path.exists('/proc/net/tcp'):
+        pytest.skip('/proc/net is not available')
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        port = str(sock.getsockname()[1])
+
+        listeners = [entry for entry in security_check.read_proc_listeners() if entry['port'] == port]
+        inode = listeners[0]['inode']
+        owners = security_check.index_socket_owners([inode])
+
+        assert [(entry['proto'], entry['address']) for entry in listeners] == [('tcp', '127.0.0.1')]
+        assert owners == {inode: (os.getpid(), sock.fileno())}
+        assert security_check.verify_socket_owners({str(inode): [os.getpid(), sock.fileno()]}, [inode]) == {
+            inode: (os.getpid(), sock.fileno())}
+
+        security_check.attribute_listeners(listeners)
+        assert listeners[0]['process']['pid'] == os.getpid()
+
+
+def test_read_proc_listeners_decodes_ipv6_wildcard(security_check):
+    if not socket.has_ipv6 or not os.path.exists('/proc/net/tcp6'):
+        pytest.skip('IPv6 is not available')
+    with socket.socket(socket.AF_INET6) as sock:
+        sock.bind(('::', 0))
+        sock.listen()
+        port = str(sock.getsockname()[1])
+
+        listeners = [entry for entry in security_check.read_proc_listeners() if entry['port'] == port]
+
+    assert [(entry['proto'], entry['address']) for entry in listeners] == [('tcp6', '::')]
+
+
+def test_check_network_security_flags_ipv6_wildcard(security_check, monkeypatch):
+    listeners = [
+        {'proto': 'tcp6', 'address': '::', 'port': '5432', 'inode': None},
+        {'proto': 'tcp', 'address': '[::]', 'port': '3306', 'inode': None},
+        {'proto': 'tcp', 'address': '0.0.0.0', 'port': '22', 'inode': None},
+        {'proto': 'tcp', 'address': '127.0.0.1', 'port': '8080', 'inode': None},
+    ]
+    monkeypatch.setattr(security_check, 'read_listeners', lambda: (listeners, 'procfs'))
+    monkeypatch.setattr(security_check, '_probe_firewall', lambda: 'active')
+
+    issues, _ = security_check.check_network_security('network', 'standard', attribute_processes=False)
+
+    assert sorted((issue['rule'], issue['port']) for issue in issues) == [
+        ('net_all_interfaces', '3306'), ('net_all_interfaces', '5432'),
+        ('net_sensitive_port_3306', '3306'), ('net_sensitive_port_5432', '5432')]
+
+
+# Baselines
+
+def test_baseline_reports_new_and_resolved_issues(security_check, tmp_path):
+    target = write(tmp_path / 'sshd_config', 'PermitRootLogin yes\n')
+    args = {'target': target, 'scan_type': 'config', 'baseline': str(tmp_path / 'baseline.json')}
+
+    first = run_module(tmp_path, **args)
+    write(tmp_path / 'sshd_config', 'PermitRootLogin no\nPasswordAuthentication yes\n')
+    second = run_module(tmp_path, **args)
+    third = run_module(tmp_path, **args)
+
+    assert first['baseline']['status'] == 'created'
+    assert [issue['rule'] for issue in first['baseline']['new']] == ['ssh_permit_root_login']
+    assert second['baseline']['status'] == 'compared'
+    assert [issue['rule'] for issue in second['baseline']['new']] == ['ssh_password_authentication']
+    assert [issue['rule'] for issue in second['baseline']['resolved']] == ['ssh_permit_root_login']
+    assert second['changed']
+    assert [issue['rule'] for issue in third['baseline']['unchanged']] == ['ssh_password_authentication']
+    assert third['baseline']['new'] == [] and third['baseline']['resolved'] == []
+    assert not third['changed']
+
+
+def test_load_baseline_discards_other_versions(security_check, tmp_path):
+    path = write(tmp_path / 'baseline.json', json.dumps({'version': 1, 'entries': {'config:x:standard': {}}}))
+
+    assert security_check.load_baseline(path) == {'version': security_check.BASELINE_VERSION, 'entries': {}}
+
+
+def test_network_baseline_reverifies_socket_owners(security_check, monkeypatch):
+    if not os.path.exists('/proc/net/tcp'):
+        pytest.skip('/proc/net is not available')
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.listen()
+        port = str(sock.getsockname()[1])
+        owner = [os.getpid(), sock.fileno()]
+        listeners = [entry for entry in security_check.read_proc_listeners() if entry['port'] == port]
+        monkeypatch.setattr(security_check, 'read_listeners', lambda: ([dict(entry) for entry in listeners], 'procfs'))
+        monkeypatch.setattr(security_check, '_probe_firewall', lambda: 'active')
+        baseline = {}
+
+        security_check.check_network_security('network', 'standard', baseline=baseline)
+
+        def rescan(inodes):
+            raise AssertionError('known socket owners should not be rescanned')
+
+        monkeypatch.setattr(security_check, 'index_socket_owners', rescan)
+        _, attributed = security_check.check_network_security('network', 'standard', baseline=baseline)
+
+    assert baseline['socket_owners'] == {str(listeners[0]['inode']): owner}
+    assert attributed[0]['process']['pid'] == os.getpid()
+
+
+# File integrity
+
+def test_scan_integrity_detects_changes(security_check, tmp_path):
+    root = tmp_path / 'bin'
+    root.mkdir()
+    write(root / 'tool', 'original')
+    write(root / 'old', 'removed later')
+    manifest = str(tmp_path / 'manifest.json')
+
+    created = security_check.scan_integrity([str(root)], manifest, workers=2)
+    unchanged = security_check.scan_integrity([str(root)], manifest, workers=2)
+    write(root / 'tool', 'tampered!')
+    write(root / 'new', 'added')
+    os.remove(root / 'old')
+    changed = security_check.scan_integrity([str(root)], manifest, workers=2)
+
+    assert created['status'] == 'created'
+    assert created['updated'] and created['hashed'] == 2
+    assert unchanged['status'] == 'compared'
+    assert unchanged['reused'] == 2 and unchanged['hashed'] == 0
+    assert not unchanged['updated']
+    assert changed['modified'] == [str(root / 'tool')]
+    assert changed['added'] == [str(root / 'new')]
+    assert changed['removed'] == [str(root / 'old')]
+    assert changed['complete']
+
+
+def test_scan_integrity_completes_manifest_after_timeout(security_check, tmp_path):
+    root = tmp_path / 'bin'
+    root.mkdir()
+    for name in ('a', 'b', 'c'):
+        write(root / name, name)
+    manifest = str(tmp_path / 'manifest.json')
+
+    created = security_check.scan_integrity([str(root)], manifest, deadline=time.monotonic() - 1)
+    completed = security_check.scan_integrity([str(root)], manifest)
+    write(root / 'b', 'tampered')
+    compared = security_check.scan_integrity([str(root)], manifest)
+
+    assert created['pending'] == 3 and not created['complete']
+    assert completed['added'] == [] and completed['hashed'] == 3
+    assert completed['updated'] and completed['complete']
+    assert compared['modified'] == [str(root / 'b')]
+    assert compared['added'] == [] and not compared['updated']
+    with open(manifest) as f:
+        assert json.load(f)['pending'] == []
+
+
+def test_scan_integrity_reports_unreadable_files(security_check, tmp_path, monkeypatch):
+    target = tmp_path / 'etc'
+    target.mkdir()
+    write(target / 'hosts', '127.0.0.1 localhost\n')
+    write(target / 'secret', 'hidden')
+    manifest = str(tmp_path / 'manifest.json')
+    hash_file = security_check.hash_file
+
+    def restricted(path):
+        if path.endswith('secret'):
+            raise PermissionError(13, 'Permission denied', path)
+        return hash_file(path)
+
+    monkeypatch.setattr(security_check, 'hash_file', restricted)
+    security_check.check_integrity(str(target), 'standard', manifest=manifest)
+    issues, summary = security_check.check_integrity(str(target), 'standard', manifest=manifest)
+
+    assert summary['unreadable'] == [str(target / 'secret')]
+    assert summary['pending'] == 0 and not summary['complete']
+    assert summary['added'] == []
+    assert [issue['rule'] for issue in issues] == ['integrity_unreadable']
+
+
+def test_check_integrity_reports_modified_files(security_check, tmp_path):
+    target = tmp_path / 'etc'
+    target.mkdir()
+    write(target / 'hosts', '127.0.0.1 localhost\n')
+    manifest = str(tmp_path / 'manifest.json')
+
+    security_check.check_integrity(str(target), 'standard', manifest=manifest)
+    write(target / 'hosts', '10.0.0.1 localhost\n')
+    issues, summary = security_check.check_integrity(str(target), 'standard', manifest=manifest)
+
+    assert [issue['rule'] for issue in issues] == ['integrity_modified']
+    assert summary['modified'] == [str(target / 'hosts')]
+
+
+# Kernel parameters
+
+def test_read_sysctls_from_root(security_check, tmp_path):
+    rules = security_check.applicable_rules(security_check.RULE_INDEX, 'kernel', 'standard', 'kernel')
+    expected = {rule['fact']: rule['value'] for rule in rules}
+    for key, value in expected.items():
+        path = tmp_path.joinpath(*key.split('.'))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f'{value}\n')
+    tmp_path.joinpath(*'net.ipv4.conf.all.accept_redirects'.split('.')).write_text('1\n')
+
+    values = security_check.read_sysctls(sorted(expected) + ['kernel.missing'], root=str(tmp_path))
+    issues = security_check.evaluate_rules(rules, values, 'kernel')
+
+    assert values['kernel.missing'] is None
+    assert values['net.ipv4.conf.all.accept_redirects'] == '1'
+    assert [issue['rule'] for issue in issues] == ['kernel_sysctl_net.ipv4.conf.all.accept_redirects']
+
+
+def test_read_sysctls_normalises_whitespace(security_check, tmp_path):
+    path = tmp_path / 'net' / 'ipv4' / 'ip_local_port_range'
+    path.parent.mkdir(parents=True)
+    path.write_text('32768\t60999\n')
+
+    assert security_check.read_sysctls(['net.ipv4.ip_local_port_range'], root=str(tmp_path)) == {
+        'net.ipv4.ip_local_port_range': '32768 60999'}
+
+
+# Passwords
+
+def test_analyze_shadow(security_check, tmp_path):
+    summary = security_check.analyze_shadow(write(tmp_path / 'shadow', SHADOW))
+
+    assert summary['accounts'] == 7
+    assert summary['algorithms'] == {'sha512': 1, 'yescrypt': 1, 'md5': 1, 'des': 1, 'sha256': 1,
+                                     'empty': 1, 'locked': 1}
+    assert summary['empty'] == 1 and summary['locked'] == 1
+    assert summary['examples']['weak_hash'] == ['bob', 'carol']
+    assert summary['examples']['legacy_hash'] == ['legacy']
+    assert summary['examples']['no_expiry'] == ['root']
+    assert summary['max_password_age'] == 99999
+    assert summary['min_password_warn'] == 7
+
+
+def test_parse_login_defs(security_check, tmp_path):
+    path = write(tmp_path / 'login.defs', '# ENCRYPT_METHOD DES\nPASS_MAX_DAYS 90\nENCRYPT_METHOD sha512\n')
+
+    assert security_check.parse_login_defs(path) == {
+        'pass_max_days': 90, 'pass_min_days': None, 'pass_warn_age': None, 'encrypt_method': 'SHA512'}
+    assert security_check.parse_login_defs(str(tmp_path / 'missing'))['encrypt_method'] is None
+
+
+def test_parse_pam_password(security_check, tmp_path):
+    explicit = write(tmp_path / 'explicit', 'password requisite pam_pwquality.so retry=3\n'
+                                            'password [success=1 default=ignore] pam_unix.so obscure sha512 '
+                                            'remember=5\n')
+    inherited = write(tmp_path / 'inherited', 'password required pam_unix.so obscure\n')
+
+    pam = security_check.parse_pam_password([str(tmp_path / 'missing'), explicit])
+    assert pam == {'file': explicit, 'hash': 'sha512', 'quality': True, 'remember': 5}
+
+    assert security_check.parse_pam_password([inherited], 'YESCRYPT')['hash'] == 'yescrypt'
+    unknown = security_check.parse_pam_password([inherited])
+    assert unknown['hash'] is None
+    assert unknown['remember'] == 0
+    assert security_check.parse_pam_password([str(tmp_path / 'missing')]) is None
+
+
+def test_check_passwords_without_hash_method(security_check, tmp_path, monkeypatch):
+    shadow = write(tmp_path / 'shadow', 'root:$6$salt$hash:19000:1:90:14:::\n')
+    login_defs = write(tmp_path / 'login.defs', 'PASS_MAX_DAYS 90\n')
+    pam = write(tmp_path / 'common-password', 'password required pam_unix.so obscure\n')
+    parse_login_defs = security_check.parse_login_defs
+    parse_pam_password = security_check.parse_pam_password
+    monkeypatch.setattr(security_check, 'parse_login_defs', lambda: parse_login_defs(login_defs))
+    monkeypatch.setattr(security_check, 'parse_pam_password',
+                        lambda login_encrypt_method: parse_pam_password([pam], login_encrypt_method))
+
+    issues, summary = security_check.check_passwords(shadow, 'standard')
+
+    # An unset ENCRYPT_METHOD is unknown rather than DES, so no weak hash is reported
+    assert summary['pam']['hash'] is None
+    assert [issue['rule'] for issue in issues] == ['passwords_pam_quality']
+
+
+# Scoring and compliance
+
+def test_calculate_score(security_check):
+    assert security_check.calculate_score([]) == 100
+    assert security_check.calculate_score([{'severity': 'high'}, {'severity': 'low'}]) == 82
+    assert security_check.calculate_score([{'severity': 'critical'}] * 5) == 0
+
+
+def test_check_compliance(security_check):
+    issues = [
+        {'compliant': False, 'standard': 'CIS 5.2.8'},
+        {'compliant': False, 'standard': 'N/A'},
+    ]
+
+    assert security_check.check_compliance([], ['cis']) == {'status': 'compliant', 'standards': {'cis': 'compliant'}}
+    assert security_check.check_compliance(issues, ['cis', 'nist']) == {
+        'status': 'partial', 'standards': {'cis': 'non_compliant', 'nist': 'compliant'}}
+    assert security_check.check_compliance(issues, ['cis'])['status'] == 'non_compliant'
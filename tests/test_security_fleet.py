@@ -0,0 +1,140 @@
+"""Functional tests for the security_fleet callback plugin and the fleet report."""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import REPO_ROOT, load_script
+
+REPORT = os.path.join(REPO_ROOT, 'ansible/scripts/security-fleet-report.py')
+
+
+@pytest.fixture(scope='module')
+def security_fleet():
+    pytest.importorskip('ansible.plugins.callback')
+    return load_script('security_fleet', 'ansible/callback_plugins/security_fleet.py')
+
+
+class Warnings(list):
+    def warning(self, message):
+        self.append(message)
+
+
+def make_callback(security_fleet, db_path):
+    callback = security_fleet.CallbackModule()
+    callback.db_path = str(db_path)
+    callback.commit_interval = 1
+    callback._display = Warnings()
+    callback.v2_playbook_on_start(SimpleNamespace(_file_name='/srv/playbooks/security.yml'))
+    return callback
+
+
+def task_result(host, result, action='summitethic.core.security_check', task='Audit'):
+    return SimpleNamespace(
+        _host=SimpleNamespace(get_name=lambda: host),
+        _task=SimpleNamespace(action=action, get_name=lambda: task),
+        _result=result
+    )
+
+
+def check_result(score, *issues):
+    return {
+        'invocation': {'module_args': {'scan_type': 'config', 'target': '/etc/ssh/sshd_config',
+                                       'ethical_level': 'standard'}},
+        'score': score,
+        'ethical_assessment': {'rating': 'fair'},
+        'compliance': {'status': 'partial'},
+        'issues': [{'standard': standard, 'severity': severity, 'rule': 'rule', 'description': standard}
+                   for standard, severity in issues]
+    }
+
+
+def record_run(security_fleet, db_path, results):
+    callback = make_callback(security_fleet, db_path)
+    for host, result in results:
+        callback.v2_runner_on_ok(task_result(host, result))
+    callback.v2_playbook_on_stats(None)
+
+
+def run_report(db_path, *args):
+    output = subprocess.run([sys.executable, REPORT, *args, '--db', str(db_path), '--format', 'json'],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+# Callback plugin
+
+def test_callback_stores_looped_results(security_fleet, tmp_path):
+    db_path = tmp_path / 'fleet.db'
+    callback = make_callback(security_fleet, db_path)
+
+    callback.v2_runner_on_ok(task_result('web1', {'results': [
+        check_result(70, ('CIS 5.2.8', 'high')),
+        check_result(90),
+        {'skipped': True}
+    ]}))
+    callback.v2_playbook_on_stats(None)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT playbook FROM runs').fetchall() == [('security.yml',)]
+        assert conn.execute('SELECT host, score, rating FROM results ORDER BY id').fetchall() == [
+            ('web1', 70, 'fair'), ('web1', 90, 'fair')]
+        assert conn.execute('SELECT standard_id, severity FROM issues').fetchall() == [('cis', 'high')]
+
+
+def test_callback_ignores_other_tasks(security_fleet, tmp_path):
+    db_path = tmp_path / 'fleet.db'
+    callback = make_callback(security_fleet, db_path)
+
+    callback.v2_runner_on_ok(task_result('web1', {'changed': False}, action='ansible.builtin.copy'))
+    callback.v2_playbook_on_stats(None)
+
+    assert not db_path.exists()
+
+
+def test_callback_warns_once_without_database(security_fleet, tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    callback = make_callback(security_fleet, blocker / 'fleet.db')
+
+    callback.v2_runner_on_ok(task_result('web1', check_result(70)))
+    callback.v2_runner_on_ok(task_result('web2', check_result(80)))
+    callback.v2_playbook_on_stats(None)
+
+    assert len(callback._display) == 1
+    assert 'results are not stored' in callback._display[0]
+
+
+# Report CLI
+
+def test_report_uses_latest_run_per_host(security_fleet, tmp_path):
+    db_path = tmp_path / 'fleet.db'
+    record_run(security_fleet, db_path, [
+        ('web1', check_result(40, ('CIS 5.2.8', 'high'), ('CIS 6.1.3', 'critical'))),
+        ('db1', check_result(60, ('CIS 5.2.8', 'high'))),
+    ])
+    record_run(security_fleet, db_path, [
+        ('web1', check_result(95)),
+    ])
+
+    worst = run_report(db_path, 'worst-hosts')
+    failures = run_report(db_path, 'common-failures', '--standard', 'CIS')
+    history = run_report(db_path, 'host-history', '--host', 'web1')
+
+    assert [(row['host'], row['avg_score'], row['critical_high']) for row in worst] == [
+        ('db1', 60.0, 1), ('web1', 95.0, 0)]
+    assert [(row['standard'], row['hosts'], row['occurrences']) for row in failures] == [('CIS 5.2.8', 1, 1)]
+    assert [(row['avg_score'], row['issues']) for row in history] == [(95.0, 0), (40.0, 2)]
+
+
+def test_report_requires_database(tmp_path):
+    result = subprocess.run([sys.executable, REPORT, 'severity', '--db', str(tmp_path / 'missing.db')],
+                            capture_output=True, text=True)
+
+    assert result.returncode == 1
+    assert 'fleet database not found' in result.stdout